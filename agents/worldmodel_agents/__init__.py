@@ -2,6 +2,7 @@ from worldmodel_agents.base import AgentConfig, BaseAgent
 from worldmodel_agents.imagination_mpc import ImaginationMPCAgent
 from worldmodel_agents.oracle_agent import GreedyOracleAgent, PlannerOnlyOracleAgent
 from worldmodel_agents.ppo_agent import ModelFreePPOAgent
+from worldmodel_agents.ppo_trainer import VectorPPOTrainer
 from worldmodel_agents.random_agent import RandomAgent
 from worldmodel_agents.registry import create_agent
 from worldmodel_agents.search_mcts import SearchMCTSAgent
@@ -13,6 +14,7 @@ __all__ = [
     "GreedyOracleAgent",
     "PlannerOnlyOracleAgent",
     "ModelFreePPOAgent",
+    "VectorPPOTrainer",
     "ImaginationMPCAgent",
     "SearchMCTSAgent",
     "create_agent",
@@ -24,6 +24,15 @@ def seed_everything(seed: int) -> None:
 
 
 class BaseAgent:
+    # Observation entries (``"symbolic"`` / ``"rgb"``) that ``act``/``observe``
+    # actually read. The eval harness uses this to pick the cheapest env
+    # ``obs_mode``; ``None`` means unknown, so every entry is rendered.
+    observation_keys: tuple[str, ...] | None = None
+    # True when behaviour in one episode depends on earlier episodes (e.g. the
+    # agent keeps learning across resets). Such agents are never sharded
+    # across parallel eval workers.
+    learns_across_episodes: bool = False
+
     def __init__(self, config: AgentConfig | None = None):
         self.config = config or AgentConfig()
         self.last_imagined_transitions = 0
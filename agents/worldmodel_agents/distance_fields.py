@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+
+# Move action id -> (row, col) delta, in the order BFS tries them (up, down, left, right).
+_MOVES: tuple[tuple[int, tuple[int, int]], ...] = (
+    (1, (-1, 0)),
+    (2, (1, 0)),
+    (3, (0, -1)),
+    (4, (0, 1)),
+)
+_STAY = 0
+
+
+class DistanceFields:
+    """Shortest-path distance fields over one privileged wall grid.
+
+    ``field(goal, blocked)`` is an ``int64`` grid holding the 4-connected
+    distance from every cell to ``goal`` (``-1`` where unreachable), built by a
+    vectorized BFS outward from ``goal`` the first time it is asked for and
+    cached afterwards. ``blocked`` names extra impassable cells, e.g. a closed
+    door; the goal itself stays enterable even when blocked. Walls never change
+    within an episode, so one instance answers every distance and first-step
+    query of the episode with array lookups.
+    """
+
+    def __init__(self, walls):
+        self.walls = np.asarray(walls) == 1
+        self.grid_size = int(self.walls.shape[0])
+        self._fields: dict[tuple[tuple[int, int], frozenset], np.ndarray] = {}
+
+    def matches(self, walls) -> bool:
+        """Whether ``walls`` is the grid these fields were built for."""
+        return np.array_equal(self.walls, np.asarray(walls) == 1)
+
+    def field(self, goal: tuple[int, int], blocked: Iterable[tuple[int, int]] = ()) -> np.ndarray:
+        blocked = frozenset(blocked)
+        key = (goal, blocked)
+        dist = self._fields.get(key)
+        if dist is None:
+            dist = self._fields[key] = self._bfs(goal, blocked)
+        return dist
+
+    def distance(
+        self,
+        start: tuple[int, int],
+        goal: tuple[int, int],
+        blocked: Iterable[tuple[int, int]] = (),
+    ) -> int | None:
+        """Shortest-path length from ``start`` to ``goal``, or ``None`` if unreachable."""
+        if start == goal:
+            return 0
+        dist = self.field(goal, blocked)
+        d = int(dist[start])
+        if d >= 0:
+            return d
+        # ``start`` itself is impassable (e.g. standing in a blocked cell):
+        # leave it through its best neighbour.
+        best = self._best_neighbour(start, dist)
+        return None if best is None else best[1] + 1
+
+    def first_step(
+        self,
+        start: tuple[int, int],
+        goal: tuple[int, int],
+        blocked: Iterable[tuple[int, int]] = (),
+    ) -> int | None:
+        """First move action on a shortest path, ``_STAY`` at the goal, ``None`` if unreachable.
+
+        Among equally short paths the lowest action id wins, which is the move
+        a BFS from ``start`` expanding up, down, left, right finds first.
+        """
+        if start == goal:
+            return _STAY
+        best = self._best_neighbour(start, self.field(goal, blocked))
+        return None if best is None else best[0]
+
+    def _best_neighbour(self, start, dist: np.ndarray) -> tuple[int, int] | None:
+        """``(action, distance)`` of the reachable neighbour of ``start`` closest to the goal."""
+        best = None
+        for action, (dr, dc) in _MOVES:
+            r, c = start[0] + dr, start[1] + dc
+            if not (0 <= r < self.grid_size and 0 <= c < self.grid_size):
+                continue
+            d = int(dist[r, c])
+            if d >= 0 and (best is None or d < best[1]):
+                best = (action, d)
+        return best
+
+    def _bfs(self, goal: tuple[int, int], blocked: frozenset) -> np.ndarray:
+        passable = ~self.walls
+        for cell in blocked:
+            if cell != goal:
+                passable[cell] = False
+        dist = np.full(self.walls.shape, -1, dtype=np.int64)
+        if not (0 <= goal[0] < self.grid_size and 0 <= goal[1] < self.grid_size):
+            return dist
+        if self.walls[goal]:
+            return dist
+        frontier = np.zeros_like(passable)
+        frontier[goal] = True
+        reached = frontier.copy()
+        dist[goal] = 0
+        step = 0
+        while frontier.any():
+            step += 1
+            grown = np.zeros_like(frontier)
+            grown[1:] |= frontier[:-1]
+            grown[:-1] |= frontier[1:]
+            grown[:, 1:] |= frontier[:, :-1]
+            grown[:, :-1] |= frontier[:, 1:]
+            frontier = grown & passable & ~reached
+            dist[frontier] = step
+            reached |= frontier
+        return dist
@@ -1,24 +1,12 @@
 from __future__ import annotations
 
 import numpy as np
-import torch
 from worldmodel_models.common import ModelConfig, to_numpy_obs
 from worldmodel_models.registry import create_world_model
 from worldmodel_planners.mpc_cem import MPCCEMPlanner
 
 from worldmodel_agents.base import AgentConfig, BaseAgent
-
-
-def _clone_state(value):
-    if isinstance(value, torch.Tensor):
-        return value.detach().clone()
-    if isinstance(value, dict):
-        return {key: _clone_state(item) for key, item in value.items()}
-    if isinstance(value, list):
-        return [_clone_state(item) for item in value]
-    if isinstance(value, tuple):
-        return tuple(_clone_state(item) for item in value)
-    return value
+from worldmodel_agents.replay import ReplayBuffer
 
 
 class ImaginationMPCAgent(BaseAgent):
@@ -39,6 +27,8 @@ class ImaginationMPCAgent(BaseAgent):
     action sequences across runs.
     """
 
+    observation_keys = ("symbolic",)
+
     def __init__(self, config: AgentConfig | None = None, seed: int = 0):
         super().__init__(config=config)
         self.seed = seed
@@ -54,8 +44,10 @@ class ImaginationMPCAgent(BaseAgent):
             seed=seed,
         )
         self.latent = self.world_model.init_state(batch_size=1)
-        self.buffer: list[dict] = []
+        self.buffer = ReplayBuffer(capacity=512)
         self.rng = np.random.default_rng(seed)
+        # False while running a pretrained checkpoint: act on frozen weights.
+        self.online_updates = True
 
     def _build_world_model(self):
         """Construct the ensemble world model, sized to the env when known.
@@ -71,7 +63,7 @@ class ImaginationMPCAgent(BaseAgent):
             if self._obs_dim is None
             else ModelConfig(obs_dim=self._obs_dim, action_dim=self.config.action_space_n)
         )
-        return create_world_model("ensemble", config=config, seed=self.seed)
+        return create_world_model("ensemble_stacked", config=config, seed=self.seed)
 
     def _match_world_model_to_obs(self, obs) -> None:
         """Resize the world model to the env's actual observation on first sight."""
@@ -89,7 +81,8 @@ class ImaginationMPCAgent(BaseAgent):
             self.rng = np.random.default_rng(self.seed)
             self.world_model = self._build_world_model()
             self.planner.reseed(self.seed)
-            self.buffer = []
+            self.buffer.clear()
+            self.online_updates = True
         self.latent = self.world_model.init_state(batch_size=1)
         self.last_imagined_transitions = 0
         self.last_planner_trace = {}
@@ -99,27 +92,32 @@ class ImaginationMPCAgent(BaseAgent):
         self._match_world_model_to_obs(obs)
         self.latent = self.world_model.observe(self.latent, obs)
 
-        def rollout_fn(state, action_seq):
-            rollout = self.world_model.imagine_rollout(state, action_seq)
-            score = float(sum(rollout.get("pred_rewards", [])))
-            score -= 0.05 * float(rollout.get("uncertainty", 0.0))
-            return score, rollout
+        def batch_rollout_fn(state, action_seqs):
+            # The whole CEM population is imagined in one masked batched rollout.
+            rollout = self.world_model.imagine_rollout_batch(state, action_seqs)
+            scores = rollout["pred_rewards"].sum(dim=1) - 0.05 * rollout["uncertainty"]
+            return scores.cpu().numpy()
 
-        result = self.planner.plan(
-            root_state=self.latent,
-            rollout_fn=rollout_fn,
-            clone_state_fn=_clone_state,
-        )
+        result = self.planner.plan(root_state=self.latent, batch_rollout_fn=batch_rollout_fn)
         self.last_imagined_transitions = result.imagined_transitions
         self.last_planner_trace = result.trace
         return int(result.action)
 
     def observe(self, transition: dict) -> None:
-        self.buffer.append(transition)
-        if len(self.buffer) > 512:
-            self.buffer = self.buffer[-512:]
-
+        if not self.online_updates:
+            return
+        self.buffer.add(transition)
         if len(self.buffer) >= 32 and hasattr(self.world_model, "update"):
-            idx = self.rng.choice(len(self.buffer), size=16, replace=False)
-            batch = [self.buffer[int(i)] for i in idx]
-            self.world_model.update(batch)
+            self.world_model.update(self.buffer.sample(16, self.rng))
+
+    def checkpoint_state(self) -> dict:
+        """Trained world model plus the obs size it was built for (see ``load_checkpoint_state``)."""
+        return {"obs_dim": self._obs_dim, "world_model": self.world_model.save_state()}
+
+    def load_checkpoint_state(self, state: dict) -> None:
+        """Adopt a pretrained world model and stop learning online until the next seeded reset."""
+        self._obs_dim = state["obs_dim"]
+        self.world_model = self._build_world_model()
+        self.world_model.load_state(state["world_model"])
+        self.latent = self.world_model.init_state(batch_size=1)
+        self.online_updates = False
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-import copy
-from collections import deque
+from dataclasses import replace
 
 from worldmodel_planners.mcts import MCTSPlanner
 
 from worldmodel_agents.base import AgentConfig, BaseAgent
+from worldmodel_agents.distance_fields import DistanceFields
 
 # Movement action ids (shared by all BaseGridEnv subclasses).
 #   1 = up    (row - 1)
@@ -21,58 +21,11 @@ _MOVE_ACTIONS: dict[tuple[int, int], int] = {
 _STAY = 0
 
 
-def _bfs_first_step(
-    start: tuple[int, int],
-    goal: tuple[int, int],
-    walls: list[list[int]],
-    grid_size: int,
-    extra_blocked: set[tuple[int, int]] | None = None,
-) -> int | None:
-    """Return the first move action on a shortest grid path from ``start`` to ``goal``.
-
-    Uses breadth-first search over 4-connected free cells of the privileged wall
-    grid (``walls[r][c] == 1`` is impassable). ``extra_blocked`` marks additional
-    cells (e.g. a still-closed door) that must be treated as walls. The goal cell
-    itself is always treated as enterable even if it is in ``extra_blocked`` so we
-    can path *onto* it once it becomes reachable.
-
-    Returns the action id (1-4) of the first step, ``_STAY`` (0) when already at
-    the goal, or ``None`` when the goal is unreachable.
-    """
-    if start == goal:
-        return _STAY
-
-    extra_blocked = extra_blocked or set()
-
-    def passable(r: int, c: int) -> bool:
-        if r < 0 or r >= grid_size or c < 0 or c >= grid_size:
-            return False
-        if walls[r][c] == 1:
-            return False
-        if (r, c) in extra_blocked and (r, c) != goal:
-            return False
-        return True
-
-    # BFS, remembering the first action taken out of the start cell so we can
-    # recover the immediate move once the goal is popped.
-    queue: deque[tuple[int, int, int]] = deque()
-    visited = {start}
-    for (dr, dc), action in _MOVE_ACTIONS.items():
-        nr, nc = start[0] + dr, start[1] + dc
-        if passable(nr, nc):
-            queue.append((nr, nc, action))
-            visited.add((nr, nc))
-
-    while queue:
-        r, c, first_action = queue.popleft()
-        if (r, c) == goal:
-            return first_action
-        for dr, dc in _MOVE_ACTIONS:
-            nr, nc = r + dr, c + dc
-            if (nr, nc) not in visited and passable(nr, nc):
-                visited.add((nr, nc))
-                queue.append((nr, nc, first_action))
-    return None
+def _distance_fields(current: DistanceFields | None, walls) -> DistanceFields:
+    """``current`` if it was built for ``walls``, else fresh fields for the new layout."""
+    if current is not None and current.matches(walls):
+        return current
+    return DistanceFields(walls)
 
 
 def _as_tuple(pos) -> tuple[int, int]:
@@ -98,9 +51,10 @@ class GreedyOracleAgent(BaseAgent):
     """Privileged oracle that solves the task via real shortest-path planning.
 
     Unlike a naive Manhattan-greedy controller (which deadlocks against walls),
-    this agent runs breadth-first search over the fully-observed wall grid that
-    each env exposes through ``info['oracle_hint']`` (see the core workstream's
-    oracle-hint contract). It chains the per-env subgoals:
+    this agent follows BFS distance fields over the fully-observed wall grid
+    that each env exposes through ``info['oracle_hint']`` (see the core
+    workstream's oracle-hint contract); the fields are built once per subgoal
+    and layout. It chains the per-env subgoals:
 
     - memory_maze: go to the key, open the door from an adjacent cell, then walk
       to the goal. The closed door cell is treated as an obstacle for BFS until
@@ -112,8 +66,11 @@ class GreedyOracleAgent(BaseAgent):
     When the wall grid is unavailable it degrades to Manhattan greedy.
     """
 
+    observation_keys = ()
+
     def __init__(self, config: AgentConfig | None = None):
         super().__init__(config=config)
+        self._fields: DistanceFields | None = None
 
     def _step_toward(self, hint: dict, agent: tuple[int, int], target, extra_blocked=None) -> int:
         target_t = _as_tuple(target)
@@ -121,7 +78,8 @@ class GreedyOracleAgent(BaseAgent):
         grid_size = hint.get("grid_size")
         if walls is None or grid_size is None:
             return _manhattan_step(agent, target_t)
-        action = _bfs_first_step(agent, target_t, walls, int(grid_size), extra_blocked)
+        self._fields = _distance_fields(self._fields, walls)
+        action = self._fields.first_step(agent, target_t, extra_blocked or ())
         if action is None:
             # Unreachable under current obstacles; fall back to greedy nudge.
             return _manhattan_step(agent, target_t)
@@ -179,17 +137,17 @@ class GreedyOracleAgent(BaseAgent):
             return self._step_toward(hint, agent, gem)
         return _STAY
 
-    @staticmethod
-    def _nearest(agent: tuple[int, int], positions, hint: dict):
+    def _nearest(self, agent: tuple[int, int], positions, hint: dict):
         """Pick the position with the shortest true BFS distance (Manhattan fallback)."""
         walls = hint.get("walls")
         grid_size = hint.get("grid_size")
         if walls is None or grid_size is None:
             return min(positions, key=lambda p: abs(p[0] - agent[0]) + abs(p[1] - agent[1]))
+        self._fields = _distance_fields(self._fields, walls)
         best = positions[0]
         best_dist = None
         for pos in positions:
-            dist = _bfs_distance(agent, _as_tuple(pos), walls, int(grid_size))
+            dist = self._fields.distance(agent, _as_tuple(pos))
             key = dist if dist is not None else abs(pos[0] - agent[0]) + abs(pos[1] - agent[1])
             if best_dist is None or key < best_dist:
                 best_dist = key
@@ -197,27 +155,8 @@ class GreedyOracleAgent(BaseAgent):
         return best
 
 
-def _bfs_distance(
-    start: tuple[int, int], goal: tuple[int, int], walls: list[list[int]], grid_size: int
-) -> int | None:
-    if start == goal:
-        return 0
-
-    def passable(r: int, c: int) -> bool:
-        return 0 <= r < grid_size and 0 <= c < grid_size and walls[r][c] != 1
-
-    queue: deque[tuple[int, int, int]] = deque([(start[0], start[1], 0)])
-    visited = {start}
-    while queue:
-        r, c, dist = queue.popleft()
-        if (r, c) == goal:
-            return dist
-        for dr, dc in _MOVE_ACTIONS:
-            nr, nc = r + dr, c + dc
-            if (nr, nc) not in visited and passable(nr, nc):
-                visited.add((nr, nc))
-                queue.append((nr, nc, dist + 1))
-    return None
+def _identity(state):
+    return state
 
 
 class PlannerOnlyOracleAgent(BaseAgent):
@@ -240,6 +179,8 @@ class PlannerOnlyOracleAgent(BaseAgent):
     privileged/exact. This agent measures planning quality given a perfect model.
     """
 
+    observation_keys = ()
+
     def __init__(self, config: AgentConfig | None = None, seed: int = 0):
         super().__init__(config=config)
         self.seed = seed
@@ -250,24 +191,49 @@ class PlannerOnlyOracleAgent(BaseAgent):
         #     that most improves the potential rather than spreading uniformly.
         #   * A shallow ``max_depth`` (3) keeps each backed-up value close to the
         #     leaf heuristic (which is exact and free of local minima along the
-        #     optimal path) instead of a noisy deep random rollout, and keeps the
-        #     per-step ``deepcopy`` cost of the true simulator bounded.
+        #     optimal path) instead of a noisy deep random rollout.
         #   * ``num_simulations`` (96) is large enough that the best action
         #     reliably accumulates the most visits given the shallow depth.
         # With this budget the planner solves memory_maze, switch_quest, and
         # craft_lite across seeds (see tests).
+        # Snapshots reached by different action orders (or by bumping into a
+        # wall) are merged into one search node, so every (state, action) edge
+        # is simulated once per plan; see :meth:`_state_key` for when the step
+        # count still tells them apart. The search graph under each executed
+        # action is carried over to the next step; env snapshots are exact, so
+        # it is only reused when the real next state matches the simulated one.
         self.planner = MCTSPlanner(
             action_space_n=self.config.action_space_n,
             num_simulations=96,
             max_depth=3,
             c_uct=0.05,
             seed=seed,
+            reuse_tree=True,
+            state_key_fn=self._state_key,
+            transpositions=True,
         )
+        self._fields: DistanceFields | None = None
+        # First step count at which snapshots keep ``step_count`` in their
+        # search key; set from the env's ``max_steps`` on every :meth:`act`.
+        self._exact_from = 0
+
+    def _state_key(self, state):
+        """Search key of an env snapshot.
+
+        Away from the step limit ``step_count`` is dropped, so revisited cells
+        merge in the search. Within ``max_depth`` steps of ``max_steps`` a
+        transition may truncate, so there snapshots are only merged with ones
+        at the same step count, which keeps every stored ``done`` exact.
+        """
+        if state.step_count >= self._exact_from:
+            return state
+        return replace(state, step_count=0)
 
     def reset(self, seed: int | None = None) -> None:
         if seed is not None:
             self.seed = int(seed)
             self.planner.reseed(int(seed))
+        self.planner.reset_tree()
         self.last_imagined_transitions = 0
         self.last_planner_trace = {}
 
@@ -278,6 +244,7 @@ class PlannerOnlyOracleAgent(BaseAgent):
             return _STAY
 
         root_state = env.clone_env_state()
+        self._exact_from = env.config.max_steps - self.planner.max_depth
         hint = info.get("oracle_hint") or (env.oracle_hint() if hasattr(env, "oracle_hint") else {})
         walls = hint.get("walls")
         grid_size = hint.get("grid_size")
@@ -286,6 +253,7 @@ class PlannerOnlyOracleAgent(BaseAgent):
         if walls is not None and grid_size is not None:
             grid_size = int(grid_size)
             n_subgoals = self._max_subgoals(hint)
+            fields = self._fields = _distance_fields(self._fields, walls)
 
             def value_fn(state):
                 # Privileged potential-based shaping for NON-TERMINAL leaves.
@@ -313,13 +281,13 @@ class PlannerOnlyOracleAgent(BaseAgent):
                 #    backed up by MCTS always strictly dominates -- the planner
                 #    prefers finishing over hovering at a high-potential state.
                 progress_gain = 3.0
-                agent_pos = _as_tuple(state.get("agent_pos", [0, 0]))
+                agent_pos = state.agent_pos
                 progress = self._leaf_progress(state, hint)
                 subgoal = self._leaf_subgoal(state, hint, agent_pos)
                 diag = 2.0 * float(grid_size)
                 closeness = 0.0
                 if subgoal is not None:
-                    dist = _bfs_distance(agent_pos, subgoal, walls, grid_size)
+                    dist = fields.distance(agent_pos, subgoal)
                     if dist is None:
                         dist = abs(agent_pos[0] - subgoal[0]) + abs(agent_pos[1] - subgoal[1])
                     closeness = max(0.0, 1.0 - float(dist) / diag)
@@ -329,47 +297,52 @@ class PlannerOnlyOracleAgent(BaseAgent):
         def transition_fn(state, action):
             return env.simulate_from_state(state, action)
 
+        cache_info = getattr(env, "transition_cache_info", None)
+        before = cache_info() if cache_info is not None else None
         result = self.planner.plan(
             root_state=root_state,
             transition_fn=transition_fn,
-            clone_state_fn=copy.deepcopy,
+            # Env snapshots are immutable, so sharing them between nodes is safe.
+            clone_state_fn=_identity,
             value_fn=value_fn,
         )
+        if before is not None:
+            after = cache_info()
+            result.trace["transition_cache"] = {
+                "hits": after["hits"] - before["hits"],
+                "misses": after["misses"] - before["misses"],
+            }
         self.last_imagined_transitions = result.imagined_transitions
         self.last_planner_trace = result.trace
         return int(result.action)
 
-    def _leaf_subgoal(self, state: dict, hint: dict, agent_pos: tuple[int, int]):
-        """Compute the active subgoal from a simulated leaf env-state dict.
+    def _leaf_subgoal(self, state, hint: dict, agent_pos: tuple[int, int]):
+        """Compute the active subgoal from a simulated leaf env snapshot.
 
-        The cloned env ``__dict__`` carries the privileged fields directly, so we
-        reconstruct progress (e.g. has_key/door_open or inventory) from it and
-        fall back to the static positions captured in ``hint``.
+        The snapshot carries the privileged fields directly, so we reconstruct
+        progress (e.g. has_key/door_open or inventory) from it; ``hint`` only
+        selects the env family and supplies the first wood position.
         """
         if "has_key" in hint:
-            if not bool(state.get("has_key", False)):
-                return _as_tuple(state.get("key_pos", hint.get("key_pos", agent_pos)))
-            if not bool(state.get("door_open", False)):
-                return _as_tuple(state.get("door_pos", hint.get("door_pos", agent_pos)))
-            return _as_tuple(state.get("goal_pos", hint.get("goal_pos", agent_pos)))
+            if not state.has_key:
+                return state.key_pos
+            if not state.door_open:
+                return state.door_pos
+            return state.goal_pos
         if "next_target_pos" in hint:
-            switches = state.get("switches")
-            sequence = state.get("sequence")
-            progress = int(state.get("progress", 0))
-            if switches is not None and sequence is not None and progress < len(sequence):
-                idx = int(sequence[progress])
-                return _as_tuple(switches[idx])
+            if state.progress < len(state.sequence):
+                return state.switches[state.sequence[state.progress]]
             return (
                 None if hint.get("next_target_pos") is None else _as_tuple(hint["next_target_pos"])
             )
         if "inventory" in hint:
-            inv = state.get("inventory", hint.get("inventory", {}))
-            if inv.get("tool", 0) < 1:
-                if inv.get("wood", 0) < 1 and hint.get("wood_positions"):
+            inv = state.inventory
+            if inv.tool < 1:
+                if inv.wood < 1 and hint.get("wood_positions"):
                     return _as_tuple(hint["wood_positions"][0])
-                return _as_tuple(state.get("station_pos", hint.get("station_pos", agent_pos)))
-            if inv.get("gem", 0) < 1:
-                return _as_tuple(state.get("gem_pos", hint.get("gem_pos", agent_pos)))
+                return state.station_pos
+            if inv.gem < 1:
+                return state.gem_pos
         return None
 
     @staticmethod
@@ -384,22 +357,20 @@ class PlannerOnlyOracleAgent(BaseAgent):
         return 1
 
     @staticmethod
-    def _leaf_progress(state: dict, hint: dict) -> float:
+    def _leaf_progress(state, hint: dict) -> float:
         """Count completed subgoals in a simulated leaf state (monotone potential)."""
         if "has_key" in hint:
-            return float(bool(state.get("has_key", False))) + float(
-                bool(state.get("door_open", False))
-            )
+            return float(state.has_key) + float(state.door_open)
         if "next_target_pos" in hint:
-            return float(int(state.get("progress", 0)))
+            return float(state.progress)
         if "inventory" in hint:
             # Use cumulative achievement counters (not the live inventory) so the
             # potential is strictly monotone across the wood->tool transition,
             # where wood is consumed: 0 -> 1 (wood) -> 2 (tool) -> 3 (gem).
-            ach = state.get("achievements", hint.get("achievements", {}))
+            ach = state.achievements
             return (
-                float(min(1, ach.get("collect_wood", 0)))
-                + float(min(1, ach.get("craft_tool", 0)))
-                + float(min(1, ach.get("collect_gem", 0)))
+                float(min(1, ach.collect_wood))
+                + float(min(1, ach.craft_tool))
+                + float(min(1, ach.collect_gem))
             )
         return 0.0
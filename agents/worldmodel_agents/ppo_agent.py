@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from collections.abc import Mapping
+from dataclasses import dataclass
 
 import numpy as np
 import torch
@@ -11,8 +12,8 @@ from worldmodel_agents.base import AgentConfig, BaseAgent
 
 
 def _to_flat_obs(obs) -> np.ndarray:
-    """Flatten an env observation (dict / array) into a 1-D float32 vector."""
-    if isinstance(obs, dict):
+    """Flatten an env observation (mapping / array) into a 1-D float32 vector."""
+    if isinstance(obs, Mapping):
         if "symbolic" in obs:
             arr = np.asarray(obs["symbolic"], dtype=np.float32)
         elif "rgb" in obs:
@@ -24,6 +25,62 @@ def _to_flat_obs(obs) -> np.ndarray:
     return arr.reshape(-1)
 
 
+def _discounted_reverse_cumsum(x: np.ndarray, dones: np.ndarray, discount: float) -> np.ndarray:
+    """``y[t] = x[t] + discount * (1 - dones[t]) * y[t + 1]`` along axis 0.
+
+    A done at ``t`` restarts the sum, so ``y[t]`` is the discounted sum of
+    ``x`` from ``t`` to the end of its episode segment. Solved as a parallel
+    (doubling) scan: after the pass with stride ``s`` every ``y[t]`` covers
+    ``x[t : t + 2s]`` and ``coef[t]`` is the discount product over that span,
+    so ``log2(T)`` whole-array passes replace the per-step loop.
+    """
+    y = x.copy()
+    coef = discount * (1.0 - dones.astype(x.dtype))
+    stride = 1
+    while stride < len(y):
+        y[:-stride] += coef[:-stride] * y[stride:]
+        coef[:-stride] *= coef[stride:].copy()
+        stride *= 2
+    return y
+
+
+def compute_gae(
+    rewards,
+    values,
+    dones,
+    bootstrap_value,
+    gamma: float,
+    gae_lambda: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """GAE(lambda) along the leading (time) axis; returns ``(advantages, returns)``.
+
+    ``rewards``, ``values`` and ``dones`` are ``[T]`` or ``[T, N]`` (one
+    column per env); ``bootstrap_value`` is the value after the last step,
+    a scalar or ``[N]``. A done at step ``t`` stops bootstrapping past ``t``.
+    TD residuals are computed in one pass and accumulated with a discounted
+    reverse cumsum scan in float64.
+    """
+    rewards = np.asarray(rewards, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    dones = np.asarray(dones, dtype=bool)
+    if len(rewards) == 0:
+        return np.zeros_like(rewards), np.zeros_like(values)
+    columns = rewards.reshape(len(rewards), -1).shape[1]
+    bootstrap = np.broadcast_to(
+        np.asarray(bootstrap_value, dtype=np.float64).reshape(-1), (columns,)
+    )
+    values64 = values.astype(np.float64).reshape(len(values), columns)
+    next_values = np.concatenate([values64[1:], bootstrap[None]], axis=0)
+    masks = 1.0 - dones.reshape(len(dones), columns)
+    deltas = rewards.reshape(len(rewards), columns) + gamma * next_values * masks - values64
+    advantages = _discounted_reverse_cumsum(
+        deltas, dones.reshape(len(dones), columns), gamma * gae_lambda
+    )
+    advantages = advantages.astype(np.float32).reshape(rewards.shape)
+    returns = advantages + values
+    return advantages, returns
+
+
 @dataclass
 class PPOConfig:
     hidden_dim: int = 128
@@ -39,35 +96,80 @@ class PPOConfig:
     rollout_len: int = 256
 
 
-@dataclass
 class RolloutBuffer:
-    """Fixed-purpose on-policy buffer holding one rollout's transitions."""
+    """On-policy buffer holding one rollout's transitions in preallocated arrays.
 
-    obs: list[np.ndarray] = field(default_factory=list)
-    actions: list[int] = field(default_factory=list)
-    log_probs: list[float] = field(default_factory=list)
-    values: list[float] = field(default_factory=list)
-    rewards: list[float] = field(default_factory=list)
-    dones: list[bool] = field(default_factory=list)
+    Rows are written in order into arrays sized for ``capacity`` transitions
+    (doubled if a rollout runs longer); the ``obs``, ``actions``,
+    ``log_probs``, ``values``, ``rewards`` and ``dones`` attributes are views
+    of the filled prefix, ready for ``torch.from_numpy`` without copying.
+    The obs width is taken from the first transition added.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = max(1, int(capacity))
+        self._obs: np.ndarray | None = None
+        self._actions = np.zeros(self.capacity, dtype=np.int64)
+        self._log_probs = np.zeros(self.capacity, dtype=np.float32)
+        self._values = np.zeros(self.capacity, dtype=np.float32)
+        self._rewards = np.zeros(self.capacity, dtype=np.float32)
+        self._dones = np.zeros(self.capacity, dtype=bool)
+        self._size = 0
 
     def __len__(self) -> int:
-        return len(self.actions)
+        return self._size
+
+    @property
+    def obs(self) -> np.ndarray:
+        if self._obs is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._obs[: self._size]
+
+    @property
+    def actions(self) -> np.ndarray:
+        return self._actions[: self._size]
+
+    @property
+    def log_probs(self) -> np.ndarray:
+        return self._log_probs[: self._size]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[: self._size]
+
+    @property
+    def rewards(self) -> np.ndarray:
+        return self._rewards[: self._size]
+
+    @property
+    def dones(self) -> np.ndarray:
+        return self._dones[: self._size]
 
     def add(self, obs, action, log_prob, value, reward, done) -> None:
-        self.obs.append(obs)
-        self.actions.append(int(action))
-        self.log_probs.append(float(log_prob))
-        self.values.append(float(value))
-        self.rewards.append(float(reward))
-        self.dones.append(bool(done))
+        obs = np.asarray(obs, dtype=np.float32).reshape(-1)
+        if self._obs is None:
+            self._obs = np.zeros((self.capacity, obs.size), dtype=np.float32)
+        if self._size == self.capacity:
+            self._grow()
+        row = self._size
+        self._obs[row] = obs
+        self._actions[row] = int(action)
+        self._log_probs[row] = float(log_prob)
+        self._values[row] = float(value)
+        self._rewards[row] = float(reward)
+        self._dones[row] = bool(done)
+        self._size += 1
 
     def clear(self) -> None:
-        self.obs.clear()
-        self.actions.clear()
-        self.log_probs.clear()
-        self.values.clear()
-        self.rewards.clear()
-        self.dones.clear()
+        self._size = 0
+
+    def _grow(self) -> None:
+        self.capacity *= 2
+        for name in ("_obs", "_actions", "_log_probs", "_values", "_rewards", "_dones"):
+            old = getattr(self, name)
+            new = np.zeros((self.capacity, *old.shape[1:]), dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
 
 
 class ActorCritic(nn.Module):
@@ -111,6 +213,10 @@ class ModelFreePPOAgent(BaseAgent):
     but the update is a correct PPO step that measurably changes policy params.
     """
 
+    observation_keys = ("symbolic",)
+    # Network weights persist across resets, so episodes are not independent.
+    learns_across_episodes = True
+
     def __init__(self, config: AgentConfig | None = None, ppo_config: PPOConfig | None = None):
         super().__init__(config=config)
         self.ppo = ppo_config or PPOConfig()
@@ -121,13 +227,16 @@ class ModelFreePPOAgent(BaseAgent):
         self.net: ActorCritic | None = None
         self.optimizer: torch.optim.Optimizer | None = None
         self.obs_dim: int | None = None
-        self.buffer = RolloutBuffer()
+        self.buffer = RolloutBuffer(capacity=self.ppo.rollout_len)
         self._last_loss: float | None = None
         self._last_step: dict | None = None
+        # False while running a pretrained checkpoint: act on frozen weights.
+        self.online_updates = True
 
     def reset(self, seed: int | None = None) -> None:
         if seed is not None:
             self.seed = int(seed)
+            self.online_updates = True
         torch.manual_seed(self.seed)
         np.random.seed(self.seed)
         # Rebuild only if the network has not been created yet (preserve learned
@@ -170,6 +279,9 @@ class ModelFreePPOAgent(BaseAgent):
         return action
 
     def observe(self, transition: dict) -> None:
+        if not self.online_updates:
+            self._last_step = None
+            return
         if self._last_step is None or self.net is None:
             return
         done = bool(transition.get("done", False))
@@ -191,6 +303,25 @@ class ModelFreePPOAgent(BaseAgent):
             self.update(bootstrap_value=bootstrap_value)
             self.buffer.clear()
 
+    def checkpoint_state(self) -> dict:
+        """Policy/value weights and optimizer state (see ``load_checkpoint_state``)."""
+        if self.net is None or self.optimizer is None:
+            msg = "PPO agent has no network to checkpoint yet"
+            raise ValueError(msg)
+        return {
+            "obs_dim": self.obs_dim,
+            "net": self.net.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+        }
+
+    def load_checkpoint_state(self, state: dict) -> None:
+        """Adopt pretrained weights and stop learning online until the next seeded reset."""
+        self._build_network(int(state["obs_dim"]))
+        self.net.load_state_dict(state["net"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.buffer.clear()
+        self.online_updates = False
+
     @torch.no_grad()
     def _value_of(self, obs_flat: np.ndarray) -> float:
         tensor = torch.from_numpy(obs_flat).float().to(self.device).unsqueeze(0)
@@ -199,21 +330,14 @@ class ModelFreePPOAgent(BaseAgent):
 
     def _compute_gae(self, bootstrap_value: float) -> tuple[np.ndarray, np.ndarray]:
         """Generalized Advantage Estimation; returns (advantages, returns)."""
-        rewards = np.asarray(self.buffer.rewards, dtype=np.float32)
-        values = np.asarray(self.buffer.values, dtype=np.float32)
-        dones = np.asarray(self.buffer.dones, dtype=np.float32)
-        n = len(rewards)
-        advantages = np.zeros(n, dtype=np.float32)
-        gae = 0.0
-        next_value = float(bootstrap_value)
-        for t in reversed(range(n)):
-            mask = 1.0 - dones[t]
-            delta = rewards[t] + self.ppo.gamma * next_value * mask - values[t]
-            gae = delta + self.ppo.gamma * self.ppo.gae_lambda * mask * gae
-            advantages[t] = gae
-            next_value = values[t]
-        returns = advantages + values
-        return advantages, returns
+        return compute_gae(
+            self.buffer.rewards,
+            self.buffer.values,
+            self.buffer.dones,
+            bootstrap_value,
+            gamma=self.ppo.gamma,
+            gae_lambda=self.ppo.gae_lambda,
+        )
 
     def update(self, bootstrap_value: float = 0.0) -> float | None:
         """Run PPO minibatch SGD on the current rollout buffer.
@@ -225,16 +349,28 @@ class ModelFreePPOAgent(BaseAgent):
             return None
 
         advantages, returns = self._compute_gae(bootstrap_value)
+        return self._optimize(
+            self.buffer.obs, self.buffer.actions, self.buffer.log_probs, advantages, returns
+        )
 
-        obs = torch.from_numpy(np.asarray(self.buffer.obs, dtype=np.float32)).to(self.device)
-        actions = torch.tensor(self.buffer.actions, dtype=torch.long, device=self.device)
-        old_log_probs = torch.tensor(self.buffer.log_probs, dtype=torch.float32, device=self.device)
+    def _optimize(
+        self,
+        obs: np.ndarray,
+        actions: np.ndarray,
+        log_probs: np.ndarray,
+        advantages: np.ndarray,
+        returns: np.ndarray,
+    ) -> float | None:
+        """Clipped-surrogate PPO epochs over flat ``[n, ...]`` rollout arrays."""
+        obs = torch.from_numpy(obs).to(self.device)
+        actions = torch.from_numpy(actions).to(self.device)
+        old_log_probs = torch.from_numpy(log_probs).to(self.device)
         adv_t = torch.from_numpy(advantages).to(self.device)
         ret_t = torch.from_numpy(returns).to(self.device)
         # Normalize advantages for a stable surrogate gradient.
         adv_t = (adv_t - adv_t.mean()) / (adv_t.std() + 1e-8)
 
-        n = len(self.buffer)
+        n = len(actions)
         batch_size = min(self.ppo.minibatch_size, n)
         losses: list[float] = []
 
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import numpy as np
+import torch
+from torch.distributions import Categorical
+
+from worldmodel_agents.ppo_agent import ModelFreePPOAgent, compute_gae
+
+
+def _to_flat_obs_batch(obs) -> np.ndarray:
+    """Flatten a vector-env observation into ``[N, obs_dim]`` float32 rows."""
+    if isinstance(obs, Mapping):
+        if "symbolic" in obs:
+            arr = np.asarray(obs["symbolic"], dtype=np.float32)
+        elif "rgb" in obs:
+            arr = np.asarray(obs["rgb"], dtype=np.float32) / 255.0
+        else:
+            arr = np.asarray(next(iter(obs.values())), dtype=np.float32)
+    else:
+        arr = np.asarray(obs, dtype=np.float32)
+    return arr.reshape(arr.shape[0], -1)
+
+
+@dataclass
+class VectorRollout:
+    """One ``[rollout_len, num_envs]`` on-policy rollout in preallocated arrays."""
+
+    obs: np.ndarray
+    actions: np.ndarray
+    log_probs: np.ndarray
+    values: np.ndarray
+    rewards: np.ndarray
+    dones: np.ndarray
+
+    @classmethod
+    def allocate(cls, rollout_len: int, num_envs: int, obs_dim: int) -> VectorRollout:
+        shape = (rollout_len, num_envs)
+        return cls(
+            obs=np.zeros((*shape, obs_dim), dtype=np.float32),
+            actions=np.zeros(shape, dtype=np.int64),
+            log_probs=np.zeros(shape, dtype=np.float32),
+            values=np.zeros(shape, dtype=np.float32),
+            rewards=np.zeros(shape, dtype=np.float32),
+            dones=np.zeros(shape, dtype=np.float32),
+        )
+
+
+class VectorPPOTrainer:
+    """Trains a :class:`ModelFreePPOAgent`'s actor-critic on N lockstep envs.
+
+    ``vec_env`` is a vector env such as ``make_vec_env(env_id, num_envs)``:
+    ``reset(seed=...)`` returns ``[N, ...]`` observations, ``step(actions)``
+    takes an ``[N]`` action vector, and finished episodes auto-reset. Each
+    tick runs one batched actor-critic forward for all envs; every
+    ``rollout_len`` ticks the ``[rollout_len, N]`` rollout gets GAE over the
+    time axis for all envs at once (a done cuts bootstrapping, exactly as in
+    the agent's own updates) and one PPO update on the flattened batch.
+
+    The agent keeps the trained weights, so it can be evaluated afterwards
+    like any other agent. Seeding matches the agent: ``agent.reset(seed)``
+    seeds torch, and env ``i`` is reset with ``seed + i``.
+    """
+
+    def __init__(self, vec_env, agent: ModelFreePPOAgent | None = None, seed: int = 0):
+        self.vec_env = vec_env
+        self.num_envs = int(vec_env.num_envs)
+        self.agent = agent or ModelFreePPOAgent()
+        self.seed = int(seed)
+        self.env_steps = 0
+        self.episode_returns: list[float] = []
+        self._obs: np.ndarray | None = None
+        self._running_returns = np.zeros(self.num_envs, dtype=np.float64)
+        self._rollout: VectorRollout | None = None
+
+    def _start(self) -> None:
+        obs, _info = self.vec_env.reset(seed=self.seed)
+        self._obs = _to_flat_obs_batch(obs)
+        self.agent.reset(seed=self.seed)
+        self.agent._ensure_network(self._obs[0])
+        self._rollout = VectorRollout.allocate(
+            self.agent.ppo.rollout_len, self.num_envs, self._obs.shape[1]
+        )
+
+    @torch.no_grad()
+    def collect(self) -> np.ndarray:
+        """Fill the rollout arrays with ``rollout_len`` ticks; returns the ``[N]`` bootstrap values."""
+        if self._obs is None:
+            self._start()
+        net, rollout = self.agent.net, self._rollout
+        for t in range(self.agent.ppo.rollout_len):
+            logits, values = net(torch.from_numpy(self._obs))
+            dist = Categorical(logits=logits)
+            actions = dist.sample()
+            next_obs, rewards, terminated, truncated, _infos = self.vec_env.step(actions.numpy())
+            dones = terminated | truncated
+
+            rollout.obs[t] = self._obs
+            rollout.actions[t] = actions.numpy()
+            rollout.log_probs[t] = dist.log_prob(actions).numpy()
+            rollout.values[t] = values.numpy()
+            rollout.rewards[t] = rewards
+            rollout.dones[t] = dones
+
+            self._running_returns += rewards
+            self.episode_returns.extend(self._running_returns[dones].tolist())
+            self._running_returns[dones] = 0.0
+            self._obs = _to_flat_obs_batch(next_obs)
+        self.env_steps += self.agent.ppo.rollout_len * self.num_envs
+        _logits, bootstrap = net(torch.from_numpy(self._obs))
+        return bootstrap.numpy()
+
+    def train(self, total_env_steps: int) -> dict[str, float]:
+        """Collect and update until at least ``total_env_steps`` env steps; returns throughput stats."""
+        ppo = self.agent.ppo
+        steps_per_update = ppo.rollout_len * self.num_envs
+        updates = max(1, -(-int(total_env_steps) // steps_per_update))
+        start_steps, start_episodes = self.env_steps, len(self.episode_returns)
+        losses: list[float] = []
+        collect_seconds = 0.0
+        started = time.perf_counter()
+        for _ in range(updates):
+            tick = time.perf_counter()
+            bootstrap = self.collect()
+            collect_seconds += time.perf_counter() - tick
+
+            rollout = self._rollout
+            advantages, returns = compute_gae(
+                rollout.rewards,
+                rollout.values,
+                rollout.dones,
+                bootstrap,
+                gamma=ppo.gamma,
+                gae_lambda=ppo.gae_lambda,
+            )
+            loss = self.agent._optimize(
+                rollout.obs.reshape(steps_per_update, -1),
+                rollout.actions.reshape(-1),
+                rollout.log_probs.reshape(-1),
+                advantages.reshape(-1),
+                returns.reshape(-1),
+            )
+            if loss is not None:
+                losses.append(loss)
+        seconds = time.perf_counter() - started
+
+        env_steps = self.env_steps - start_steps
+        finished = self.episode_returns[start_episodes:]
+        return {
+            "updates": updates,
+            "env_steps": env_steps,
+            "episodes": len(finished),
+            "mean_episode_return": float(np.mean(finished)) if finished else 0.0,
+            "mean_loss": float(np.mean(losses)) if losses else 0.0,
+            "seconds": seconds,
+            "env_steps_per_sec": env_steps / max(seconds, 1e-9),
+            "collect_env_steps_per_sec": env_steps / max(collect_seconds, 1e-9),
+        }
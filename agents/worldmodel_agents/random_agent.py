@@ -6,6 +6,8 @@ from worldmodel_agents.base import AgentConfig, BaseAgent
 
 
 class RandomAgent(BaseAgent):
+    observation_keys = ()
+
     def __init__(self, config: AgentConfig | None = None):
         super().__init__(config=config)
         self.rng = np.random.default_rng(0)
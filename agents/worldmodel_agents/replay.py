@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+from worldmodel_models.common import to_numpy_obs
+
+
+class ReplayBuffer:
+    """Fixed-capacity FIFO store of ``(obs, action, reward, done)`` transitions.
+
+    Transitions live in preallocated NumPy arrays (flattened ``float32`` obs,
+    ``int64`` actions, ``float32`` rewards and dones) used as a ring: ``add``
+    overwrites the oldest slot once full, so inserts are O(1) and memory is
+    fixed at ``capacity`` rows. The obs width is taken from the first
+    transition added. ``sample`` returns a dict of stacked arrays that world
+    model ``update`` methods accept directly in place of a list of
+    transition dicts.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            msg = f"capacity must be positive, got {capacity}"
+            raise ValueError(msg)
+        self.capacity = int(capacity)
+        self.obs: np.ndarray | None = None
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        """Drop every stored transition (the obs width is re-derived on the next ``add``)."""
+        self.obs = None
+        self._next = 0
+        self._size = 0
+
+    def add(self, transition: dict) -> None:
+        """Store one transition dict with ``obs``, ``action``, ``reward`` and ``done``."""
+        obs = to_numpy_obs(transition["obs"])
+        if self.obs is None:
+            self.obs = np.zeros((self.capacity, obs.size), dtype=np.float32)
+        elif obs.size != self.obs.shape[1]:
+            msg = f"observation size {obs.size} does not match buffer width {self.obs.shape[1]}"
+            raise ValueError(msg)
+        slot = self._next
+        self.obs[slot] = obs
+        self.actions[slot] = int(transition["action"])
+        self.rewards[slot] = float(transition["reward"])
+        self.dones[slot] = float(transition["done"])
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def sample(self, batch_size: int, rng: np.random.Generator) -> dict[str, np.ndarray]:
+        """``batch_size`` distinct transitions drawn uniformly, as stacked arrays.
+
+        Indices are drawn over the stored transitions oldest-first, so the
+        draw matches ``rng.choice`` over an equivalent chronological list.
+        """
+        if batch_size > self._size:
+            msg = f"cannot sample {batch_size} transitions from a buffer of {self._size}"
+            raise ValueError(msg)
+        idx = rng.choice(self._size, size=batch_size, replace=False)
+        # Oldest transition sits at ``_next`` once the ring has wrapped, else at 0.
+        start = self._next if self._size == self.capacity else 0
+        rows = (start + idx) % self.capacity
+        return {
+            "obs": self.obs[rows],
+            "action": self.actions[rows],
+            "reward": self.rewards[rows],
+            "done": self.dones[rows],
+        }
@@ -7,6 +7,7 @@ from worldmodel_models.registry import create_world_model
 from worldmodel_planners.mcts import MCTSPlanner
 
 from worldmodel_agents.base import AgentConfig, BaseAgent
+from worldmodel_agents.replay import ReplayBuffer
 
 
 def _clone_state(value):
@@ -39,6 +40,8 @@ class SearchMCTSAgent(BaseAgent):
     action sequences across runs.
     """
 
+    observation_keys = ("symbolic",)
+
     def __init__(self, config: AgentConfig | None = None, seed: int = 0):
         super().__init__(config=config)
         self.seed = seed
@@ -51,10 +54,17 @@ class SearchMCTSAgent(BaseAgent):
             num_simulations=56,
             max_depth=14,
             seed=seed,
+            # The subtree below the executed action seeds the next step's search.
+            reuse_tree=True,
+            # Leaves are simulated 8 at a time through one batched model call.
+            batch_transition_fn=self._batch_transition,
+            leaf_batch_size=8,
         )
         self.latent = self.world_model.init_state(batch_size=1)
-        self.buffer: list[dict] = []
+        self.buffer = ReplayBuffer(capacity=1024)
         self.rng = np.random.default_rng(seed)
+        # False while running a pretrained checkpoint: act on frozen weights.
+        self.online_updates = True
 
     def _build_world_model(self):
         """Construct the latent world model, sized to the env when known.
@@ -88,7 +98,9 @@ class SearchMCTSAgent(BaseAgent):
             self.rng = np.random.default_rng(self.seed)
             self.world_model = self._build_world_model()
             self.planner.reseed(self.seed)
-            self.buffer = []
+            self.buffer.clear()
+            self.online_updates = True
+        self.planner.reset_tree()
         self.latent = self.world_model.init_state(batch_size=1)
         self.last_imagined_transitions = 0
         self.last_planner_trace = {}
@@ -114,12 +126,29 @@ class SearchMCTSAgent(BaseAgent):
         self.last_planner_trace = result.trace
         return int(result.action)
 
-    def observe(self, transition: dict) -> None:
-        self.buffer.append(transition)
-        if len(self.buffer) > 1024:
-            self.buffer = self.buffer[-1024:]
+    def _batch_transition(self, states, actions):
+        latent = torch.cat([state["latent"] for state in states], dim=0)
+        next_state, _pred_obs, rewards, dones, _aux = self.world_model.predict_batch(
+            {"latent": latent}, actions
+        )
+        next_states = [{"latent": row} for row in next_state["latent"].split(1)]
+        return next_states, rewards.cpu().numpy(), dones.cpu().numpy()
 
+    def observe(self, transition: dict) -> None:
+        if not self.online_updates:
+            return
+        self.buffer.add(transition)
         if len(self.buffer) >= 32 and hasattr(self.world_model, "update"):
-            idx = self.rng.choice(len(self.buffer), size=24, replace=False)
-            batch = [self.buffer[int(i)] for i in idx]
-            self.world_model.update(batch)
+            self.world_model.update(self.buffer.sample(24, self.rng))
+
+    def checkpoint_state(self) -> dict:
+        """Trained world model plus the obs size it was built for (see ``load_checkpoint_state``)."""
+        return {"obs_dim": self._obs_dim, "world_model": self.world_model.save_state()}
+
+    def load_checkpoint_state(self, state: dict) -> None:
+        """Adopt a pretrained world model and stop learning online until the next seeded reset."""
+        self._obs_dim = state["obs_dim"]
+        self.world_model = self._build_world_model()
+        self.world_model.load_state(state["world_model"])
+        self.latent = self.world_model.init_state(batch_size=1)
+        self.online_updates = False
@@ -0,0 +1 @@
+"""Reproducible performance benchmarks; run with ``python -m benchmarks``."""
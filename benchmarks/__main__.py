@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from benchmarks.runner import (
+    Settings,
+    compare_results,
+    default_output_path,
+    format_seconds,
+    load_results,
+    run_suite,
+    select_cases,
+    write_results,
+)
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="WorldModel Gym performance benchmarks"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run benchmarks and write a results JSON")
+    run.add_argument(
+        "-k",
+        dest="patterns",
+        action="append",
+        default=[],
+        help="only run benchmarks whose id contains this substring (repeatable)",
+    )
+    run.add_argument("--repeat", default=5, type=int, help="timed samples per benchmark")
+    run.add_argument("--min-time", default=0.2, type=float, help="minimum seconds per timed sample")
+    run.add_argument(
+        "--threads", default=1, type=int, help="torch intra-op threads (1 keeps runs comparable)"
+    )
+    run.add_argument(
+        "--out", default=None, type=str, help="results path (default: results/<commit>.json)"
+    )
+
+    commands.add_parser("list", help="list benchmark ids")
+
+    compare = commands.add_parser("compare", help="compare two results JSON files")
+    compare.add_argument("base")
+    compare.add_argument("head")
+    compare.add_argument(
+        "--threshold",
+        default=0.1,
+        type=float,
+        help="relative change in median time reported as slower/faster",
+    )
+    compare.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="exit with status 1 when any benchmark got slower",
+    )
+    return parser.parse_args(argv)
+
+
+def _run(args: argparse.Namespace) -> int:
+    from benchmarks.cases import build_cases
+
+    cases = select_cases(build_cases(), args.patterns)
+    if not cases:
+        print("no benchmarks match", file=sys.stderr)
+        return 1
+    settings = Settings(repeat=args.repeat, min_time=args.min_time, threads=args.threads)
+
+    def progress(result) -> None:
+        summary = result.as_dict()
+        print(
+            f"{result.id:<60} {format_seconds(summary['median']):>10}"
+            f"  +/- {format_seconds(summary['stdev']):>9}  (x{result.number})",
+            flush=True,
+        )
+
+    document = run_suite(cases, settings, progress=progress)
+    path = write_results(document, args.out or default_output_path(document["metadata"]))
+    print(f"results={path}")
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    base, head = load_results(args.base), load_results(args.head)
+    rows = compare_results(base, head)
+    print(f"{'benchmark':<60} {'base':>10} {'head':>10} {'ratio':>7}  status")
+    regressions = 0
+    for row in rows:
+        status = row.status(args.threshold)
+        regressions += status == "slower"
+        ratio = "-" if row.ratio is None else f"{row.ratio:.2f}"
+        print(
+            f"{row.id:<60} {format_seconds(row.base):>10} {format_seconds(row.head):>10}"
+            f" {ratio:>7}  {status}"
+        )
+    print(f"{regressions} slower than {1 + args.threshold:.2f}x the base median")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if args.command == "list":
+        from benchmarks.cases import build_cases
+
+        for case in build_cases():
+            print(case.id)
+        return 0
+    if args.command == "compare":
+        return _compare(args)
+    return _run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+"""Benchmark cases for the env, planner, world-model and evaluation hot paths.
+
+Every fixture is seeded, so a case does the same work on every run and its
+timings are comparable across commits. Planner cases run against env
+simulators with the transition cache disabled, so every call pays for the
+transitions it simulates; the ``world_model`` variants plan in the latent
+space of the world model their agent uses. MCTS is timed in the search modes
+the agents plan with (``transpositions`` over env snapshots, ``leaf_batched``
+in a world model), next to the one-transition-per-step ``scalar`` search as a
+baseline.
+"""
+
+from __future__ import annotations
+
+import itertools
+import tempfile
+from contextlib import ExitStack
+from dataclasses import replace
+
+import numpy as np
+import torch
+from worldmodel_agents.registry import AGENT_LABELS, create_agent
+from worldmodel_gym.envs.registry import make_env
+from worldmodel_gym.eval.harness import evaluate_and_write
+from worldmodel_models import ModelConfig, create_world_model
+from worldmodel_models.common import to_numpy_obs
+from worldmodel_planners.mcts import MCTSPlanner
+from worldmodel_planners.mpc_cem import MPCCEMPlanner
+from worldmodel_planners.trajectory_sampling import TrajectorySamplingPlanner
+
+from benchmarks.runner import SEED, Case
+
+ENV_IDS = ("memory_maze", "switch_quest", "craft_lite")
+OBS_MODES = ("rgb", "symbolic", "both", "lazy")
+WORLD_MODELS = ("deterministic", "stochastic", "ensemble", "ensemble_stacked")
+WALK_STEPS = 256
+UPDATE_BATCH = 32
+
+
+def _identity(state):
+    return state
+
+
+def _random_walk(env, steps: int = WALK_STEPS) -> tuple[list, list[int], list]:
+    """``(snapshots, actions, observations)`` along a seeded random walk, resetting on done."""
+    rng = np.random.default_rng(SEED)
+    obs, _info = env.reset(seed=SEED)
+    states, actions, observations = [], [], []
+    for _ in range(steps):
+        action = int(rng.integers(env.action_space.n))
+        states.append(env.clone_env_state())
+        actions.append(action)
+        observations.append(obs)
+        obs, _reward, terminated, truncated, _info = env.step(action)
+        if terminated or truncated:
+            obs, _info = env.reset(seed=SEED)
+    return states, actions, observations
+
+
+def _mid_walk_state(env):
+    """A snapshot a few steps into the episode, used as the planners' root state."""
+    states, _actions, _observations = _random_walk(env, steps=8)
+    return states[-1]
+
+
+def _env_rollout_fn(env):
+    def rollout_fn(state, action_seq):
+        total = 0.0
+        for action in action_seq:
+            state, reward, done = env.simulate_from_state(state, int(action))
+            total += reward
+            if done:
+                break
+        return total, {}
+
+    return rollout_fn
+
+
+def _env_step_case(env_id: str, obs_mode: str) -> Case:
+    def setup(_stack: ExitStack):
+        env = make_env(env_id, obs_mode=obs_mode)
+        env.reset(seed=SEED)
+        actions = np.random.default_rng(SEED).integers(env.action_space.n, size=1024).tolist()
+        counter = itertools.count()
+
+        def step():
+            action = actions[next(counter) % len(actions)]
+            _obs, _reward, terminated, truncated, _info = env.step(action)
+            if terminated or truncated:
+                env.reset(seed=SEED)
+
+        return step
+
+    return Case(
+        "env.step",
+        {"env": env_id, "obs_mode": obs_mode},
+        setup,
+        description="one env.step with a seeded random action (episode resets included)",
+    )
+
+
+def _clone_case(env_id: str) -> Case:
+    def setup(_stack: ExitStack):
+        env = make_env(env_id, obs_mode="symbolic")
+        _mid_walk_state(env)
+        return env.clone_env_state
+
+    return Case("env.clone_env_state", {"env": env_id}, setup)
+
+
+def _simulate_case(env_id: str, cached: bool) -> Case:
+    def setup(_stack: ExitStack):
+        kwargs = {} if cached else {"transition_cache_size": 0}
+        env = make_env(env_id, obs_mode="symbolic", **kwargs)
+        states, actions, _observations = _random_walk(env)
+        pairs = list(zip(states, actions, strict=True))
+        counter = itertools.count()
+
+        def simulate():
+            state, action = pairs[next(counter) % len(pairs)]
+            return env.simulate_from_state(state, action)
+
+        return simulate
+
+    return Case(
+        "env.simulate_from_state",
+        {"env": env_id, "cache": "cached" if cached else "uncached"},
+        setup,
+        description="one simulated transition from a snapshot along a random walk",
+    )
+
+
+def _planner_env(env_id: str):
+    env = make_env(env_id, obs_mode="symbolic", transition_cache_size=0)
+    return env, _mid_walk_state(env)
+
+
+def _oracle_state_key(env, horizon: int):
+    """The planner_oracle's search key: ``step_count`` is kept only within ``horizon`` of truncation."""
+    exact_from = env.config.max_steps - horizon
+
+    def state_key(state):
+        if state.step_count >= exact_from:
+            return state
+        return replace(state, step_count=0)
+
+    return state_key
+
+
+def _mcts_case(env_id: str, search: str) -> Case:
+    def setup(_stack: ExitStack):
+        env, root = _planner_env(env_id)
+        kwargs = {}
+        if search == "transpositions":
+            kwargs = {"state_key_fn": _oracle_state_key(env, 20), "transpositions": True}
+        planner = MCTSPlanner(
+            env.action_space.n, num_simulations=64, max_depth=20, seed=SEED, **kwargs
+        )
+        return lambda: planner.plan(
+            root, transition_fn=env.simulate_from_state, clone_state_fn=_identity, seed=SEED
+        )
+
+    description = (
+        "snapshots merged by state, as the planner_oracle searches"
+        if search == "transpositions"
+        else "baseline: plain tree search, one simulated transition per step"
+    )
+    return Case(
+        "planner.mcts", {"backend": env_id, "search": search}, setup, description=description
+    )
+
+
+def _sampling_planner_case(name: str, planner_cls, env_id: str, **planner_kwargs) -> Case:
+    def setup(_stack: ExitStack):
+        env, root = _planner_env(env_id)
+        planner = planner_cls(env.action_space.n, seed=SEED, **planner_kwargs)
+        rollout_fn = _env_rollout_fn(env)
+        return lambda: planner.plan(
+            root, rollout_fn=rollout_fn, clone_state_fn=_identity, seed=SEED
+        )
+
+    return Case(name, {"backend": env_id}, setup)
+
+
+def _memory_maze_data() -> tuple[ModelConfig, list]:
+    env = make_env("memory_maze", obs_mode="symbolic")
+    _states, actions, observations = _random_walk(env)
+    config = ModelConfig(obs_dim=int(to_numpy_obs(observations[0]).size), action_dim=8)
+    return config, list(zip(observations, actions, strict=True))
+
+
+def _latent_mcts_case(search: str) -> Case:
+    """MCTS over a learned deterministic model; ``leaf_batched`` is how search_mcts plans."""
+
+    def setup(_stack: ExitStack):
+        config, data = _memory_maze_data()
+        model = create_world_model("deterministic", config=config, seed=SEED)
+        root = model.observe(model.init_state(batch_size=1), data[0][0])
+
+        def transition_fn(state, action):
+            next_state, _obs, reward, done, _aux = model.predict(state, int(action))
+            return next_state, float(reward), bool(done)
+
+        def batch_transition_fn(states, actions):
+            latent = torch.cat([state["latent"] for state in states], dim=0)
+            next_state, _obs, rewards, dones, _aux = model.predict_batch(
+                {"latent": latent}, actions
+            )
+            next_states = [{"latent": row} for row in next_state["latent"].split(1)]
+            return next_states, rewards.cpu().numpy(), dones.cpu().numpy()
+
+        kwargs = {}
+        if search == "leaf_batched":
+            kwargs = {"batch_transition_fn": batch_transition_fn, "leaf_batch_size": 8}
+        planner = MCTSPlanner(
+            config.action_dim, num_simulations=56, max_depth=14, seed=SEED, **kwargs
+        )
+
+        def plan():
+            with torch.no_grad():
+                return planner.plan(
+                    root, transition_fn=transition_fn, clone_state_fn=_identity, seed=SEED
+                )
+
+        return plan
+
+    description = (
+        "8 leaves per batched predict_batch call, as the search_mcts agent plans"
+        if search == "leaf_batched"
+        else "baseline: one model.predict call per simulated step"
+    )
+    return Case(
+        "planner.mcts", {"backend": "world_model", "search": search}, setup, description=description
+    )
+
+
+def _latent_sampling_planner_case(name: str, planner_cls, **planner_kwargs) -> Case:
+    """Batched imagined rollouts in the stacked ensemble, as imagination_mpc scores them."""
+
+    def setup(_stack: ExitStack):
+        config, data = _memory_maze_data()
+        model = create_world_model("ensemble_stacked", config=config, seed=SEED)
+        root = model.observe(model.init_state(batch_size=1), data[0][0])
+        planner = planner_cls(config.action_dim, seed=SEED, **planner_kwargs)
+
+        def batch_rollout_fn(state, action_seqs):
+            rollout = model.imagine_rollout_batch(state, action_seqs)
+            scores = rollout["pred_rewards"].sum(dim=1) - 0.05 * rollout["uncertainty"]
+            return scores.cpu().numpy()
+
+        def plan():
+            with torch.no_grad():
+                return planner.plan(root, batch_rollout_fn=batch_rollout_fn, seed=SEED)
+
+        return plan
+
+    return Case(name, {"backend": "world_model"}, setup)
+
+
+def _world_model_cases(model_name: str) -> list[Case]:
+    def build():
+        config, data = _memory_maze_data()
+        model = create_world_model(model_name, config=config, seed=SEED)
+        return model, data
+
+    def observe_setup(_stack: ExitStack):
+        model, data = build()
+        state = model.init_state(batch_size=1)
+        counter = itertools.count()
+
+        def observe():
+            with torch.no_grad():
+                return model.observe(state, data[next(counter) % len(data)][0])
+
+        return observe
+
+    def predict_setup(_stack: ExitStack):
+        model, data = build()
+        state = model.observe(model.init_state(batch_size=1), data[0][0])
+        counter = itertools.count()
+
+        def predict():
+            with torch.no_grad():
+                return model.predict(state, data[next(counter) % len(data)][1])
+
+        return predict
+
+    def update_setup(_stack: ExitStack):
+        model, data = build()
+        rng = np.random.default_rng(SEED)
+        batches = []
+        for _ in range(8):
+            rows = rng.choice(len(data) - 1, size=UPDATE_BATCH, replace=False)
+            batches.append(
+                {
+                    "obs": np.stack([to_numpy_obs(data[i][0]) for i in rows]),
+                    "action": np.array([data[i][1] for i in rows], dtype=np.int64),
+                    "reward": np.zeros(UPDATE_BATCH, dtype=np.float32),
+                    "done": np.zeros(UPDATE_BATCH, dtype=np.float32),
+                }
+            )
+        counter = itertools.count()
+        return lambda: model.update(batches[next(counter) % len(batches)])
+
+    params = {"model": model_name}
+    return [
+        Case("world_model.observe", params, observe_setup),
+        Case("world_model.predict", params, predict_setup),
+        Case(
+            "world_model.update",
+            params,
+            update_setup,
+            description=f"one gradient step on {UPDATE_BATCH} transitions",
+        ),
+    ]
+
+
+def _evaluate_case(agent_name: str) -> Case:
+    def setup(stack: ExitStack):
+        out_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="wmg-bench-"))
+        return lambda: evaluate_and_write(
+            agent_name=agent_name,
+            agent_factory=create_agent,
+            env_id="memory_maze",
+            track="test",
+            seeds=[211],
+            max_episodes=1,
+            budget={"max_steps": 20},
+            out_dir=out_dir,
+        )
+
+    return Case(
+        "eval.evaluate_and_write",
+        {"agent": agent_name},
+        setup,
+        max_repeat=3,
+        description="memory_maze, every train seed plus one test episode, 20 steps each",
+    )
+
+
+def build_cases() -> list[Case]:
+    """Every benchmark, in run order."""
+    cases = [_env_step_case(env_id, mode) for env_id in ENV_IDS for mode in OBS_MODES]
+    cases += [_clone_case(env_id) for env_id in ENV_IDS]
+    cases += [_simulate_case(env_id, cached) for env_id in ENV_IDS for cached in (False, True)]
+    for env_id in ENV_IDS:
+        cases += [_mcts_case(env_id, search) for search in ("scalar", "transpositions")]
+        cases.append(
+            _sampling_planner_case(
+                "planner.mpc_cem", MPCCEMPlanner, env_id, horizon=10, population=64, iterations=3
+            )
+        )
+        cases.append(
+            _sampling_planner_case(
+                "planner.trajectory_sampling",
+                TrajectorySamplingPlanner,
+                env_id,
+                horizon=10,
+                num_trajectories=64,
+            )
+        )
+    cases += [_latent_mcts_case(search) for search in ("scalar", "leaf_batched")]
+    cases.append(
+        _latent_sampling_planner_case(
+            "planner.mpc_cem", MPCCEMPlanner, horizon=10, population=64, iterations=3
+        )
+    )
+    cases.append(
+        _latent_sampling_planner_case(
+            "planner.trajectory_sampling",
+            TrajectorySamplingPlanner,
+            horizon=10,
+            num_trajectories=64,
+        )
+    )
+    for model_name in WORLD_MODELS:
+        cases += _world_model_cases(model_name)
+    cases += [_evaluate_case(agent_name) for agent_name in AGENT_LABELS]
+    return cases
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import gc
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections.abc import Callable, Iterable
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import torch
+from worldmodel_gym.eval.checkpoints import atomic_write_bytes, code_version
+
+SCHEMA_VERSION = 1
+SEED = 0
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+@dataclass(frozen=True)
+class Case:
+    """One microbenchmark: ``setup`` builds its fixtures and returns the timed call.
+
+    ``setup`` receives an :class:`~contextlib.ExitStack` for anything that
+    must be released afterwards (temporary directories, ...). The returned
+    zero-argument callable is one operation; it is called repeatedly, so it
+    must leave its fixtures ready for the next call. ``max_repeat`` caps the
+    number of samples for slow end-to-end cases.
+    """
+
+    name: str
+    params: dict[str, str]
+    setup: Callable[[ExitStack], Callable[[], object]]
+    max_repeat: int | None = None
+    description: str = ""
+
+    @property
+    def id(self) -> str:
+        if not self.params:
+            return self.name
+        return f"{self.name}[{'-'.join(self.params.values())}]"
+
+
+@dataclass
+class Settings:
+    repeat: int = 5
+    min_time: float = 0.2
+    threads: int = 1
+    max_number: int = 100_000
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "repeat": self.repeat,
+            "min_time": self.min_time,
+            "threads": self.threads,
+            "max_number": self.max_number,
+        }
+
+
+@dataclass
+class Result:
+    id: str
+    name: str
+    params: dict[str, str]
+    number: int
+    samples: list[float] = field(default_factory=list)
+    description: str = ""
+
+    def as_dict(self) -> dict[str, Any]:
+        median = statistics.median(self.samples)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "params": self.params,
+            "description": self.description,
+            "unit": "seconds",
+            "number": self.number,
+            "repeat": len(self.samples),
+            "min": min(self.samples),
+            "median": median,
+            "mean": statistics.fmean(self.samples),
+            "stdev": statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0,
+            "ops_per_sec": 1.0 / median if median > 0 else math.inf,
+            "samples": self.samples,
+        }
+
+
+def seed_everything(seed: int = SEED) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def _time(fn: Callable[[], object], number: int) -> float:
+    """Wall time of ``number`` back-to-back calls, with the GC paused like ``timeit``."""
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _calibrate(fn: Callable[[], object], min_time: float, max_number: int) -> tuple[int, float]:
+    """Smallest call count in the 1-2-5 series whose sample lasts ``min_time``, and that sample."""
+    number = 1
+    while True:
+        elapsed = _time(fn, number)
+        if elapsed >= min_time or number >= max_number:
+            return number, elapsed
+        magnitude = 10 ** int(math.log10(number))
+        number = next(step * magnitude for step in (2, 5, 10) if step * magnitude > number)
+        number = min(number, max_number)
+
+
+def measure(case: Case, settings: Settings) -> Result:
+    """Time ``case``: one warm-up call, calibrate the call count, then ``repeat`` samples.
+
+    Every sample times the same calibrated number of calls (the calibrating
+    run is kept as the first sample); the reported figures are per call.
+    Seeds are reset before setup so fixtures (env layouts, action sequences,
+    model weights) are identical across runs.
+    """
+    repeat = settings.repeat
+    if case.max_repeat is not None:
+        repeat = min(repeat, case.max_repeat)
+    repeat = max(1, repeat)
+    seed_everything()
+    with ExitStack() as stack:
+        fn = case.setup(stack)
+        fn()
+        number, elapsed = _calibrate(fn, settings.min_time, settings.max_number)
+        samples = [elapsed / number]
+        samples += [_time(fn, number) / number for _ in range(repeat - 1)]
+    return Result(
+        id=case.id,
+        name=case.name,
+        params=dict(case.params),
+        number=number,
+        samples=samples,
+        description=case.description,
+    )
+
+
+def _git(*args: str) -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=30, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip()
+
+
+def environment_metadata(settings: Settings) -> dict[str, Any]:
+    """What a result depends on besides the code: commit, interpreter, libraries, machine."""
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "code_version": code_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "settings": settings.as_dict(),
+    }
+
+
+def select_cases(cases: Iterable[Case], patterns: list[str] | None) -> list[Case]:
+    """Cases whose id contains any of ``patterns`` (all cases when there are none)."""
+    cases = list(cases)
+    if not patterns:
+        return cases
+    return [case for case in cases if any(pattern in case.id for pattern in patterns)]
+
+
+def run_suite(
+    cases: Iterable[Case],
+    settings: Settings,
+    progress: Callable[[Result], None] | None = None,
+) -> dict[str, Any]:
+    """Measure ``cases`` in order and return the JSON-ready results document."""
+    previous_threads = torch.get_num_threads()
+    torch.set_num_threads(settings.threads)
+    try:
+        document: dict[str, Any] = {
+            "schema_version": SCHEMA_VERSION,
+            "metadata": environment_metadata(settings),
+            "results": [],
+        }
+        for case in cases:
+            result = measure(case, settings)
+            document["results"].append(result.as_dict())
+            if progress is not None:
+                progress(result)
+    finally:
+        torch.set_num_threads(previous_threads)
+    return document
+
+
+def default_output_path(metadata: dict[str, Any]) -> Path:
+    """``benchmarks/results/<commit>.json`` (``-dirty`` for uncommitted trees)."""
+    name = (metadata.get("commit") or metadata["code_version"])[:12]
+    if metadata.get("dirty"):
+        name += "-dirty"
+    return RESULTS_DIR / f"{name}.json"
+
+
+def write_results(document: dict[str, Any], path: str | Path) -> Path:
+    payload = json.dumps(document, indent=2, sort_keys=True) + "\n"
+    return atomic_write_bytes(Path(path), payload.encode("utf-8"))
+
+
+def load_results(path: str | Path) -> dict[str, Any]:
+    document = json.loads(Path(path).read_text(encoding="utf-8"))
+    if document.get("schema_version") != SCHEMA_VERSION:
+        msg = f"{path}: unsupported benchmark schema_version {document.get('schema_version')!r}"
+        raise ValueError(msg)
+    return document
+
+
+@dataclass(frozen=True)
+class Comparison:
+    id: str
+    base: float | None
+    head: float | None
+
+    @property
+    def ratio(self) -> float | None:
+        if self.base is None or self.head is None or self.base <= 0:
+            return None
+        return self.head / self.base
+
+    def status(self, threshold: float) -> str:
+        ratio = self.ratio
+        if ratio is None:
+            return "added" if self.base is None else "removed"
+        if ratio > 1.0 + threshold:
+            return "slower"
+        if ratio < 1.0 / (1.0 + threshold):
+            return "faster"
+        return "same"
+
+
+def compare_results(base: dict[str, Any], head: dict[str, Any]) -> list[Comparison]:
+    """Pair the per-call medians of two results documents by benchmark id."""
+    base_medians = {entry["id"]: entry["median"] for entry in base["results"]}
+    head_medians = {entry["id"]: entry["median"] for entry in head["results"]}
+    ids = list(base_medians) + [key for key in head_medians if key not in base_medians]
+    return [Comparison(key, base_medians.get(key), head_medians.get(key)) for key in ids]
+
+
+def format_seconds(value: float | None) -> str:
+    if value is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.3g} {unit}"
+    return f"{value / 1e-9:.3g} ns"
@@ -2,11 +2,14 @@ from worldmodel_gym.envs.craft_lite import CraftLiteEnv
 from worldmodel_gym.envs.memory_maze import MemoryMazeEnv
 from worldmodel_gym.envs.registry import list_tasks, make_env
 from worldmodel_gym.envs.switch_quest import SwitchQuestEnv
+from worldmodel_gym.envs.vector import VectorGridEnv, make_vec_env
 
 __all__ = [
     "MemoryMazeEnv",
     "SwitchQuestEnv",
     "CraftLiteEnv",
+    "VectorGridEnv",
     "make_env",
+    "make_vec_env",
     "list_tasks",
 ]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-import copy
+from collections import OrderedDict
+from collections.abc import Mapping
 from dataclasses import dataclass
 from typing import Any
 
@@ -8,7 +9,8 @@ import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
 
-from worldmodel_gym.trace.schema import EpisodeTrace, TraceStep
+from worldmodel_gym.trace.recorder import TraceRecorder
+from worldmodel_gym.trace.schema import TraceStep
 
 
 @dataclass
@@ -16,8 +18,14 @@ class BaseEnvConfig:
     grid_size: int = 12
     fov_radius: int = 2
     max_steps: int = 500
-    obs_mode: str = "both"  # rgb | symbolic | both
+    obs_mode: str = "both"  # rgb | symbolic | both | lazy
     step_penalty: float = 0.0
+    # Record a per-step trace (exported as ``info["episode_trace"]`` at episode
+    # end). Disable for throughput runs that never look at traces.
+    record_trace: bool = True
+    # Entries of the LRU cache behind ``transition``/``simulate_from_state``
+    # (0 disables it).
+    transition_cache_size: int = 4096
 
 
 COLORS: dict[int, tuple[int, int, int]] = {
@@ -35,6 +43,76 @@ COLORS: dict[int, tuple[int, int, int]] = {
     11: (255, 180, 112),  # crafting station
 }
 
+# Tile id -> RGB lookup table, indexed directly by a tile grid.
+PALETTE = np.zeros((len(COLORS), 3), dtype=np.uint8)
+for _tid, _color in COLORS.items():
+    PALETTE[_tid] = _color
+
+
+# Row/col delta for each movement action id (shared by every grid env).
+MOVES: dict[int, tuple[int, int]] = {
+    1: (-1, 0),
+    2: (1, 0),
+    3: (0, -1),
+    4: (0, 1),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class GridState:
+    """Compact, immutable snapshot of a grid env's dynamic state.
+
+    Subclasses add their per-env flags, inventories and (static) object
+    positions as small tuples. The wall grid is shared by reference rather than
+    copied and is excluded from equality/hashing, so a snapshot costs O(1) in
+    the grid area and is usable as a dict key by planners.
+    """
+
+    agent_pos: tuple[int, int]
+    step_count: int
+
+
+def as_pos(arr) -> tuple[int, int]:
+    return (int(arr[0]), int(arr[1]))
+
+
+class LazyObservation(Mapping):
+    """``{"rgb", "symbolic"}`` observation that renders each entry on first access.
+
+    Returned by envs with ``obs_mode="lazy"``. It behaves like the ``"both"``
+    dict for reading, but an entry that is never looked up is never rendered.
+    While the env has not moved on, entries come straight from its persistent
+    render buffers; afterwards they are rendered from the state snapshot taken
+    when the observation was produced, so stored observations stay correct.
+    """
+
+    __slots__ = ("_env", "_state", "_version", "_cache")
+    _KEYS = ("rgb", "symbolic")
+
+    def __init__(self, env: BaseGridEnv, state: GridState, version: int):
+        self._env = env
+        self._state = state
+        self._version = version
+        self._cache: dict[str, np.ndarray] = {}
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        value = self._cache.get(key)
+        if value is None:
+            if key not in self._KEYS:
+                raise KeyError(key)
+            value = self._env._render_snapshot(key, self._state, self._version)
+            self._cache[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return f"LazyObservation(rendered={sorted(self._cache)})"
+
 
 class BaseGridEnv(gym.Env):
     metadata = {"render_modes": ["rgb_array"], "render_fps": 15}
@@ -55,7 +133,7 @@ class BaseGridEnv(gym.Env):
             self.observation_space = rgb_space
         elif self.config.obs_mode == "symbolic":
             self.observation_space = symbolic_space
-        elif self.config.obs_mode == "both":
+        elif self.config.obs_mode in ("both", "lazy"):
             self.observation_space = spaces.Dict({"rgb": rgb_space, "symbolic": symbolic_space})
         else:
             msg = f"Unsupported obs_mode={self.config.obs_mode}"
@@ -63,19 +141,45 @@ class BaseGridEnv(gym.Env):
 
         self.agent_pos = np.array([1, 1], dtype=np.int64)
         self.step_count = 0
-        self.trace_steps: list[TraceStep] = []
+        self.trace: TraceRecorder | None = None
         self.episode_id = 0
         self._seed_value = 0
 
+        # Persistent render buffers, patched at the cells a step changes instead
+        # of being rebuilt from ``_tile_grid()`` (see ``_changed_cells``).
+        self._tiles = np.zeros((self.grid_size, self.grid_size), dtype=np.int64)
+        self._onehot = np.zeros((len(COLORS), self.grid_size, self.grid_size), dtype=np.float32)
+        self._canvas = np.zeros((64, 64, 3), dtype=np.uint8)
+        self._buffers_valid = False
+        # Bumped whenever the live state changes; lets a LazyObservation tell
+        # whether the render buffers still show the state it was taken from.
+        self._obs_version = 0
+
+        # (snapshot, action) -> (next_state, reward, done) for ``transition``.
+        self._transition_cache: OrderedDict = OrderedDict()
+        self._transition_cache_layout = None
+        self.transition_cache_hits = 0
+        self.transition_cache_misses = 0
+
     def reset(self, *, seed: int | None = None, options: dict[str, Any] | None = None):
         del options
         if seed is not None:
             self._rng = np.random.default_rng(seed)
             self._seed_value = int(seed)
         self.step_count = 0
-        self.trace_steps = []
         self.episode_id += 1
         self._reset_state(seed=seed)
+        self.trace = None
+        if self.config.record_trace:
+            self.trace = TraceRecorder(
+                env_id=self.__class__.__name__,
+                episode_id=self.episode_id,
+                seed=self.current_seed,
+                state_fn=self._trace_state,
+                capacity=self.config.max_steps,
+            )
+        self._buffers_valid = False
+        self._obs_version += 1
         obs = self._format_obs()
         info = {
             "events": [],
@@ -85,81 +189,126 @@ class BaseGridEnv(gym.Env):
         return obs, info
 
     def step(self, action: int):
-        self.step_count += 1
-        reward, terminated, events = self._step_state(action)
+        state = self.snapshot()
+        next_state, reward, terminated, events = self._transition(state, int(action))
+        buffers_valid = self._buffers_valid
+        self.restore(next_state)
+        if buffers_valid:
+            self._paint_cells(self._changed_cells(state, next_state))
+            self._buffers_valid = True
         truncated = self.step_count >= self.config.max_steps and not terminated
         reward += self.config.step_penalty
 
-        obs = self._format_obs()
+        obs = self._format_obs(next_state)
         info: dict[str, Any] = {
             "events": events,
             "step": self.step_count,
             "oracle_hint": self.oracle_hint(),
         }
 
-        trace_step = TraceStep(
-            t=self.step_count,
-            action=int(action),
-            reward=float(reward),
-            terminated=bool(terminated),
-            truncated=bool(truncated),
-            events=list(events),
-            planner={},
-            env_state=self._trace_state(),
-        )
-        self.trace_steps.append(trace_step)
-
-        if terminated or truncated:
-            info["episode_trace"] = EpisodeTrace(
-                env_id=self.__class__.__name__,
-                episode_id=self.episode_id,
-                seed=self.current_seed,
-                steps=self.trace_steps,
-            ).model_dump(mode="json")
+        if self.trace is not None:
+            self.trace.append(
+                self.step_count, int(action), reward, terminated, truncated, events, next_state
+            )
+            if terminated or truncated:
+                info["episode_trace"] = self.trace.to_dict()
 
         return obs, float(reward), bool(terminated), bool(truncated), info
 
     def render(self):
-        tile_grid = self._tile_grid()
-        return self._rgb_from_tiles(tile_grid)
-
-    def _format_obs(self):
-        symbolic = self._symbolic_obs()
-        if self.config.obs_mode == "symbolic":
-            return symbolic
-        rgb = self.render()
-        if self.config.obs_mode == "rgb":
-            return rgb
-        return {"rgb": rgb, "symbolic": symbolic}
+        self._sync_buffers()
+        return self._canvas.copy()
+
+    def _format_obs(self, state: GridState | None = None):
+        mode = self.config.obs_mode
+        if mode == "lazy":
+            return LazyObservation(
+                self, state if state is not None else self.snapshot(), self._obs_version
+            )
+        if mode == "symbolic":
+            return self._symbolic_obs()
+        if mode == "rgb":
+            return self.render()
+        return {"rgb": self.render(), "symbolic": self._symbolic_obs()}
+
+    def _render_snapshot(self, key: str, state: GridState, version: int) -> np.ndarray:
+        """Render observation entry ``key`` for ``state`` (see :class:`LazyObservation`)."""
+        render = self.render if key == "rgb" else self._symbolic_obs
+        if version == self._obs_version:
+            return render()
+        live, live_version = self.snapshot(), self._obs_version
+        self.restore(state)
+        try:
+            return render()
+        finally:
+            self.restore(live)
+            self._obs_version = live_version
 
     def _symbolic_obs(self) -> np.ndarray:
-        tile_grid = self._tile_grid()
-        channels = np.stack([(tile_grid == i).astype(np.float32) for i in range(12)], axis=0)
-        extras = self._extra_channels()
-        symbolic = np.concatenate([channels, extras], axis=0)
-
-        visibility = self._visibility_mask()
-        symbolic[:, ~visibility] = 0.0
+        # Everything outside the field of view is zero, so only the visible
+        # window is copied out of the persistent one-hot buffer.
+        self._sync_buffers()
+        n_tiles = len(COLORS)
+        symbolic = np.zeros((n_tiles + 4, self.grid_size, self.grid_size), dtype=np.float32)
+        window = self._fov_window()
+        symbolic[(slice(None, n_tiles), *window)] = self._onehot[(slice(None), *window)]
+        extras = np.asarray(self._extra_values(), dtype=np.float32)
+        symbolic[(slice(n_tiles, None), *window)] = extras[:, None, None]
         return symbolic
 
-    def _extra_channels(self) -> np.ndarray:
-        return np.zeros((4, self.grid_size, self.grid_size), dtype=np.float32)
+    def _extra_values(self) -> tuple[float, float, float, float]:
+        """Scalar features broadcast over the last four symbolic channels."""
+        return (0.0, 0.0, 0.0, 0.0)
 
-    def _visibility_mask(self) -> np.ndarray:
-        mask = np.zeros((self.grid_size, self.grid_size), dtype=bool)
+    def _fov_window(self) -> tuple[slice, slice]:
         r, c = int(self.agent_pos[0]), int(self.agent_pos[1])
         f = self.config.fov_radius
         r0, r1 = max(0, r - f), min(self.grid_size, r + f + 1)
         c0, c1 = max(0, c - f), min(self.grid_size, c + f + 1)
-        mask[r0:r1, c0:c1] = True
+        return slice(r0, r1), slice(c0, c1)
+
+    def _visibility_mask(self) -> np.ndarray:
+        mask = np.zeros((self.grid_size, self.grid_size), dtype=bool)
+        mask[self._fov_window()] = True
         return mask
 
+    def _sync_buffers(self) -> None:
+        """Rebuild the render buffers from scratch if a reset/restore invalidated them."""
+        if self._buffers_valid:
+            return
+        tiles = self._tile_grid()
+        self._tiles[:] = tiles
+        self._onehot[:] = tiles[None] == np.arange(len(COLORS))[:, None, None]
+        self._canvas[:] = self._rgb_from_tiles(tiles)
+        self._buffers_valid = True
+
+    def _paint_cells(self, cells) -> None:
+        """Re-derive the tile at each of ``cells`` and patch every render buffer."""
+        scale = max(1, 64 // self.grid_size)
+        for r, c in cells:
+            old = self._tiles[r, c]
+            tile = self._tile_at(r, c)
+            if tile == old:
+                continue
+            self._tiles[r, c] = tile
+            self._onehot[old, r, c] = 0.0
+            self._onehot[tile, r, c] = 1.0
+            self._canvas[r * scale : (r + 1) * scale, c * scale : (c + 1) * scale] = PALETTE[tile]
+
+    def _changed_cells(self, prev: GridState, state: GridState) -> list[tuple[int, int]]:
+        """Cells whose tile may differ between ``prev`` and ``state``.
+
+        Subclasses extend this with the cells of objects whose flags changed
+        (picked-up keys, opened doors, toggled switches, removed resources).
+        """
+        if prev.agent_pos == state.agent_pos:
+            return []
+        return [prev.agent_pos, state.agent_pos]
+
     @staticmethod
     def _rgb_from_tiles(tile_grid: np.ndarray) -> np.ndarray:
-        h, w = tile_grid.shape
-        rgb = np.zeros((h, w, 3), dtype=np.uint8)
-        for tid, color in COLORS.items():
-            rgb[tile_grid == tid] = color
+        h = tile_grid.shape[0]
+        rgb = PALETTE[tile_grid]
 
         scale = max(1, 64 // h)
         up = np.repeat(np.repeat(rgb, scale, axis=0), scale, axis=1)
@@ -167,23 +316,36 @@ class BaseGridEnv(gym.Env):
         canvas[: up.shape[0], : up.shape[1]] = up[:64, :64]
         return canvas
 
-    def _attempt_move(self, dr: int, dc: int, blocked_tiles: set[int]) -> bool:
-        nr, nc = int(self.agent_pos[0] + dr), int(self.agent_pos[1] + dc)
+    def _moved(
+        self,
+        pos: tuple[int, int],
+        action: int,
+        walls: np.ndarray,
+        blocked: tuple[int, int] | None = None,
+    ) -> tuple[int, int]:
+        """Position after ``action`` from ``pos``; walls and ``blocked`` stop the move."""
+        move = MOVES.get(action)
+        if move is None:
+            return pos
+        nr, nc = pos[0] + move[0], pos[1] + move[1]
         if nr < 0 or nr >= self.grid_size or nc < 0 or nc >= self.grid_size:
-            return False
-        if self._tile_grid()[nr, nc] in blocked_tiles:
-            return False
-        self.agent_pos[:] = [nr, nc]
-        return True
+            return pos
+        if walls[nr, nc] or (nr, nc) == blocked:
+            return pos
+        return (nr, nc)
 
     @property
     def current_seed(self) -> int:
         return self._seed_value
 
-    def _trace_state(self) -> dict[str, Any]:
-        return {
-            "agent_pos": [int(self.agent_pos[0]), int(self.agent_pos[1])],
-        }
+    @property
+    def trace_steps(self) -> list[TraceStep]:
+        """Current episode's trace as validated models (empty when not recording)."""
+        return self.trace.steps() if self.trace is not None else []
+
+    def _trace_state(self, state: GridState) -> dict[str, Any]:
+        """JSON-ready ``env_state`` entry of the trace for snapshot ``state``."""
+        return {"agent_pos": list(state.agent_pos)}
 
     def oracle_hint(self) -> dict[str, Any]:
         """Privileged, fully-observed state for an oracle / shortest-path agent.
@@ -199,29 +361,96 @@ class BaseGridEnv(gym.Env):
         - ``walls``: ``grid_size x grid_size`` list-of-lists of 0/1, where 1
           marks an impassable wall cell. Absent when an env has no wall grid.
         """
-        hint = dict(self._trace_state())
+        hint = self._trace_state(self.snapshot())
         hint["grid_size"] = int(self.grid_size)
         walls = getattr(self, "walls", None)
         if walls is not None:
             hint["walls"] = np.asarray(walls).astype(np.int64).tolist()
         return hint
 
-    def clone_env_state(self) -> dict[str, Any]:
-        return copy.deepcopy(self.__dict__)
+    def transition(self, state: GridState, action: int) -> tuple[GridState, float, bool]:
+        """Pure model of :meth:`step`: ``(next_state, reward, done)`` from ``state``.
 
-    def simulate_from_state(self, env_state: dict[str, Any], action: int):
-        snapshot = self.clone_env_state()
-        self.__dict__.update(copy.deepcopy(env_state))
-        _obs, reward, terminated, truncated, _info = self.step(action)
-        next_state = self.clone_env_state()
-        self.__dict__.update(snapshot)
-        return next_state, float(reward), bool(terminated or truncated)
+        Does not touch the live env, its RNG or trace recording, so its cost is
+        independent of how far the current episode has progressed. ``done``
+        covers both termination and ``max_steps`` truncation, and ``reward``
+        includes the step penalty, exactly as :meth:`step` would report them.
 
-    def _reset_state(self, seed: int | None = None) -> None:
+        Results are memoized in a bounded LRU cache keyed on the (hashable,
+        immutable) snapshot and action, so planners that revisit a state pay
+        for its transitions once; see :meth:`transition_cache_info`.
+        """
+        capacity = self.config.transition_cache_size
+        if capacity <= 0:
+            return self._uncached_transition(state, action)
+
+        # Snapshots hash without the wall grid, so the cache only holds
+        # entries for one layout at a time.
+        layout = getattr(state, "walls", None)
+        if layout is not self._transition_cache_layout:
+            self._transition_cache.clear()
+            self._transition_cache_layout = layout
+        key = (state, int(action))
+        cache = self._transition_cache
+        result = cache.get(key)
+        if result is not None:
+            cache.move_to_end(key)
+            self.transition_cache_hits += 1
+            return result
+        self.transition_cache_misses += 1
+        result = self._uncached_transition(state, action)
+        cache[key] = result
+        if len(cache) > capacity:
+            cache.popitem(last=False)
+        return result
+
+    def transition_cache_info(self) -> dict[str, int]:
+        """Hit/miss counters and fill level of the ``transition`` cache."""
+        return {
+            "hits": self.transition_cache_hits,
+            "misses": self.transition_cache_misses,
+            "size": len(self._transition_cache),
+            "capacity": self.config.transition_cache_size,
+        }
+
+    def _uncached_transition(self, state: GridState, action: int):
+        next_state, reward, terminated, _events = self._transition(state, int(action))
+        truncated = next_state.step_count >= self.config.max_steps and not terminated
+        return next_state, float(reward + self.config.step_penalty), bool(terminated or truncated)
+
+    def clone_env_state(self) -> GridState:
+        """Planner entry point; snapshots are immutable so no copy is needed."""
+        return self.snapshot()
+
+    def simulate_from_state(self, env_state: GridState, action: int):
+        return self.transition(env_state, action)
+
+    def snapshot(self) -> GridState:
+        raise NotImplementedError
+
+    def restore(self, state: GridState) -> None:
+        self.agent_pos = np.array(state.agent_pos, dtype=np.int64)
+        self.step_count = state.step_count
+        self._buffers_valid = False
+        self._obs_version += 1
+
+    def _transition(
+        self, state: GridState, action: int
+    ) -> tuple[GridState, float, bool, list[str]]:
+        """Advance ``state`` by one action: ``(next_state, reward, terminated, events)``.
+
+        ``reward`` excludes the step penalty and ``next_state.step_count`` is
+        incremented; truncation is decided by the caller.
+        """
         raise NotImplementedError
 
-    def _step_state(self, action: int) -> tuple[float, bool, list[str]]:
+    def _reset_state(self, seed: int | None = None) -> None:
         raise NotImplementedError
 
     def _tile_grid(self) -> np.ndarray:
+        """Full tile grid built from scratch; the reference for ``_tile_at``."""
+        raise NotImplementedError
+
+    def _tile_at(self, r: int, c: int) -> int:
+        """Tile id of a single cell, consistent with ``_tile_grid()[r, c]``."""
         raise NotImplementedError
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from typing import NamedTuple
 
 import numpy as np
 
-from worldmodel_gym.envs.base import BaseEnvConfig, BaseGridEnv
+from worldmodel_gym.envs.base import BaseEnvConfig, BaseGridEnv, GridState, as_pos
 
 
 @dataclass
@@ -16,6 +17,34 @@ class CraftLiteConfig(BaseEnvConfig):
     strict_sparse: bool = True
 
 
+class Inventory(NamedTuple):
+    wood: int = 0
+    tool: int = 0
+    gem: int = 0
+
+
+class Achievements(NamedTuple):
+    collect_wood: int = 0
+    craft_tool: int = 0
+    break_rock: int = 0
+    collect_gem: int = 0
+
+
+_COLLECTED = (-1, -1)
+
+
+@dataclass(frozen=True, slots=True)
+class CraftLiteState(GridState):
+    inventory: Inventory
+    achievements: Achievements
+    # Resource positions; collected resources are marked (-1, -1).
+    wood: tuple[tuple[int, int], ...]
+    rock: tuple[tuple[int, int], ...]
+    gem_pos: tuple[int, int]
+    station_pos: tuple[int, int]
+    walls: np.ndarray = field(compare=False, repr=False)
+
+
 class CraftLiteEnv(BaseGridEnv):
     def __init__(self, config: CraftLiteConfig | None = None):
         super().__init__(config or CraftLiteConfig())
@@ -29,7 +58,8 @@ class CraftLiteEnv(BaseGridEnv):
 
     def _reset_state(self, seed: int | None = None) -> None:
         del seed
-        self.walls[:] = False
+        # Fresh array per episode: snapshots share the wall grid by reference.
+        self.walls = np.zeros((self.grid_size, self.grid_size), dtype=bool)
         self.walls[[0, -1], :] = True
         self.walls[:, [0, -1]] = True
 
@@ -48,75 +78,94 @@ class CraftLiteEnv(BaseGridEnv):
         self.rock = free[picks[start : start + self.config.rock_count]].astype(np.int64)
         self.gem_pos = free[picks[-1]].astype(np.int64)
 
-        self.inventory = {"wood": 0, "tool": 0, "gem": 0}
-        self.achievements = {
-            "collect_wood": 0,
-            "craft_tool": 0,
-            "break_rock": 0,
-            "collect_gem": 0,
-        }
-
-    def _step_state(self, action: int) -> tuple[float, bool, list[str]]:
+        self.inventory = Inventory()._asdict()
+        self.achievements = Achievements()._asdict()
+
+    def snapshot(self) -> CraftLiteState:
+        return CraftLiteState(
+            agent_pos=as_pos(self.agent_pos),
+            step_count=self.step_count,
+            inventory=Inventory(**self.inventory),
+            achievements=Achievements(**self.achievements),
+            wood=tuple(as_pos(p) for p in self.wood),
+            rock=tuple(as_pos(p) for p in self.rock),
+            gem_pos=as_pos(self.gem_pos),
+            station_pos=as_pos(self.station_pos),
+            walls=self.walls,
+        )
+
+    def restore(self, state: CraftLiteState) -> None:
+        super().restore(state)
+        self.inventory = state.inventory._asdict()
+        self.achievements = state.achievements._asdict()
+        self.wood = np.array(state.wood, dtype=np.int64).reshape(-1, 2)
+        self.rock = np.array(state.rock, dtype=np.int64).reshape(-1, 2)
+        self.gem_pos = np.array(state.gem_pos, dtype=np.int64)
+        self.station_pos = np.array(state.station_pos, dtype=np.int64)
+        self.walls = state.walls
+
+    def _transition(self, state: CraftLiteState, action: int):
         events: list[str] = []
         reward = 0.0
         terminated = False
 
-        moves = {
-            1: (-1, 0),
-            2: (1, 0),
-            3: (0, -1),
-            4: (0, 1),
-        }
-
-        if action in moves:
-            self._attempt_move(*moves[action], blocked_tiles={1})
+        agent_pos = self._moved(state.agent_pos, action, state.walls)
+        inv = state.inventory
+        ach = state.achievements
+        wood = state.wood
+        rock = state.rock
 
         if action == 5:
-            if self._collect_resource(self.wood):
-                self.inventory["wood"] += 1
-                self.achievements["collect_wood"] += 1
+            slot = self._resource_at(wood, agent_pos)
+            if slot is not None:
+                wood = wood[:slot] + (_COLLECTED,) + wood[slot + 1 :]
+                inv = inv._replace(wood=inv.wood + 1)
+                ach = ach._replace(collect_wood=ach.collect_wood + 1)
                 events.append("collected_wood")
                 if not self.config.strict_sparse:
                     reward += 0.05
-            if self._break_rock():
-                self.achievements["break_rock"] += 1
+            slot = self._resource_at(rock, agent_pos) if inv.tool > 0 else None
+            if slot is not None:
+                rock = rock[:slot] + (_COLLECTED,) + rock[slot + 1 :]
+                ach = ach._replace(break_rock=ach.break_rock + 1)
                 events.append("broke_rock")
                 if not self.config.strict_sparse:
                     reward += 0.05
-            if np.array_equal(self.agent_pos, self.gem_pos) and self.inventory["tool"] > 0:
-                self.inventory["gem"] = 1
-                self.achievements["collect_gem"] = 1
+            if agent_pos == state.gem_pos and inv.tool > 0:
+                inv = inv._replace(gem=1)
+                ach = ach._replace(collect_gem=1)
                 events.append("collected_gem")
 
-        if action == 6 and np.array_equal(self.agent_pos, self.station_pos):
-            if self.inventory["wood"] >= 1 and self.inventory["tool"] == 0:
-                self.inventory["wood"] -= 1
-                self.inventory["tool"] = 1
-                self.achievements["craft_tool"] = 1
+        if action == 6 and agent_pos == state.station_pos:
+            if inv.wood >= 1 and inv.tool == 0:
+                inv = inv._replace(wood=inv.wood - 1, tool=1)
+                ach = ach._replace(craft_tool=1)
                 events.append("crafted_tool")
                 if not self.config.strict_sparse:
                     reward += 0.05
 
-        if self.inventory["gem"] > 0:
+        if inv.gem > 0:
             reward += 1.0
             terminated = True
             events.append("craft_goal_complete")
 
-        return reward, terminated, events
-
-    def _collect_resource(self, pool: np.ndarray) -> bool:
-        for i, pos in enumerate(pool):
-            if pos[0] < 0:
-                continue
-            if np.array_equal(pos, self.agent_pos):
-                pool[i] = np.array([-1, -1], dtype=np.int64)
-                return True
-        return False
+        next_state = replace(
+            state,
+            agent_pos=agent_pos,
+            step_count=state.step_count + 1,
+            inventory=inv,
+            achievements=ach,
+            wood=wood,
+            rock=rock,
+        )
+        return next_state, reward, terminated, events
 
-    def _break_rock(self) -> bool:
-        if self.inventory["tool"] <= 0:
-            return False
-        return self._collect_resource(self.rock)
+    @staticmethod
+    def _resource_at(pool: tuple[tuple[int, int], ...], pos: tuple[int, int]) -> int | None:
+        for i, resource_pos in enumerate(pool):
+            if resource_pos == pos:
+                return i
+        return None
 
     def _tile_grid(self) -> np.ndarray:
         grid = np.zeros((self.grid_size, self.grid_size), dtype=np.int64)
@@ -134,24 +183,47 @@ class CraftLiteEnv(BaseGridEnv):
         grid[tuple(self.agent_pos)] = 2
         return grid
 
-    def _extra_channels(self) -> np.ndarray:
-        extras = np.zeros((4, self.grid_size, self.grid_size), dtype=np.float32)
-        extras[0, :, :] = float(self.inventory["wood"])
-        extras[1, :, :] = float(self.inventory["tool"])
-        extras[2, :, :] = float(self.inventory["gem"])
-        extras[3, :, :] = self.step_count / max(1, self.config.max_steps)
-        return extras
+    def _tile_at(self, r: int, c: int) -> int:
+        pos = (r, c)
+        if pos == as_pos(self.agent_pos):
+            return 2
+        if pos == as_pos(self.station_pos):
+            return 11
+        if pos == as_pos(self.gem_pos) and self.inventory["gem"] == 0:
+            return 10
+        for pool, tile in ((self.rock, 9), (self.wood, 8)):
+            for resource_pos in pool:
+                if pos == as_pos(resource_pos):
+                    return tile
+        return 1 if self.walls[r, c] else 0
+
+    def _changed_cells(self, prev: CraftLiteState, state: CraftLiteState):
+        cells = super()._changed_cells(prev, state)
+        for before, after in zip(prev.wood + prev.rock, state.wood + state.rock):
+            if before != after:
+                cells.append(before)
+        if prev.inventory.gem != state.inventory.gem:
+            cells.append(state.gem_pos)
+        return cells
+
+    def _extra_values(self) -> tuple[float, float, float, float]:
+        return (
+            float(self.inventory["wood"]),
+            float(self.inventory["tool"]),
+            float(self.inventory["gem"]),
+            self.step_count / max(1, self.config.max_steps),
+        )
 
-    def _trace_state(self) -> dict:
-        base = super()._trace_state()
+    def _trace_state(self, state: CraftLiteState) -> dict:
+        base = super()._trace_state(state)
         base.update(
             {
-                "inventory": dict(self.inventory),
-                "achievements": dict(self.achievements),
-                "station_pos": [int(self.station_pos[0]), int(self.station_pos[1])],
-                "gem_pos": [int(self.gem_pos[0]), int(self.gem_pos[1])],
-                "wood_positions": [[int(p[0]), int(p[1])] for p in self.wood if p[0] >= 0],
-                "rock_positions": [[int(p[0]), int(p[1])] for p in self.rock if p[0] >= 0],
+                "inventory": state.inventory._asdict(),
+                "achievements": state.achievements._asdict(),
+                "station_pos": list(state.station_pos),
+                "gem_pos": list(state.gem_pos),
+                "wood_positions": [list(p) for p in state.wood if p[0] >= 0],
+                "rock_positions": [list(p) for p in state.rock if p[0] >= 0],
             }
         )
         return base
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 
 import numpy as np
 
-from worldmodel_gym.envs.base import BaseEnvConfig, BaseGridEnv
+from worldmodel_gym.envs.base import BaseEnvConfig, BaseGridEnv, GridState, as_pos
 
 
 @dataclass
@@ -14,6 +14,16 @@ class MemoryMazeConfig(BaseEnvConfig):
     wall_density: float = 0.16
 
 
+@dataclass(frozen=True, slots=True)
+class MemoryMazeState(GridState):
+    has_key: bool
+    door_open: bool
+    key_pos: tuple[int, int]
+    door_pos: tuple[int, int]
+    goal_pos: tuple[int, int]
+    walls: np.ndarray = field(compare=False, repr=False)
+
+
 class MemoryMazeEnv(BaseGridEnv):
     def __init__(self, config: MemoryMazeConfig | None = None):
         super().__init__(config or MemoryMazeConfig())
@@ -26,7 +36,8 @@ class MemoryMazeEnv(BaseGridEnv):
 
     def _reset_state(self, seed: int | None = None) -> None:
         del seed
-        self.walls[:] = False
+        # Fresh array per episode: snapshots share the wall grid by reference.
+        self.walls = np.zeros((self.grid_size, self.grid_size), dtype=bool)
         self.walls[[0, -1], :] = True
         self.walls[:, [0, -1]] = True
 
@@ -48,48 +59,63 @@ class MemoryMazeEnv(BaseGridEnv):
         self.has_key = False
         self.door_open = False
 
-    def _step_state(self, action: int) -> tuple[float, bool, list[str]]:
+    def snapshot(self) -> MemoryMazeState:
+        return MemoryMazeState(
+            agent_pos=as_pos(self.agent_pos),
+            step_count=self.step_count,
+            has_key=self.has_key,
+            door_open=self.door_open,
+            key_pos=as_pos(self.key_pos),
+            door_pos=as_pos(self.door_pos),
+            goal_pos=as_pos(self.goal_pos),
+            walls=self.walls,
+        )
+
+    def restore(self, state: MemoryMazeState) -> None:
+        super().restore(state)
+        self.has_key = state.has_key
+        self.door_open = state.door_open
+        self.key_pos = np.array(state.key_pos, dtype=np.int64)
+        self.door_pos = np.array(state.door_pos, dtype=np.int64)
+        self.goal_pos = np.array(state.goal_pos, dtype=np.int64)
+        self.walls = state.walls
+
+    def _transition(self, state: MemoryMazeState, action: int):
         reward = 0.0
         terminated = False
         events: list[str] = []
 
-        moves = {
-            1: (-1, 0),
-            2: (1, 0),
-            3: (0, -1),
-            4: (0, 1),
-        }
-
-        blocked = {1}
-        if not self.door_open:
-            blocked.add(4)
-
-        if action in moves:
-            self._attempt_move(*moves[action], blocked_tiles=blocked)
+        # The door cell blocks movement until it has been opened.
+        blocked = None if state.door_open else state.door_pos
+        agent_pos = self._moved(state.agent_pos, action, state.walls, blocked)
+        has_key = state.has_key
+        door_open = state.door_open
 
-        if np.array_equal(self.agent_pos, self.key_pos) and not self.has_key:
-            self.has_key = True
+        if agent_pos == state.key_pos and not has_key:
+            has_key = True
             events.append("found_key")
 
-        if (
-            action == 5
-            and self.has_key
-            and self._adjacent(self.agent_pos, self.door_pos)
-            and not self.door_open
-        ):
-            self.door_open = True
+        if action == 5 and has_key and self._adjacent(agent_pos, state.door_pos) and not door_open:
+            door_open = True
             events.append("opened_door")
 
-        if np.array_equal(self.agent_pos, self.goal_pos) and self.door_open:
+        if agent_pos == state.goal_pos and door_open:
             reward = 1.0
             terminated = True
             events.append("goal_reached")
 
-        return reward, terminated, events
+        next_state = replace(
+            state,
+            agent_pos=agent_pos,
+            step_count=state.step_count + 1,
+            has_key=has_key,
+            door_open=door_open,
+        )
+        return next_state, reward, terminated, events
 
     @staticmethod
-    def _adjacent(a: np.ndarray, b: np.ndarray) -> bool:
-        return abs(int(a[0]) - int(b[0])) + abs(int(a[1]) - int(b[1])) <= 1
+    def _adjacent(a: tuple[int, int], b: tuple[int, int]) -> bool:
+        return abs(a[0] - b[0]) + abs(a[1] - b[1]) <= 1
 
     def _tile_grid(self) -> np.ndarray:
         grid = np.zeros((self.grid_size, self.grid_size), dtype=np.int64)
@@ -100,23 +126,43 @@ class MemoryMazeEnv(BaseGridEnv):
         grid[tuple(self.agent_pos)] = 2
         return grid
 
-    def _extra_channels(self) -> np.ndarray:
-        extras = np.zeros((4, self.grid_size, self.grid_size), dtype=np.float32)
-        extras[0, :, :] = float(self.has_key)
-        extras[1, :, :] = float(self.door_open)
-        extras[2, :, :] = self.step_count / max(1, self.config.max_steps)
-        extras[3, :, :] = 1.0
-        return extras
+    def _tile_at(self, r: int, c: int) -> int:
+        pos = (r, c)
+        if pos == as_pos(self.agent_pos):
+            return 2
+        if pos == as_pos(self.goal_pos):
+            return 6
+        if pos == as_pos(self.door_pos):
+            return 5 if self.door_open else 4
+        if pos == as_pos(self.key_pos):
+            return 0 if self.has_key else 3
+        return 1 if self.walls[r, c] else 0
+
+    def _changed_cells(self, prev: MemoryMazeState, state: MemoryMazeState):
+        cells = super()._changed_cells(prev, state)
+        if prev.has_key != state.has_key:
+            cells.append(state.key_pos)
+        if prev.door_open != state.door_open:
+            cells.append(state.door_pos)
+        return cells
+
+    def _extra_values(self) -> tuple[float, float, float, float]:
+        return (
+            float(self.has_key),
+            float(self.door_open),
+            self.step_count / max(1, self.config.max_steps),
+            1.0,
+        )
 
-    def _trace_state(self) -> dict:
-        base = super()._trace_state()
+    def _trace_state(self, state: MemoryMazeState) -> dict:
+        base = super()._trace_state(state)
         base.update(
             {
-                "has_key": self.has_key,
-                "door_open": self.door_open,
-                "key_pos": [int(self.key_pos[0]), int(self.key_pos[1])],
-                "door_pos": [int(self.door_pos[0]), int(self.door_pos[1])],
-                "goal_pos": [int(self.goal_pos[0]), int(self.goal_pos[1])],
+                "has_key": state.has_key,
+                "door_open": state.door_open,
+                "key_pos": list(state.key_pos),
+                "door_pos": list(state.door_pos),
+                "goal_pos": list(state.goal_pos),
             }
         )
         return base
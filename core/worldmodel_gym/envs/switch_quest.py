@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 
 import numpy as np
 
-from worldmodel_gym.envs.base import BaseEnvConfig, BaseGridEnv
+from worldmodel_gym.envs.base import BaseEnvConfig, BaseGridEnv, GridState, as_pos
 
 
 @dataclass
@@ -15,6 +15,15 @@ class SwitchQuestConfig(BaseEnvConfig):
     wall_density: float = 0.1
 
 
+@dataclass(frozen=True, slots=True)
+class SwitchQuestState(GridState):
+    progress: int
+    toggled: tuple[bool, ...]
+    switches: tuple[tuple[int, int], ...]
+    sequence: tuple[int, ...]
+    walls: np.ndarray = field(compare=False, repr=False)
+
+
 class SwitchQuestEnv(BaseGridEnv):
     def __init__(self, config: SwitchQuestConfig | None = None):
         super().__init__(config or SwitchQuestConfig())
@@ -26,7 +35,8 @@ class SwitchQuestEnv(BaseGridEnv):
 
     def _reset_state(self, seed: int | None = None) -> None:
         del seed
-        self.walls[:] = False
+        # Fresh array per episode: snapshots share the wall grid by reference.
+        self.walls = np.zeros((self.grid_size, self.grid_size), dtype=bool)
         self.walls[[0, -1], :] = True
         self.walls[:, [0, -1]] = True
 
@@ -48,41 +58,63 @@ class SwitchQuestEnv(BaseGridEnv):
         self.progress = 0
         self.toggled[:] = False
 
-    def _step_state(self, action: int) -> tuple[float, bool, list[str]]:
+    def snapshot(self) -> SwitchQuestState:
+        return SwitchQuestState(
+            agent_pos=as_pos(self.agent_pos),
+            step_count=self.step_count,
+            progress=self.progress,
+            toggled=tuple(bool(t) for t in self.toggled),
+            switches=tuple(as_pos(p) for p in self.switches),
+            sequence=tuple(int(i) for i in self.sequence),
+            walls=self.walls,
+        )
+
+    def restore(self, state: SwitchQuestState) -> None:
+        super().restore(state)
+        self.progress = state.progress
+        self.toggled = np.array(state.toggled, dtype=bool)
+        self.switches = np.array(state.switches, dtype=np.int64).reshape(-1, 2)
+        self.sequence = np.array(state.sequence, dtype=np.int64)
+        self.walls = state.walls
+
+    def _transition(self, state: SwitchQuestState, action: int):
         events: list[str] = []
         reward = 0.0
         terminated = False
 
-        moves = {
-            1: (-1, 0),
-            2: (1, 0),
-            3: (0, -1),
-            4: (0, 1),
-        }
-        if action in moves:
-            self._attempt_move(*moves[action], blocked_tiles={1})
+        agent_pos = self._moved(state.agent_pos, action, state.walls)
+        progress = state.progress
+        toggled = state.toggled
 
         if action in (5, 7):
-            idx = self._switch_at_agent()
+            idx = self._switch_at(state.switches, agent_pos)
             if idx is not None:
-                if idx == int(self.sequence[self.progress]):
-                    self.toggled[idx] = True
-                    events.append(f"toggle_correct_{self.progress}")
-                    self.progress += 1
-                    if self.progress == self.config.n_switches:
+                if idx == state.sequence[progress]:
+                    toggled = toggled[:idx] + (True,) + toggled[idx + 1 :]
+                    events.append(f"toggle_correct_{progress}")
+                    progress += 1
+                    if progress == self.config.n_switches:
                         reward = 1.0
                         terminated = True
                         events.append("switch_chain_complete")
                 else:
-                    self.toggled[:] = False
-                    self.progress = 0
+                    toggled = (False,) * len(toggled)
+                    progress = 0
                     events.append("toggle_wrong_reset")
 
-        return reward, terminated, events
+        next_state = replace(
+            state,
+            agent_pos=agent_pos,
+            step_count=state.step_count + 1,
+            progress=progress,
+            toggled=toggled,
+        )
+        return next_state, reward, terminated, events
 
-    def _switch_at_agent(self) -> int | None:
-        for i, pos in enumerate(self.switches):
-            if np.array_equal(pos, self.agent_pos):
+    @staticmethod
+    def _switch_at(switches: tuple[tuple[int, int], ...], pos: tuple[int, int]) -> int | None:
+        for i, switch_pos in enumerate(switches):
+            if switch_pos == pos:
                 return i
         return None
 
@@ -94,25 +126,41 @@ class SwitchQuestEnv(BaseGridEnv):
         grid[tuple(self.agent_pos)] = 2
         return grid
 
-    def _extra_channels(self) -> np.ndarray:
-        extras = np.zeros((4, self.grid_size, self.grid_size), dtype=np.float32)
-        extras[0, :, :] = self.progress / max(1, self.config.n_switches)
-        extras[1, :, :] = self.step_count / max(1, self.config.max_steps)
-        extras[2, :, :] = 1.0
-        extras[3, :, :] = 0.0
-        return extras
+    def _tile_at(self, r: int, c: int) -> int:
+        pos = (r, c)
+        if pos == as_pos(self.agent_pos):
+            return 2
+        # Later switches win on overlap, matching the paint order of _tile_grid.
+        for i in range(len(self.switches) - 1, -1, -1):
+            if pos == as_pos(self.switches[i]):
+                return 0 if self.toggled[i] else 7
+        return 1 if self.walls[r, c] else 0
+
+    def _changed_cells(self, prev: SwitchQuestState, state: SwitchQuestState):
+        cells = super()._changed_cells(prev, state)
+        for pos, before, after in zip(state.switches, prev.toggled, state.toggled):
+            if before != after:
+                cells.append(pos)
+        return cells
+
+    def _extra_values(self) -> tuple[float, float, float, float]:
+        return (
+            self.progress / max(1, self.config.n_switches),
+            self.step_count / max(1, self.config.max_steps),
+            1.0,
+            0.0,
+        )
 
-    def _trace_state(self) -> dict:
-        base = super()._trace_state()
+    def _trace_state(self, state: SwitchQuestState) -> dict:
+        base = super()._trace_state(state)
         next_target = None
-        if self.progress < self.config.n_switches:
-            idx = int(self.sequence[self.progress])
-            next_target = [int(self.switches[idx][0]), int(self.switches[idx][1])]
+        if state.progress < self.config.n_switches:
+            next_target = list(state.switches[state.sequence[state.progress]])
         base.update(
             {
-                "progress": self.progress,
+                "progress": state.progress,
                 "n_switches": self.config.n_switches,
-                "switches": [[int(p[0]), int(p[1])] for p in self.switches],
+                "switches": [list(p) for p in state.switches],
                 "next_target_pos": next_target,
             }
         )
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import numpy as np
+from gymnasium import spaces
+
+from worldmodel_gym.envs.base import PALETTE, BaseGridEnv
+from worldmodel_gym.envs.craft_lite import CraftLiteEnv
+from worldmodel_gym.envs.memory_maze import MemoryMazeEnv
+from worldmodel_gym.envs.registry import make_env
+from worldmodel_gym.envs.switch_quest import SwitchQuestEnv
+
+# Row/col delta per action id; only 1-4 move, everything else stays in place.
+_MOVE_DELTAS = np.array(
+    [[0, 0], [-1, 0], [1, 0], [0, -1], [0, 1], [0, 0], [0, 0], [0, 0]], dtype=np.int64
+)
+
+
+class VectorGridEnv:
+    """N independent episodes of one grid env, advanced by a single vectorized step.
+
+    State lives in stacked NumPy arrays (walls ``[N, H, W]``, positions
+    ``[N, 2]``, per-env flags / inventories as ``[N]`` arrays) and
+    :meth:`step` advances every episode at once from an ``[N]`` action vector.
+    Finished episodes are reset automatically: the returned observation row is
+    the first observation of the new episode and the terminal observation is
+    kept in ``infos["final_obs"]`` (valid where ``infos["_final_obs"]`` is set).
+
+    Layouts are drawn by each sub-env's scalar ``_reset_state`` using its own RNG,
+    so ``reset(seed=[s_0, ..., s_{N-1}])`` followed by the same actions yields
+    bit-identical observations, rewards and termination flags to N scalar envs
+    reset with those seeds (and, after an auto-reset, to a scalar
+    ``reset()`` without a seed). Subclasses implement the per-env dynamics.
+    """
+
+    def __init__(self, envs: Sequence[BaseGridEnv]):
+        if not envs:
+            msg = "VectorGridEnv needs at least one env"
+            raise ValueError(msg)
+        self._envs = list(envs)
+        template = self._envs[0]
+        self.num_envs = len(self._envs)
+        self.config = template.config
+        self.grid_size = template.grid_size
+        self.single_action_space = template.action_space
+        self.single_observation_space = template.observation_space
+        self.action_space = spaces.MultiDiscrete(
+            np.full(self.num_envs, template.action_space.n, dtype=np.int64)
+        )
+
+        n, g = self.num_envs, self.grid_size
+        self.walls = np.zeros((n, g, g), dtype=bool)
+        self.agent_pos = np.zeros((n, 2), dtype=np.int64)
+        self.step_count = np.zeros(n, dtype=np.int64)
+        self._rows = np.arange(n)
+        self._allocate_state()
+
+    def reset(self, *, seed: int | Sequence[int] | None = None):
+        """Reset every sub-env.
+
+        ``seed`` may be a single int (env ``i`` gets ``seed + i``, the gymnasium
+        vector convention) or one seed per env.
+        """
+        if seed is None:
+            seeds: list[int | None] = [None] * self.num_envs
+        elif isinstance(seed, (int, np.integer)):
+            seeds = [int(seed) + i for i in range(self.num_envs)]
+        else:
+            seeds = [int(s) for s in seed]
+            if len(seeds) != self.num_envs:
+                msg = f"Expected {self.num_envs} seeds, got {len(seeds)}"
+                raise ValueError(msg)
+        for i, env_seed in enumerate(seeds):
+            self._reset_env(i, env_seed)
+        return self._format_obs(), {"seeds": [env.current_seed for env in self._envs]}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+        self.step_count += 1
+        rewards, terminated, events = self._step_state(actions)
+        truncated = (self.step_count >= self.config.max_steps) & ~terminated
+        rewards = rewards + self.config.step_penalty
+
+        obs = self._format_obs()
+        infos: dict[str, Any] = {"events": events, "step": self.step_count.copy()}
+
+        done = terminated | truncated
+        if done.any():
+            infos["final_obs"] = obs
+            infos["_final_obs"] = done
+            for i in np.flatnonzero(done):
+                self._reset_env(int(i), None)
+            obs = self._format_obs()
+
+        return obs, rewards, terminated, truncated, infos
+
+    def render(self) -> np.ndarray:
+        return self._rgb_from_tiles(self._tile_grid())
+
+    def _reset_env(self, i: int, seed: int | None) -> None:
+        env = self._envs[i]
+        if seed is not None:
+            env._rng = np.random.default_rng(seed)
+            env._seed_value = int(seed)
+        env._reset_state(seed=seed)
+        self.walls[i] = env.walls
+        self.agent_pos[i] = env.agent_pos
+        self.step_count[i] = 0
+        self._load_layout(i, env)
+
+    def _format_obs(self):
+        mode = self.config.obs_mode
+        tiles = self._tile_grid()
+        if mode == "rgb":
+            return self._rgb_from_tiles(tiles)
+        symbolic = self._symbolic_from_tiles(tiles)
+        if mode == "symbolic":
+            return symbolic
+        return {"rgb": self._rgb_from_tiles(tiles), "symbolic": symbolic}
+
+    def _symbolic_from_tiles(self, tiles: np.ndarray) -> np.ndarray:
+        n, g = self.num_envs, self.grid_size
+        symbolic = np.empty((n, 16, g, g), dtype=np.float32)
+        np.equal(tiles[:, None], np.arange(12)[None, :, None, None], out=symbolic[:, :12])
+        symbolic[:, 12:] = self._extra_channels()[:, :, None, None]
+        symbolic *= self._visibility_mask()[:, None]
+        return symbolic
+
+    def _visibility_mask(self) -> np.ndarray:
+        f = self.config.fov_radius
+        idx = np.arange(self.grid_size)
+        rows = np.abs(idx[None, :] - self.agent_pos[:, :1]) <= f
+        cols = np.abs(idx[None, :] - self.agent_pos[:, 1:]) <= f
+        return rows[:, :, None] & cols[:, None, :]
+
+    def _rgb_from_tiles(self, tiles: np.ndarray) -> np.ndarray:
+        rgb = PALETTE[tiles]
+        scale = max(1, 64 // self.grid_size)
+        up = np.repeat(np.repeat(rgb, scale, axis=1), scale, axis=2)
+        canvas = np.zeros((self.num_envs, 64, 64, 3), dtype=np.uint8)
+        canvas[:, : up.shape[1], : up.shape[2]] = up[:, :64, :64]
+        return canvas
+
+    def _move(self, actions: np.ndarray, blocked_extra: np.ndarray | None = None) -> None:
+        """Apply movement actions (1-4) to every env that is not blocked."""
+        is_move = (actions >= 1) & (actions <= 4)
+        target = self.agent_pos + _MOVE_DELTAS[np.where(is_move, actions, 0)]
+        inside = np.all((target >= 0) & (target < self.grid_size), axis=1)
+        tr = np.clip(target[:, 0], 0, self.grid_size - 1)
+        tc = np.clip(target[:, 1], 0, self.grid_size - 1)
+        blocked = self.walls[self._rows, tr, tc]
+        if blocked_extra is not None:
+            blocked = blocked | np.all(target == blocked_extra, axis=1)
+        ok = is_move & inside & ~blocked
+        self.agent_pos[ok] = target[ok]
+
+    def _at(self, pos: np.ndarray) -> np.ndarray:
+        return np.all(self.agent_pos == pos, axis=1)
+
+    def _base_tiles(self) -> np.ndarray:
+        return self.walls.astype(np.int64)
+
+    def _paint_agent(self, grid: np.ndarray) -> np.ndarray:
+        grid[self._rows, self.agent_pos[:, 0], self.agent_pos[:, 1]] = 2
+        return grid
+
+    @staticmethod
+    def _emit(events: list[list[str]], mask: np.ndarray, name: str) -> None:
+        for i in np.flatnonzero(mask):
+            events[i].append(name)
+
+    def _allocate_state(self) -> None:
+        raise NotImplementedError
+
+    def _load_layout(self, i: int, env: BaseGridEnv) -> None:
+        raise NotImplementedError
+
+    def _step_state(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, list[list[str]]]:
+        raise NotImplementedError
+
+    def _tile_grid(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def _extra_channels(self) -> np.ndarray:
+        raise NotImplementedError
+
+
+class VectorMemoryMazeEnv(VectorGridEnv):
+    def _allocate_state(self) -> None:
+        n = self.num_envs
+        self.key_pos = np.zeros((n, 2), dtype=np.int64)
+        self.door_pos = np.zeros((n, 2), dtype=np.int64)
+        self.goal_pos = np.zeros((n, 2), dtype=np.int64)
+        self.has_key = np.zeros(n, dtype=bool)
+        self.door_open = np.zeros(n, dtype=bool)
+
+    def _load_layout(self, i: int, env: MemoryMazeEnv) -> None:
+        self.key_pos[i] = env.key_pos
+        self.door_pos[i] = env.door_pos
+        self.goal_pos[i] = env.goal_pos
+        self.has_key[i] = env.has_key
+        self.door_open[i] = env.door_open
+
+    def _step_state(self, actions: np.ndarray):
+        n = self.num_envs
+        rewards = np.zeros(n, dtype=np.float64)
+        events: list[list[str]] = [[] for _ in range(n)]
+
+        # A closed door blocks like a wall; an out-of-grid sentinel never matches.
+        door_block = np.where(self.door_open[:, None], -1, self.door_pos)
+        self._move(actions, blocked_extra=door_block)
+
+        found = self._at(self.key_pos) & ~self.has_key
+        self.has_key |= found
+        self._emit(events, found, "found_key")
+
+        adjacent = np.abs(self.agent_pos - self.door_pos).sum(axis=1) <= 1
+        opened = (actions == 5) & self.has_key & adjacent & ~self.door_open
+        self.door_open |= opened
+        self._emit(events, opened, "opened_door")
+
+        terminated = self._at(self.goal_pos) & self.door_open
+        rewards[terminated] = 1.0
+        self._emit(events, terminated, "goal_reached")
+        return rewards, terminated, events
+
+    def _tile_grid(self) -> np.ndarray:
+        grid = self._base_tiles()
+        rows = self._rows
+        grid[rows, self.key_pos[:, 0], self.key_pos[:, 1]] = np.where(self.has_key, 0, 3)
+        grid[rows, self.door_pos[:, 0], self.door_pos[:, 1]] = np.where(self.door_open, 5, 4)
+        grid[rows, self.goal_pos[:, 0], self.goal_pos[:, 1]] = 6
+        return self._paint_agent(grid)
+
+    def _extra_channels(self) -> np.ndarray:
+        extras = np.zeros((self.num_envs, 4), dtype=np.float32)
+        extras[:, 0] = self.has_key
+        extras[:, 1] = self.door_open
+        extras[:, 2] = self.step_count / max(1, self.config.max_steps)
+        extras[:, 3] = 1.0
+        return extras
+
+
+class VectorSwitchQuestEnv(VectorGridEnv):
+    def _allocate_state(self) -> None:
+        n, s = self.num_envs, self.config.n_switches
+        self.switches = np.zeros((n, s, 2), dtype=np.int64)
+        self.sequence = np.zeros((n, s), dtype=np.int64)
+        self.progress = np.zeros(n, dtype=np.int64)
+        self.toggled = np.zeros((n, s), dtype=bool)
+
+    def _load_layout(self, i: int, env: SwitchQuestEnv) -> None:
+        self.switches[i] = env.switches
+        self.sequence[i] = env.sequence
+        self.progress[i] = env.progress
+        self.toggled[i] = env.toggled
+
+    def _step_state(self, actions: np.ndarray):
+        n, n_switches = self.num_envs, self.config.n_switches
+        rewards = np.zeros(n, dtype=np.float64)
+        terminated = np.zeros(n, dtype=bool)
+        events: list[list[str]] = [[] for _ in range(n)]
+
+        self._move(actions)
+
+        on_switch = np.all(self.switches == self.agent_pos[:, None, :], axis=2)
+        pressed = ((actions == 5) | (actions == 7)) & on_switch.any(axis=1)
+        idx = on_switch.argmax(axis=1)
+        target = self.sequence[self._rows, np.minimum(self.progress, n_switches - 1)]
+        correct = pressed & (idx == target)
+        wrong = pressed & ~correct
+
+        for i in np.flatnonzero(correct):
+            events[i].append(f"toggle_correct_{int(self.progress[i])}")
+        self.toggled[np.flatnonzero(correct), idx[correct]] = True
+        self.progress[correct] += 1
+
+        complete = correct & (self.progress == n_switches)
+        rewards[complete] = 1.0
+        terminated |= complete
+        self._emit(events, complete, "switch_chain_complete")
+
+        self.toggled[wrong] = False
+        self.progress[wrong] = 0
+        self._emit(events, wrong, "toggle_wrong_reset")
+        return rewards, terminated, events
+
+    def _tile_grid(self) -> np.ndarray:
+        grid = self._base_tiles()
+        for s in range(self.config.n_switches):
+            pos = self.switches[:, s]
+            grid[self._rows, pos[:, 0], pos[:, 1]] = np.where(self.toggled[:, s], 0, 7)
+        return self._paint_agent(grid)
+
+    def _extra_channels(self) -> np.ndarray:
+        extras = np.zeros((self.num_envs, 4), dtype=np.float32)
+        extras[:, 0] = self.progress / max(1, self.config.n_switches)
+        extras[:, 1] = self.step_count / max(1, self.config.max_steps)
+        extras[:, 2] = 1.0
+        return extras
+
+
+class VectorCraftLiteEnv(VectorGridEnv):
+    def _allocate_state(self) -> None:
+        n, c = self.num_envs, self.config
+        self.wood = np.zeros((n, c.wood_count, 2), dtype=np.int64)
+        self.rock = np.zeros((n, c.rock_count, 2), dtype=np.int64)
+        self.gem_pos = np.zeros((n, 2), dtype=np.int64)
+        self.station_pos = np.zeros((n, 2), dtype=np.int64)
+        self.inv_wood = np.zeros(n, dtype=np.int64)
+        self.inv_tool = np.zeros(n, dtype=np.int64)
+        self.inv_gem = np.zeros(n, dtype=np.int64)
+        # Columns: collect_wood, craft_tool, break_rock, collect_gem.
+        self.achievements = np.zeros((n, 4), dtype=np.int64)
+
+    def _load_layout(self, i: int, env: CraftLiteEnv) -> None:
+        self.wood[i] = env.wood
+        self.rock[i] = env.rock
+        self.gem_pos[i] = env.gem_pos
+        self.station_pos[i] = env.station_pos
+        self.inv_wood[i] = env.inventory["wood"]
+        self.inv_tool[i] = env.inventory["tool"]
+        self.inv_gem[i] = env.inventory["gem"]
+        self.achievements[i] = [
+            env.achievements["collect_wood"],
+            env.achievements["craft_tool"],
+            env.achievements["break_rock"],
+            env.achievements["collect_gem"],
+        ]
+
+    def _collect(self, pool: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """Remove the resource under the agent for envs in ``mask``; return who collected."""
+        hit = np.all(pool == self.agent_pos[:, None, :], axis=2)
+        collected = mask & hit.any(axis=1)
+        rows = np.flatnonzero(collected)
+        pool[rows, hit[rows].argmax(axis=1)] = -1
+        return collected
+
+    def _step_state(self, actions: np.ndarray):
+        n = self.num_envs
+        rewards = np.zeros(n, dtype=np.float64)
+        events: list[list[str]] = [[] for _ in range(n)]
+        shaped = 0.0 if self.config.strict_sparse else 0.05
+
+        self._move(actions)
+
+        interact = actions == 5
+        got_wood = self._collect(self.wood, interact)
+        self.inv_wood += got_wood
+        self.achievements[:, 0] += got_wood
+        rewards += np.where(got_wood, shaped, 0.0)
+        self._emit(events, got_wood, "collected_wood")
+
+        broke = self._collect(self.rock, interact & (self.inv_tool > 0))
+        self.achievements[:, 2] += broke
+        rewards += np.where(broke, shaped, 0.0)
+        self._emit(events, broke, "broke_rock")
+
+        got_gem = interact & self._at(self.gem_pos) & (self.inv_tool > 0)
+        self.inv_gem[got_gem] = 1
+        self.achievements[got_gem, 3] = 1
+        self._emit(events, got_gem, "collected_gem")
+
+        crafted = (
+            (actions == 6)
+            & self._at(self.station_pos)
+            & (self.inv_wood >= 1)
+            & (self.inv_tool == 0)
+        )
+        self.inv_wood -= crafted
+        self.inv_tool[crafted] = 1
+        self.achievements[crafted, 1] = 1
+        rewards += np.where(crafted, shaped, 0.0)
+        self._emit(events, crafted, "crafted_tool")
+
+        terminated = self.inv_gem > 0
+        rewards += np.where(terminated, 1.0, 0.0)
+        self._emit(events, terminated, "craft_goal_complete")
+        return rewards, terminated, events
+
+    def _tile_grid(self) -> np.ndarray:
+        grid = self._base_tiles()
+        for pool, tile in ((self.wood, 8), (self.rock, 9)):
+            rows, slots = np.nonzero(pool[:, :, 0] >= 0)
+            grid[rows, pool[rows, slots, 0], pool[rows, slots, 1]] = tile
+        rows = np.flatnonzero(self.inv_gem == 0)
+        grid[rows, self.gem_pos[rows, 0], self.gem_pos[rows, 1]] = 10
+        grid[self._rows, self.station_pos[:, 0], self.station_pos[:, 1]] = 11
+        return self._paint_agent(grid)
+
+    def _extra_channels(self) -> np.ndarray:
+        extras = np.zeros((self.num_envs, 4), dtype=np.float32)
+        extras[:, 0] = self.inv_wood
+        extras[:, 1] = self.inv_tool
+        extras[:, 2] = self.inv_gem
+        extras[:, 3] = self.step_count / max(1, self.config.max_steps)
+        return extras
+
+
+_VECTOR_CLASSES: dict[type[BaseGridEnv], type[VectorGridEnv]] = {
+    MemoryMazeEnv: VectorMemoryMazeEnv,
+    SwitchQuestEnv: VectorSwitchQuestEnv,
+    CraftLiteEnv: VectorCraftLiteEnv,
+}
+
+
+def make_vec_env(env_id: str, num_envs: int, **kwargs: Any) -> VectorGridEnv:
+    """Build a :class:`VectorGridEnv` of ``num_envs`` copies of ``make_env(env_id, **kwargs)``."""
+    if num_envs < 1:
+        msg = f"num_envs must be positive, got {num_envs}"
+        raise ValueError(msg)
+    envs = [make_env(env_id, **kwargs) for _ in range(num_envs)]
+    return _VECTOR_CLASSES[type(envs[0])](envs)
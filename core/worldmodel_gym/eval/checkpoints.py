@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import pickle
+import tempfile
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from worldmodel_gym import __version__
+from worldmodel_gym.envs.registry import make_env
+from worldmodel_gym.eval.seeds import TRAIN_SEEDS
+
+logger = logging.getLogger(__name__)
+
+# First-party packages whose source determines what a checkpoint means.
+_CODE_PACKAGES = (
+    "worldmodel_gym",
+    "worldmodel_agents",
+    "worldmodel_planners",
+    "worldmodel_models",
+)
+
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """Short content hash of the first-party agent/env/model source.
+
+    Any edit to a ``.py`` file of the importable first-party packages changes
+    it, so caches keyed on it are invalidated by code changes without relying
+    on git metadata being present at runtime.
+    """
+    digest = hashlib.sha256(__version__.encode())
+    for package in _CODE_PACKAGES:
+        spec = importlib.util.find_spec(package)
+        if spec is None or not spec.submodule_search_locations:
+            continue
+        root = Path(next(iter(spec.submodule_search_locations)))
+        for path in sorted(root.rglob("*.py")):
+            digest.update(f"{package}/{path.relative_to(root).as_posix()}".encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> Path:
+    """Write ``data`` to ``path`` via a sibling temp file and ``os.replace``.
+
+    Readers (and concurrent writers of the same content) never see a
+    partially written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def obs_dim_of(obs) -> int:
+    """Flattened size of the observation entry learned agents consume (symbolic first)."""
+    if isinstance(obs, Mapping):
+        for key in ("symbolic", "rgb"):
+            if key in obs:
+                return int(np.asarray(obs[key]).size)
+        return int(np.asarray(next(iter(obs.values()))).size)
+    return int(np.asarray(obs).size)
+
+
+@dataclass(frozen=True)
+class CheckpointKey:
+    """Identifies one trained agent state: who, where, with what inputs, from which code."""
+
+    agent: str
+    env_id: str
+    obs_dim: int
+    seed: int
+    code_version: str
+
+    def digest(self) -> str:
+        payload = json.dumps(asdict(self), sort_keys=True).encode()
+        return hashlib.sha256(payload).hexdigest()[:24]
+
+
+class CheckpointStore:
+    """Directory of pickled agent states keyed by :class:`CheckpointKey`.
+
+    Files live at ``<root>/<agent>/<env_id>/<digest>.pkl`` and hold the key
+    next to the state, so a load can confirm it got what it asked for.
+    Writes are atomic (:func:`atomic_write_bytes`), so concurrent
+    ``pretrain`` workers never expose half-written checkpoints. Loaded
+    states are memoized per store, so evaluating many episodes with the same
+    checkpoint reads the file once. Only load directories you produced:
+    checkpoints are pickles.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._loaded: dict[CheckpointKey, dict | None] = {}
+
+    def path(self, key: CheckpointKey) -> Path:
+        return self.root / key.agent / key.env_id / f"{key.digest()}.pkl"
+
+    def __contains__(self, key: CheckpointKey) -> bool:
+        return self.path(key).exists()
+
+    def save(self, key: CheckpointKey, state: dict[str, Any]) -> Path:
+        path = atomic_write_bytes(
+            self.path(key), pickle.dumps({"key": asdict(key), "state": state})
+        )
+        self._loaded[key] = state
+        return path
+
+    def load(self, key: CheckpointKey) -> dict[str, Any] | None:
+        """The state saved under ``key``, or ``None`` if there is none."""
+        if key in self._loaded:
+            return self._loaded[key]
+        state = None
+        path = self.path(key)
+        if path.exists():
+            with path.open("rb") as handle:
+                payload = pickle.load(handle)
+            if payload.get("key") == asdict(key):
+                state = payload["state"]
+            else:
+                logger.warning("checkpoint %s does not hold %s; ignoring it", path, key)
+        self._loaded[key] = state
+        return state
+
+
+@functools.lru_cache(maxsize=8)
+def open_store(root: str) -> CheckpointStore:
+    """Process-wide :class:`CheckpointStore` for ``root`` (shared by every episode it serves)."""
+    return CheckpointStore(root)
+
+
+def restore_checkpoint(
+    store: CheckpointStore, agent, agent_name: str, env_id: str, obs, seed: int
+) -> bool:
+    """Load ``agent``'s checkpoint for this episode if one exists; returns whether it did.
+
+    Call right after ``agent.reset(seed=seed)``, which otherwise leaves
+    learned agents with freshly initialized weights.
+    """
+    if not hasattr(agent, "load_checkpoint_state"):
+        return False
+    key = CheckpointKey(agent_name, env_id, obs_dim_of(obs), int(seed), code_version())
+    state = store.load(key)
+    if state is None:
+        return False
+    agent.load_checkpoint_state(state)
+    return True
+
+
+def pretrain_checkpoint(
+    agent_name: str,
+    agent_factory: Callable[[str], object],
+    env_id: str,
+    seed: int,
+    store: CheckpointStore,
+    env_kwargs: dict,
+    episodes: int,
+    train_seeds: list[int] | None = None,
+) -> Path | None:
+    """Train one agent online and save it under its :class:`CheckpointKey`.
+
+    The agent is reset once with ``seed`` (which fixes its initial weights,
+    as in evaluation) and then learns from ``episodes`` episodes on the
+    env's train-track layouts, never the test seeds it may later be
+    evaluated on. Returns the checkpoint path, or ``None`` for agents with
+    nothing to checkpoint.
+    """
+    agent = agent_factory(agent_name)
+    if not hasattr(agent, "checkpoint_state"):
+        return None
+    layouts = list(train_seeds or TRAIN_SEEDS.get(env_id, [11, 13]))
+    env = make_env(env_id, **env_kwargs)
+    obs_dim = None
+    agent.reset(seed=seed)
+    for episode in range(int(episodes)):
+        obs, info = env.reset(seed=layouts[episode % len(layouts)])
+        info["env_ref"] = env
+        obs_dim = obs_dim_of(obs)
+        if episode:
+            # Keep learned weights and data; only clear per-episode state.
+            agent.reset()
+        done = False
+        while not done:
+            action = int(agent.act(obs, info))
+            next_obs, reward, terminated, truncated, info = env.step(action)
+            info["env_ref"] = env
+            done = bool(terminated or truncated)
+            agent.observe(
+                {
+                    "obs": obs,
+                    "action": action,
+                    "reward": reward,
+                    "done": done,
+                    "next_obs": next_obs,
+                    "events": info.get("events", []),
+                }
+            )
+            obs = next_obs
+    if obs_dim is None:
+        return None
+    key = CheckpointKey(agent_name, env_id, obs_dim, int(seed), code_version())
+    return store.save(key, agent.checkpoint_state())
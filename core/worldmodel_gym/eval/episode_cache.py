@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from worldmodel_gym.eval.checkpoints import atomic_write_bytes, code_version
+from worldmodel_gym.eval.metrics import EpisodeStats
+
+logger = logging.getLogger(__name__)
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+def agent_config_hash(agent) -> str:
+    """Digest of an agent's class and ``config``: agents that differ in either never share results."""
+    config = getattr(agent, "config", None)
+    if dataclasses.is_dataclass(config) and not isinstance(config, type):
+        config = asdict(config)
+    cls = type(agent)
+    payload = _canonical_json({"class": f"{cls.__module__}.{cls.__qualname__}", "config": config})
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class EpisodeKey:
+    """Everything a deterministic episode's outcome depends on."""
+
+    agent: str
+    agent_config: str
+    env_id: str
+    env_kwargs: str
+    seed: int
+    code_version: str
+
+    @classmethod
+    def for_episode(
+        cls, agent_name: str, agent_config: str, env_id: str, env_kwargs: dict, seed: int
+    ) -> EpisodeKey:
+        return cls(
+            agent=agent_name,
+            agent_config=agent_config,
+            env_id=env_id,
+            env_kwargs=_canonical_json(env_kwargs),
+            seed=int(seed),
+            code_version=code_version(),
+        )
+
+    def digest(self) -> str:
+        return hashlib.sha256(_canonical_json(asdict(self)).encode()).hexdigest()[:32]
+
+
+class EpisodeCache:
+    """Content-addressed store of finished episodes (``EpisodeStats`` plus trace).
+
+    Entries are JSON files at ``<root>/<digest[:2]>/<digest>.json`` holding
+    the :class:`EpisodeKey` next to the result, so a lookup confirms it got
+    the episode it asked for; writes are atomic. ``hits`` and ``misses``
+    count lookups made through this instance.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: EpisodeKey) -> Path:
+        digest = key.digest()
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def get(self, key: EpisodeKey) -> tuple[EpisodeStats, dict] | None:
+        path = self.path(key)
+        entry = None
+        if path.exists():
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                logger.warning("unreadable episode cache entry %s; ignoring it", path)
+        if entry is None or entry.get("key") != asdict(key):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return EpisodeStats(**entry["stats"]), entry["trace"]
+
+    def put(self, key: EpisodeKey, stats: EpisodeStats, trace: dict) -> Path:
+        entry = {"key": asdict(key), "stats": asdict(stats), "trace": trace}
+        return atomic_write_bytes(self.path(key), json.dumps(entry).encode("utf-8"))
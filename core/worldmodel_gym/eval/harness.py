@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-import json
 import logging
+import pickle
+import tempfile
 import time
 import tracemalloc
 import uuid
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Callable
 
@@ -12,14 +16,18 @@ import numpy as np
 import yaml
 
 from worldmodel_gym.envs.registry import make_env
+from worldmodel_gym.eval.checkpoints import code_version, open_store, restore_checkpoint
 from worldmodel_gym.eval.continual import (
     ContinualSchedule,
     apply_shift_kwargs,
     continual_transfer_metrics,
 )
+from worldmodel_gym.eval.episode_cache import EpisodeCache, EpisodeKey, agent_config_hash
 from worldmodel_gym.eval.metrics import EpisodeStats, aggregate_episode_stats
 from worldmodel_gym.eval.seeds import TEST_SEEDS, TRAIN_SEEDS
-from worldmodel_gym.trace.schema import EpisodeTrace, RunMetrics
+from worldmodel_gym.eval.spill import SpilledTransitions, spill_episode
+from worldmodel_gym.trace.schema import RunMetrics
+from worldmodel_gym.trace.writer import TraceWriter, trace_filename
 
 logger = logging.getLogger(__name__)
 
@@ -49,41 +57,124 @@ def _reward_prediction_error(
     A separate mean absolute error is accumulated for each ``k``. Episodes
     shorter than ``k`` contribute no samples to that horizon. ``episode_transitions``
     is a list of per-episode transition lists; rollouts never cross episode
-    boundaries.
+    boundaries. See :func:`model_fidelity_report` for the batched engine.
     """
+    report = model_fidelity_report(agent, episode_transitions, ks=ks, obs_error=False)
+    return {f"k{k}": report[f"k{k}"] for k in ks}
+
+
+def model_fidelity_report(
+    agent,
+    episode_transitions: list[list[tuple]],
+    ks: tuple[int, ...] = (1, 5, 10),
+    obs_error: bool = True,
+) -> dict[str, float]:
+    """Open-loop reward error (``k{k}``) and, optionally, observation MSE (``obs_k{k}``).
+
+    World models exposing ``observe_batch``/``predict_batch`` are evaluated one
+    episode at a time: every start index is observed in a single batch and all
+    rollouts advance together, the batch shrinking to the starts that still
+    have a transition at the current offset. Any horizons in ``ks`` come out of
+    the same pass. ``obs_k{k}`` is the mean squared error between the predicted
+    observation ``k`` steps ahead and the real one. Other models fall back to
+    one ``observe``/``predict`` chain per start index.
+    """
+    keys = [f"k{k}" for k in ks] + ([f"obs_k{k}" for k in ks] if obs_error else [])
     world_model = getattr(agent, "world_model", None)
     if world_model is None:
-        return {f"k{k}": 0.0 for k in ks}
-
-    errors: dict[int, list[float]] = {k: [] for k in ks}
-    max_k = max(ks)
+        return dict.fromkeys(keys, 0.0)
 
+    batched = hasattr(world_model, "observe_batch") and hasattr(world_model, "predict_batch")
+    rollout = _batched_fidelity_rollout if batched else _scalar_fidelity_rollout
+    reward_errors: dict[int, list[np.ndarray]] = {k: [] for k in ks}
+    obs_errors: dict[int, list[np.ndarray]] = {k: [] for k in ks}
     for transitions in episode_transitions:
-        n = len(transitions)
-        if n == 0:
+        if len(transitions) == 0:
+            continue
+        rollout(world_model, transitions, ks, reward_errors, obs_errors if obs_error else None)
+
+    report = {f"k{k}": _mean_of(reward_errors[k]) for k in ks}
+    if obs_error:
+        report.update({f"obs_k{k}": _mean_of(obs_errors[k]) for k in ks})
+    return report
+
+
+def _mean_of(chunks: list[np.ndarray]) -> float:
+    return float(np.mean(np.concatenate(chunks))) if chunks else 0.0
+
+
+def _batched_fidelity_rollout(world_model, transitions, ks, reward_errors, obs_errors) -> None:
+    n = len(transitions)
+    actions = np.fromiter((int(t[1]) for t in transitions), dtype=np.int64, count=n)
+    rewards = np.fromiter((float(t[2]) for t in transitions), dtype=np.float64, count=n)
+    observations = [_obs_to_array(t[0]) for t in transitions]
+    observations.append(_obs_to_array(transitions[-1][4]))
+    observations = np.stack(observations).reshape(n + 1, -1)
+
+    state = world_model.observe_batch(world_model.init_state(batch_size=n), observations[:n])
+    for offset in range(min(max(ks), n)):
+        # Row ``i`` is the rollout started at index ``i``; starts that would run
+        # past the end of the episode are dropped from the batch.
+        active = n - offset
+        state = _batch_prefix(state, active)
+        state, pred_obs, pred_rewards, _dones, _aux = world_model.predict_batch(
+            state, actions[offset:n]
+        )
+        k = offset + 1
+        if k not in reward_errors:
             continue
-        for start in range(n):
-            # Seed belief from the real observation at the start index.
-            state = world_model.init_state(batch_size=1)
-            obs0 = transitions[start][0]
-            state = world_model.observe(state, _obs_to_array(obs0))
-
-            pred_state = state
-            for offset in range(min(max_k, n - start)):
-                action = int(transitions[start + offset][1])
-                pred_state, _pred_obs, pred_reward, _pred_done, _aux = world_model.predict(
-                    pred_state, action
-                )
-                k = offset + 1
-                if k in errors:
-                    actual_reward = float(transitions[start + offset][2])
-                    errors[k].append(abs(float(pred_reward) - actual_reward))
-
-    return {f"k{k}": float(np.mean(v)) if v else 0.0 for k, v in errors.items()}
+        reward_errors[k].append(np.abs(_host_array(pred_rewards) - rewards[offset:]))
+        if obs_errors is not None:
+            actual = observations[k : k + active]
+            pred = _host_array(pred_obs).reshape(active, -1)
+            width = min(pred.shape[1], actual.shape[1])
+            obs_errors[k].append(np.mean((pred[:, :width] - actual[:, :width]) ** 2, axis=1))
+
+
+def _scalar_fidelity_rollout(world_model, transitions, ks, reward_errors, obs_errors) -> None:
+    n = len(transitions)
+    max_k = max(ks)
+    for start in range(n):
+        # Seed belief from the real observation at the start index.
+        state = world_model.init_state(batch_size=1)
+        state = world_model.observe(state, _obs_to_array(transitions[start][0]))
+
+        pred_state = state
+        for offset in range(min(max_k, n - start)):
+            action = int(transitions[start + offset][1])
+            pred_state, pred_obs, pred_reward, _pred_done, _aux = world_model.predict(
+                pred_state, action
+            )
+            k = offset + 1
+            if k not in reward_errors:
+                continue
+            actual_reward = float(transitions[start + offset][2])
+            reward_errors[k].append(np.array([abs(float(pred_reward) - actual_reward)]))
+            if obs_errors is not None:
+                pred = np.asarray(pred_obs, dtype=np.float64).reshape(-1)
+                actual = _obs_to_array(transitions[start + offset][4]).reshape(-1)
+                width = min(pred.size, actual.size)
+                obs_errors[k].append(np.array([np.mean((pred[:width] - actual[:width]) ** 2)]))
+
+
+def _host_array(values) -> np.ndarray:
+    """``float64`` NumPy copy of a batch output (NumPy array or device tensor)."""
+    if hasattr(values, "cpu"):
+        values = values.cpu()
+    return np.asarray(values, dtype=np.float64)
+
+
+def _batch_prefix(state, size: int):
+    """First ``size`` rows of every array in a (nested dict/list) batched model state."""
+    if isinstance(state, Mapping):
+        return {key: _batch_prefix(value, size) for key, value in state.items()}
+    if isinstance(state, (list, tuple)):
+        return type(state)(_batch_prefix(value, size) for value in state)
+    return state[:size]
 
 
 def _obs_to_array(obs):
-    if isinstance(obs, dict):
+    if isinstance(obs, Mapping):
         if "symbolic" in obs:
             return np.asarray(obs["symbolic"])
         if "rgb" in obs:
@@ -92,6 +183,44 @@ def _obs_to_array(obs):
     return np.asarray(obs)
 
 
+def select_obs_mode(agent) -> str:
+    """Cheapest env ``obs_mode`` that still serves everything ``agent`` reads.
+
+    Agents declare the observation entries they consume via
+    ``observation_keys``; agents that do not are given ``"both"``. Agents that
+    read nothing get ``"lazy"`` observations, which still render on demand if
+    something downstream does look at them.
+    """
+    keys = getattr(agent, "observation_keys", None)
+    if keys is None:
+        return "both"
+    keys = set(keys)
+    if not keys:
+        return "lazy"
+    if keys == {"symbolic"}:
+        return "symbolic"
+    if keys == {"rgb"}:
+        return "rgb"
+    return "both"
+
+
+@dataclass(frozen=True)
+class _EpisodeSpec:
+    """Per-run settings shared by every episode (shipped to pool workers)."""
+
+    env_id: str
+    seeds: list[int]
+    env_kwargs: dict
+    continual_schedule: ContinualSchedule | None
+    goal_event: str | None
+    collect_transitions: bool = True
+    spill_dir: Path | None = None
+    agent_name: str = ""
+    checkpoint_dir: Path | None = None
+    episode_cache_dir: Path | None = None
+    agent_config: str = ""
+
+
 def evaluate_episodes(
     env_id: str,
     agent,
@@ -99,12 +228,50 @@ def evaluate_episodes(
     env_kwargs: dict,
     max_episodes: int,
     continual_schedule: ContinualSchedule | None = None,
+    *,
+    workers: int = 1,
+    agent_factory: Callable[[str], object] | None = None,
+    agent_name: str = "",
+    trace_sink: Callable[[dict], None] | None = None,
+    spill_dir: str | Path | None = None,
+    collect_transitions: bool = True,
+    checkpoint_dir: str | Path | None = None,
+    episode_cache_dir: str | Path | None = None,
 ):
-    episodes: list[EpisodeStats] = []
-    traces: list[dict] = []
-    episode_transitions: list[list[tuple]] = []
-    phase_scores: list[float] = []
-
+    """Run ``max(max_episodes, len(seeds))`` episodes and collect stats, traces and transitions.
+
+    With ``workers > 1`` (and an ``agent_factory``) the episode grid is split
+    into contiguous shards: all but the last run in a process pool, each on a
+    fresh ``agent_factory(agent_name)``, and the last runs here on ``agent`` so
+    it ends in the same state as after a serial run. Every agent is reset with
+    the episode seed before each episode, so results are merged back in episode
+    order and match the serial path. The continual track, agents that set
+    ``learns_across_episodes`` and factories that cannot be pickled always run
+    serially.
+
+    Memory: with ``trace_sink`` each finished episode's trace is handed to it in
+    episode order instead of being kept (``"traces"`` is then empty), and with
+    ``spill_dir`` each episode's transitions are written there and
+    ``"episode_transitions"`` is a lazily loading :class:`SpilledTransitions`.
+    Serially, that bounds the run's footprint by a single episode; pool workers
+    still return a shard's traces at once. ``collect_transitions=False`` skips
+    transitions entirely (each episode gets an empty list).
+
+    With ``checkpoint_dir`` every episode starts by loading the agent's
+    pretrained checkpoint for ``(agent_name, env_id, obs size, seed, code
+    version)`` from that :class:`~worldmodel_gym.eval.checkpoints.CheckpointStore`
+    when one exists (see the ``pretrain`` command), so learned agents run on
+    warm, frozen weights instead of relearning from scratch every seed.
+
+    With ``episode_cache_dir`` each episode is first looked up in that
+    :class:`~worldmodel_gym.eval.episode_cache.EpisodeCache` by agent name,
+    agent config, env id, effective env kwargs, seed and code version; a hit
+    replays the stored stats and trace (including the original wall-clock
+    timings) instead of running. Only episodes that are a pure function of
+    that key use the cache: not for agents that learn across episodes, run
+    from checkpoints, or when transitions are collected. ``"episode_cache"``
+    in the result counts hits and misses.
+    """
     # Cover every seed at least once. If max_episodes exceeds the seed count we
     # wrap around (running each seed multiple times); if it is smaller we still
     # ensure no seed is starved by iterating seeds in order. The number of
@@ -113,152 +280,73 @@ def evaluate_episodes(
     goal_event = GOAL_EVENTS.get(env_id) or GOAL_EVENTS.get(
         make_env(env_id, **env_kwargs).__class__.__name__
     )
+    spec = _EpisodeSpec(
+        env_id=env_id,
+        seeds=list(seeds),
+        env_kwargs=dict(env_kwargs),
+        continual_schedule=continual_schedule,
+        goal_event=goal_event,
+        collect_transitions=collect_transitions,
+        spill_dir=None if spill_dir is None else Path(spill_dir),
+        agent_name=agent_name,
+        checkpoint_dir=None if checkpoint_dir is None else Path(checkpoint_dir),
+    )
+    if episode_cache_dir is not None and _episodes_cacheable(
+        agent, collect_transitions, checkpoint_dir
+    ):
+        spec = replace(
+            spec, episode_cache_dir=Path(episode_cache_dir), agent_config=agent_config_hash(agent)
+        )
+    episode_ids = list(range(n_episodes))
 
-    tracemalloc.start()
-
-    for ep_idx in range(n_episodes):
-        seed = seeds[ep_idx % len(seeds)]
-        kwargs = dict(env_kwargs)
-
-        if continual_schedule is not None:
-            shift_idx = ep_idx // continual_schedule.shift_every_episodes
-            kwargs = apply_shift_kwargs(
-                kwargs,
-                env_id=env_id,
-                shift_idx=shift_idx,
-                shift_strength=continual_schedule.shift_strength,
-            )
-
-        env = make_env(env_id, **kwargs)
-        obs, info = env.reset(seed=seed)
-        info["env_ref"] = env
-        agent.reset(seed=seed)
-
-        done = False
-        total_return = 0.0
-        steps = 0
-        imagined_transitions = 0
-        step_compute_ms = 0.0
-        reached_goal = False
-        agent_failed = False
-        ep_transitions: list[tuple] = []
-
-        while not done:
-            # A misbehaving agent must not crash the whole evaluation run: if
-            # act() or observe() raises, terminate THIS episode cleanly, mark it
-            # failed, and move on. We deliberately do not let the exception
-            # propagate past the per-episode loop.
-            t0 = time.perf_counter()
-            try:
-                action = int(agent.act(obs, info))
-            except Exception:
-                logger.exception(
-                    "agent.act raised on env=%s seed=%s step=%s; marking episode failed",
-                    env_id,
-                    seed,
-                    steps,
-                )
-                agent_failed = True
-                break
-            act_ms = (time.perf_counter() - t0) * 1000.0
-            step_compute_ms += act_ms
-
-            next_obs, reward, terminated, truncated, info = env.step(action)
-            info["env_ref"] = env
-            done = bool(terminated or truncated)
-
-            step_events = info.get("events", [])
-            if goal_event is not None and goal_event in step_events:
-                reached_goal = True
-
-            transition = {
-                "obs": obs,
-                "action": action,
-                "reward": reward,
-                "done": done,
-                "next_obs": next_obs,
-                "events": step_events,
-            }
-            try:
-                agent.observe(transition)
-            except Exception:
-                logger.exception(
-                    "agent.observe raised on env=%s seed=%s step=%s; marking episode failed",
-                    env_id,
-                    seed,
-                    steps,
-                )
-                agent_failed = True
-                break
-            planner_trace = {}
-            if hasattr(agent, "get_trace"):
-                planner_trace = agent.get_trace() or {}
-            if getattr(env, "trace_steps", None):
-                env.trace_steps[-1].planner = planner_trace
-
-            obs = next_obs
-            total_return += reward
-            steps += 1
-            imagined_transitions += int(getattr(agent, "last_imagined_transitions", 0))
-            ep_transitions.append((transition["obs"], action, reward, done, transition["next_obs"]))
+    workers = min(int(workers), n_episodes)
+    if workers > 1 and not _can_shard(agent, agent_factory, continual_schedule):
+        workers = 1
 
-        wall_clock_ms = step_compute_ms
-        if agent_failed:
-            # The agent raised mid-episode. Persist whatever partial trace the
-            # env produced so the run is still introspectable, and force a
-            # failure regardless of any goal event seen so far.
-            if getattr(env, "trace_steps", None):
-                trace = EpisodeTrace(
-                    env_id=env.__class__.__name__,
-                    episode_id=env.episode_id,
-                    seed=env.current_seed,
-                    steps=env.trace_steps,
-                ).model_dump(mode="json")
-            else:
-                trace = info.get("episode_trace", {"steps": []})
-            trace = dict(trace)
-            trace["agent_failed"] = True
-            traces.append(trace)
-            achievements = _extract_achievements(trace)
-            success = False
+    episodes: list[EpisodeStats] = []
+    traces: list[dict] = []
+    episode_transitions: list = []
+    cache_counts = {"hits": 0, "misses": 0}
+
+    def _collect(result: tuple) -> None:
+        stats, trace, transitions, cache_status = result
+        if cache_status is not None:
+            cache_counts[cache_status] += 1
+        episodes.append(stats)
+        if trace_sink is not None:
+            trace_sink(trace)
         else:
-            if done and getattr(env, "trace_steps", None):
-                trace = EpisodeTrace(
-                    env_id=env.__class__.__name__,
-                    episode_id=env.episode_id,
-                    seed=env.current_seed,
-                    steps=env.trace_steps,
-                ).model_dump(mode="json")
-            else:
-                trace = info.get("episode_trace", {"steps": []})
             traces.append(trace)
-            achievements = _extract_achievements(trace)
-
-            # Honest success: the episode is a success only if the environment
-            # signalled its terminal GOAL event. Fall back to scanning the
-            # trace's events when we did not observe it live (e.g. trace-only
-            # envs).
-            if goal_event is not None and not reached_goal:
-                reached_goal = _trace_has_event(trace, goal_event)
-            success = bool(reached_goal)
-
-        episode_transitions.append(ep_transitions)
-        episodes.append(
-            EpisodeStats(
-                success=success,
-                total_return=total_return,
-                steps=steps,
-                achievements=achievements,
-                wall_clock_ms=wall_clock_ms,
-                imagined_transitions=imagined_transitions,
-                seed=int(seed),
-            )
-        )
-        phase_scores.append(total_return)
+        episode_transitions.append(transitions)
 
-    peak_mb = tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+    tracemalloc.start()
+    peak_mb = 0.0
+    if workers > 1:
+        shards = [part.tolist() for part in np.array_split(np.asarray(episode_ids), workers)]
+        with ProcessPoolExecutor(max_workers=workers - 1) as pool:
+            futures = [
+                pool.submit(_run_shard, spec, agent_factory, agent_name, shard)
+                for shard in shards[:-1]
+            ]
+            local = [_run_episode(spec, agent, ep_idx) for ep_idx in shards[-1]]
+            for future in futures:
+                shard_results, shard_peak_mb = future.result()
+                for result in shard_results:
+                    _collect(result)
+                peak_mb = max(peak_mb, shard_peak_mb)
+        for result in local:
+            _collect(result)
+    else:
+        for ep_idx in episode_ids:
+            _collect(_run_episode(spec, agent, ep_idx))
+
+    peak_mb = max(peak_mb, tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0))
     tracemalloc.stop()
 
+    if spec.spill_dir is not None and collect_transitions:
+        episode_transitions = SpilledTransitions(episode_transitions)
+    phase_scores = [stats.total_return for stats in episodes]
+
     aggregate = aggregate_episode_stats(episodes)
     aggregate.planning_cost["peak_memory_mb"] = float(peak_mb)
 
@@ -275,9 +363,226 @@ def evaluate_episodes(
         "traces": traces,
         "episode_transitions": episode_transitions,
         "continual": continual,
+        "episode_cache": cache_counts,
     }
 
 
+def _episodes_cacheable(agent, collect_transitions: bool, checkpoint_dir) -> bool:
+    if collect_transitions or getattr(agent, "learns_across_episodes", False):
+        return False
+    return checkpoint_dir is None or not hasattr(agent, "load_checkpoint_state")
+
+
+def _can_shard(agent, agent_factory, continual_schedule: ContinualSchedule | None) -> bool:
+    if continual_schedule is not None or agent_factory is None:
+        return False
+    if getattr(agent, "learns_across_episodes", False):
+        return False
+    try:
+        pickle.dumps(agent_factory)
+    except Exception:
+        logger.warning("agent_factory cannot be pickled; evaluating episodes serially")
+        return False
+    return True
+
+
+def _run_shard(
+    spec: _EpisodeSpec,
+    agent_factory: Callable[[str], object],
+    agent_name: str,
+    episode_ids: list[int],
+) -> tuple[list[tuple], float]:
+    """Worker entry point: run ``episode_ids`` on a fresh agent, report peak memory."""
+    tracemalloc.start()
+    agent = agent_factory(agent_name)
+    results = [_run_episode(spec, agent, ep_idx) for ep_idx in episode_ids]
+    peak_mb = tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+    tracemalloc.stop()
+    return results, peak_mb
+
+
+def _run_episode(
+    spec: _EpisodeSpec, agent, ep_idx: int
+) -> tuple[EpisodeStats, dict, object, str | None]:
+    """One episode as ``(stats, trace, transitions, cache)``.
+
+    ``cache`` is ``"hits"`` or ``"misses"`` for cache lookups, ``None`` when uncached.
+    """
+    seed = spec.seeds[ep_idx % len(spec.seeds)]
+    kwargs = dict(spec.env_kwargs)
+    continual_schedule = spec.continual_schedule
+    if continual_schedule is not None:
+        shift_idx = ep_idx // continual_schedule.shift_every_episodes
+        kwargs = apply_shift_kwargs(
+            kwargs,
+            env_id=spec.env_id,
+            shift_idx=shift_idx,
+            shift_strength=continual_schedule.shift_strength,
+        )
+
+    if spec.episode_cache_dir is None:
+        return (*_play_episode(spec, agent, ep_idx, seed, kwargs), None)
+    cache = EpisodeCache(spec.episode_cache_dir)
+    key = EpisodeKey.for_episode(spec.agent_name, spec.agent_config, spec.env_id, kwargs, seed)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached[0], cached[1], [], "hits"
+    stats, trace, transitions = _play_episode(spec, agent, ep_idx, seed, kwargs)
+    # A raised act()/observe() may be transient; only clean episodes are reusable.
+    if not trace.get("agent_failed"):
+        cache.put(key, stats, trace)
+    return stats, trace, transitions, "misses"
+
+
+def _play_episode(
+    spec: _EpisodeSpec, agent, ep_idx: int, seed: int, kwargs: dict
+) -> tuple[EpisodeStats, dict, object]:
+    env_id = spec.env_id
+    goal_event = spec.goal_event
+    env = make_env(env_id, **kwargs)
+    obs, info = env.reset(seed=seed)
+    info["env_ref"] = env
+    agent.reset(seed=seed)
+    if spec.checkpoint_dir is not None:
+        restore_checkpoint(
+            open_store(str(spec.checkpoint_dir)), agent, spec.agent_name, env_id, obs, seed
+        )
+
+    done = False
+    total_return = 0.0
+    steps = 0
+    imagined_transitions = 0
+    step_compute_ms = 0.0
+    reached_goal = False
+    agent_failed = False
+    ep_transitions: list[tuple] = []
+
+    while not done:
+        # A misbehaving agent must not crash the whole evaluation run: if
+        # act() or observe() raises, terminate THIS episode cleanly, mark it
+        # failed, and move on. We deliberately do not let the exception
+        # propagate past the per-episode loop.
+        t0 = time.perf_counter()
+        try:
+            action = int(agent.act(obs, info))
+        except Exception:
+            logger.exception(
+                "agent.act raised on env=%s seed=%s step=%s; marking episode failed",
+                env_id,
+                seed,
+                steps,
+            )
+            agent_failed = True
+            break
+        act_ms = (time.perf_counter() - t0) * 1000.0
+        step_compute_ms += act_ms
+
+        next_obs, reward, terminated, truncated, info = env.step(action)
+        info["env_ref"] = env
+        done = bool(terminated or truncated)
+
+        step_events = info.get("events", [])
+        if goal_event is not None and goal_event in step_events:
+            reached_goal = True
+
+        transition = {
+            "obs": obs,
+            "action": action,
+            "reward": reward,
+            "done": done,
+            "next_obs": next_obs,
+            "events": step_events,
+        }
+        try:
+            agent.observe(transition)
+        except Exception:
+            logger.exception(
+                "agent.observe raised on env=%s seed=%s step=%s; marking episode failed",
+                env_id,
+                seed,
+                steps,
+            )
+            agent_failed = True
+            break
+        planner_trace = {}
+        if hasattr(agent, "get_trace"):
+            planner_trace = agent.get_trace() or {}
+        recorder = getattr(env, "trace", None)
+        if recorder is not None:
+            recorder.set_planner(planner_trace)
+
+        obs = next_obs
+        total_return += reward
+        steps += 1
+        imagined_transitions += int(getattr(agent, "last_imagined_transitions", 0))
+        if spec.collect_transitions:
+            ep_transitions.append((transition["obs"], action, reward, done, transition["next_obs"]))
+
+    wall_clock_ms = step_compute_ms
+    if agent_failed:
+        # The agent raised mid-episode. Persist whatever partial trace the
+        # env produced so the run is still introspectable, and force a
+        # failure regardless of any goal event seen so far.
+        recorder = getattr(env, "trace", None)
+        if recorder is not None and len(recorder):
+            trace = recorder.to_dict()
+        else:
+            trace = info.get("episode_trace", {"steps": []})
+        trace = dict(trace)
+        trace["agent_failed"] = True
+        achievements = _extract_achievements(trace)
+        success = False
+    else:
+        # The recorder memoizes its export, so this is the same dict the env
+        # returned as info["episode_trace"] with the final planner attached.
+        recorder = getattr(env, "trace", None)
+        if done and recorder is not None and len(recorder):
+            trace = recorder.to_dict()
+        else:
+            trace = info.get("episode_trace", {"steps": []})
+        achievements = _extract_achievements(trace)
+
+        # Honest success: the episode is a success only if the environment
+        # signalled its terminal GOAL event. Fall back to scanning the
+        # trace's events when we did not observe it live (e.g. trace-only
+        # envs).
+        if goal_event is not None and not reached_goal:
+            reached_goal = _trace_has_event(trace, goal_event)
+        success = bool(reached_goal)
+
+    stats = EpisodeStats(
+        success=success,
+        total_return=total_return,
+        steps=steps,
+        achievements=achievements,
+        wall_clock_ms=wall_clock_ms,
+        imagined_transitions=imagined_transitions,
+        seed=int(seed),
+    )
+    if spec.spill_dir is not None and spec.collect_transitions:
+        return stats, trace, _spill_transitions(spec.spill_dir, ep_idx, ep_transitions)
+    return stats, trace, ep_transitions
+
+
+def _spill_transitions(spill_dir: Path, ep_idx: int, transitions: list[tuple]) -> Path:
+    path = spill_dir / f"episode_{ep_idx:06d}.npz"
+    if not transitions:
+        empty = np.zeros(0)
+        return spill_episode(path, np.zeros((1, 0)), empty, empty, empty.astype(bool))
+    # The harness feeds each next_obs back as the following obs, so a single
+    # observation sequence of length T + 1 covers every transition.
+    observations = np.stack(
+        [_obs_to_array(t[0]) for t in transitions] + [_obs_to_array(transitions[-1][4])]
+    )
+    return spill_episode(
+        path,
+        observations,
+        np.asarray([t[1] for t in transitions], dtype=np.int64),
+        np.asarray([t[2] for t in transitions], dtype=np.float64),
+        np.asarray([t[3] for t in transitions], dtype=bool),
+    )
+
+
 def _trace_has_event(trace: dict, event: str) -> bool:
     for step in trace.get("steps", []):
         if event in step.get("events", []):
@@ -294,6 +599,10 @@ def _extract_achievements(trace: dict) -> dict[str, int]:
     return out
 
 
+def _discard_trace(trace: dict) -> None:
+    del trace
+
+
 def build_metrics(
     run_id: str,
     env_id: str,
@@ -303,6 +612,7 @@ def build_metrics(
     test_stats,
     continual_stats: dict[str, float],
     model_fidelity: dict[str, float],
+    episode_cache: dict[str, int] | None = None,
 ) -> RunMetrics:
     generalization_gap = train_stats.success_rate - test_stats.success_rate
     return RunMetrics(
@@ -324,6 +634,7 @@ def build_metrics(
         mean_return_ci=test_stats.mean_return_ci,
         per_seed_return={str(k): v for k, v in test_stats.per_seed_return.items()},
         per_seed_success_rate={str(k): v for k, v in test_stats.per_seed_success_rate.items()},
+        episode_cache=episode_cache or {},
     )
 
 
@@ -337,12 +648,27 @@ def evaluate_and_write(
     budget: dict,
     out_dir: str = "runs",
     run_id: str | None = None,
+    workers: int = 1,
+    trace_compression: str | None = None,
+    checkpoint_dir: str | Path | None = None,
+    episode_cache_dir: str | Path | None = None,
 ) -> tuple[str, Path]:
+    """Evaluate on the train and requested tracks and write the run artifacts.
+
+    Test-track traces are streamed to ``trace.jsonl`` (``.gz``/``.zst`` with
+    ``trace_compression="gzip"``/``"zstd"``) as episodes finish, and the
+    transitions needed for the model-fidelity pass are spilled to a temporary
+    directory under the run dir, so memory does not grow with ``max_episodes``.
+    ``checkpoint_dir`` warm-starts learned agents from pretrained checkpoints
+    (see :func:`evaluate_episodes`), and ``episode_cache_dir`` replays
+    unchanged deterministic episodes from an episode cache, recording its
+    hits and misses under ``episode_cache`` in ``metrics.json``.
+    """
     run_id = run_id or uuid.uuid4().hex[:12]
     run_dir = Path(out_dir) / run_id
     run_dir.mkdir(parents=True, exist_ok=True)
 
-    env_kwargs = {"obs_mode": "both", "max_steps": int(budget.get("max_steps", 300))}
+    env_kwargs = {"max_steps": int(budget.get("max_steps", 300))}
 
     if seeds:
         eval_seeds = seeds
@@ -356,26 +682,47 @@ def evaluate_and_write(
     train_agent = agent_factory(agent_name)
     test_agent = agent_factory(agent_name)
 
+    # Only the test track's traces are written and only the test agent's world
+    # model is scored, so the train track keeps neither.
     train_eval = evaluate_episodes(
         env_id=env_id,
         agent=train_agent,
         seeds=TRAIN_SEEDS.get(env_id, [11, 13]),
-        env_kwargs=env_kwargs,
+        env_kwargs={**env_kwargs, "obs_mode": select_obs_mode(train_agent)},
         max_episodes=max_episodes,
         continual_schedule=None,
+        workers=workers,
+        agent_factory=agent_factory,
+        agent_name=agent_name,
+        trace_sink=_discard_trace,
+        collect_transitions=False,
+        checkpoint_dir=checkpoint_dir,
+        episode_cache_dir=episode_cache_dir,
     )
 
     continual_schedule = ContinualSchedule() if track == "continual" else None
-    test_eval = evaluate_episodes(
-        env_id=env_id,
-        agent=test_agent,
-        seeds=eval_seeds,
-        env_kwargs=env_kwargs,
-        max_episodes=max_episodes,
-        continual_schedule=continual_schedule,
-    )
-
-    model_fidelity = _reward_prediction_error(test_agent, test_eval["episode_transitions"])
+    trace_path = run_dir / trace_filename(trace_compression)
+    with (
+        TraceWriter(trace_path) as trace_writer,
+        tempfile.TemporaryDirectory(prefix=".transitions-", dir=run_dir) as spill_dir,
+    ):
+        test_eval = evaluate_episodes(
+            env_id=env_id,
+            agent=test_agent,
+            seeds=eval_seeds,
+            env_kwargs={**env_kwargs, "obs_mode": select_obs_mode(test_agent)},
+            max_episodes=max_episodes,
+            continual_schedule=continual_schedule,
+            workers=workers,
+            agent_factory=agent_factory,
+            agent_name=agent_name,
+            trace_sink=trace_writer.write,
+            spill_dir=spill_dir,
+            collect_transitions=getattr(test_agent, "world_model", None) is not None,
+            checkpoint_dir=checkpoint_dir,
+            episode_cache_dir=episode_cache_dir,
+        )
+        model_fidelity = _reward_prediction_error(test_agent, test_eval["episode_transitions"])
 
     metrics = build_metrics(
         run_id=run_id,
@@ -386,12 +733,17 @@ def evaluate_and_write(
         test_stats=test_eval["aggregate"],
         continual_stats=test_eval["continual"],
         model_fidelity=model_fidelity,
+        episode_cache=(
+            None
+            if episode_cache_dir is None
+            else {
+                key: train_eval["episode_cache"][key] + test_eval["episode_cache"][key]
+                for key in ("hits", "misses")
+            }
+        ),
     )
 
     (run_dir / "metrics.json").write_text(metrics.model_dump_json(indent=2), encoding="utf-8")
-    with (run_dir / "trace.jsonl").open("w", encoding="utf-8") as f:
-        for trace in test_eval["traces"]:
-            f.write(json.dumps(trace) + "\n")
 
     config = {
         "run_id": run_id,
@@ -401,6 +753,8 @@ def evaluate_and_write(
         "seeds": eval_seeds,
         "budget": budget,
     }
+    if checkpoint_dir is not None:
+        config["checkpoints"] = {"dir": str(checkpoint_dir), "code_version": code_version()}
     (run_dir / "config.yaml").write_text(yaml.safe_dump(config, sort_keys=False), encoding="utf-8")
 
     return run_id, run_dir
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import argparse
+import sys
 
 from worldmodel_gym.eval.harness import evaluate_and_write
 
 
-def _parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Run WorldModel Gym evaluations")
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run WorldModel Gym evaluations ('pretrain ...' builds agent checkpoints)"
+    )
     parser.add_argument("--agent", required=True, type=str)
     parser.add_argument("--env", required=True, type=str)
     parser.add_argument("--track", default="test", choices=["train", "test", "continual"])
@@ -16,7 +19,43 @@ def _parse_args() -> argparse.Namespace:
     # bootstrap CIs. The harness additionally guarantees every track seed is
     # covered at least once (it runs max(max_episodes, n_seeds) episodes).
     parser.add_argument("--max-episodes", default=50, type=int)
-    return parser.parse_args()
+    parser.add_argument(
+        "--workers", default=1, type=int, help="processes to spread independent episodes over"
+    )
+    parser.add_argument("--trace-compression", default=None, choices=["gzip", "zstd"])
+    parser.add_argument(
+        "--checkpoints",
+        default=None,
+        type=str,
+        help="checkpoint directory from 'pretrain'; learned agents start from warm weights",
+    )
+    parser.add_argument(
+        "--episode-cache",
+        default=None,
+        type=str,
+        help="directory of cached deterministic episodes, reused across runs",
+    )
+    return parser.parse_args(argv)
+
+
+def _parse_pretrain_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="pretrain", description="Pretrain learned agents and store their checkpoints"
+    )
+    parser.add_argument("--agent", required=True, type=str, help="comma-separated agent names")
+    parser.add_argument("--env", required=True, type=str, help="comma-separated env ids")
+    parser.add_argument(
+        "--seeds",
+        default="",
+        type=str,
+        help="agent seeds to pretrain (default: every train and test seed of the env)",
+    )
+    parser.add_argument("--budget", default="", type=str, help="comma-separated key=value pairs")
+    parser.add_argument(
+        "--episodes", default=8, type=int, help="train-layout episodes of online learning per seed"
+    )
+    parser.add_argument("--out", default="checkpoints", type=str, help="checkpoint directory")
+    return parser.parse_args(argv)
 
 
 def _parse_budget(raw: str) -> dict:
@@ -31,15 +70,56 @@ def _parse_budget(raw: str) -> dict:
     return out
 
 
+def _parse_seeds(raw: str) -> list[int]:
+    return [int(s.strip()) for s in raw.split(",") if s.strip()]
+
+
 def _agent_factory(name: str):
     from worldmodel_agents.registry import create_agent
 
     return create_agent(name)
 
 
-def main() -> None:
-    args = _parse_args()
-    seed_list = [int(s.strip()) for s in args.seeds.split(",") if s.strip()] or None
+def pretrain_main(argv: list[str]) -> None:
+    """Write one checkpoint per (agent, env, seed) into ``--out``."""
+    from worldmodel_gym.eval.checkpoints import CheckpointStore, pretrain_checkpoint
+    from worldmodel_gym.eval.harness import select_obs_mode
+    from worldmodel_gym.eval.seeds import TEST_SEEDS, TRAIN_SEEDS
+
+    args = _parse_pretrain_args(argv)
+    budget = _parse_budget(args.budget)
+    store = CheckpointStore(args.out)
+    for agent_name in [a.strip() for a in args.agent.split(",") if a.strip()]:
+        probe = _agent_factory(agent_name)
+        if not hasattr(probe, "checkpoint_state"):
+            print(f"{agent_name}: nothing to pretrain")
+            continue
+        obs_mode = select_obs_mode(probe)
+        for env_id in [e.strip() for e in args.env.split(",") if e.strip()]:
+            seeds = _parse_seeds(args.seeds) or (
+                TRAIN_SEEDS.get(env_id, []) + TEST_SEEDS.get(env_id, [])
+            )
+            for seed in seeds:
+                path = pretrain_checkpoint(
+                    agent_name,
+                    _agent_factory,
+                    env_id,
+                    seed,
+                    store,
+                    env_kwargs={"max_steps": int(budget["max_steps"]), "obs_mode": obs_mode},
+                    episodes=args.episodes,
+                )
+                print(f"checkpoint={path}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "pretrain":
+        pretrain_main(argv[1:])
+        return
+
+    args = _parse_args(argv)
+    seed_list = _parse_seeds(args.seeds) or None
     budget = _parse_budget(args.budget)
 
     run_id, run_dir = evaluate_and_write(
@@ -50,6 +130,10 @@ def main() -> None:
         seeds=seed_list,
         max_episodes=args.max_episodes,
         budget=budget,
+        workers=args.workers,
+        trace_compression=args.trace_compression,
+        checkpoint_dir=args.checkpoints,
+        episode_cache_dir=args.episode_cache,
     )
     print(f"run_id={run_id}")
     print(f"artifacts={run_dir}")
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+
+def spill_episode(
+    path: str | Path,
+    observations: np.ndarray,
+    actions: np.ndarray,
+    rewards: np.ndarray,
+    dones: np.ndarray,
+) -> Path:
+    """Write one episode's transitions to ``path`` (an uncompressed ``.npz``).
+
+    ``observations`` has one more row than there are transitions: row ``i`` is
+    the observation before transition ``i`` and row ``i + 1`` the one after it,
+    so consecutive ``obs``/``next_obs`` pairs are stored once.
+    """
+    path = Path(path)
+    np.savez(path, observations=observations, actions=actions, rewards=rewards, dones=dones)
+    return path
+
+
+def load_episode(path: str | Path) -> list[tuple]:
+    """Read back ``(obs, action, reward, done, next_obs)`` tuples written by :func:`spill_episode`."""
+    with np.load(path) as data:
+        obs = data["observations"]
+        actions = data["actions"].tolist()
+        rewards = data["rewards"].tolist()
+        dones = data["dones"].tolist()
+    return [(obs[i], actions[i], rewards[i], dones[i], obs[i + 1]) for i in range(len(actions))]
+
+
+class SpilledTransitions(Sequence):
+    """Per-episode transition lists kept on disk and loaded one episode at a time.
+
+    Stands in for the in-memory ``list[list[tuple]]`` returned by
+    ``evaluate_episodes``; iterating it never holds more than one episode.
+    """
+
+    def __init__(self, paths: Sequence[str | Path]):
+        self._paths = [Path(p) for p in paths]
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SpilledTransitions(self._paths[index])
+        return load_episode(self._paths[index])
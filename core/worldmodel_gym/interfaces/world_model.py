@@ -16,5 +16,14 @@ class WorldModel(Protocol):
         Returns: (next_state, pred_obs, pred_reward, pred_done, aux)
         """
 
+    def predict_batch(self, state: Any, actions):
+        """Predict one step for a batch of ``B`` states, one action per row.
+
+        Returns: (next_state, pred_obs[B, ...], pred_rewards[B], pred_dones[B], aux)
+        """
+
     def imagine_rollout(self, state: Any, action_seq):
         """Predict a trajectory and uncertainty, if available."""
+
+    def imagine_rollout_batch(self, state: Any, action_seqs):
+        """Predict ``B`` trajectories ``[B, T]`` together, masking steps after a done."""
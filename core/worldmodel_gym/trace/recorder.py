@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import numpy as np
+from pydantic_core import to_jsonable_python
+
+from worldmodel_gym.trace.schema import TraceStep
+
+
+class TraceRecorder:
+    """Columnar per-episode step trace.
+
+    Steps are appended into preallocated NumPy columns (``t``, ``action``,
+    ``reward``, ``terminated``, ``truncated``, ``agent_pos``) while event names
+    are interned into a small string table and stored as integer ids. The env
+    state of each step is kept as its immutable snapshot and only turned into
+    the ``env_state`` dict by ``state_fn`` when the trace is exported.
+
+    :meth:`to_dict` converts everything to the :class:`EpisodeTrace` JSON layout
+    in one pass and memoizes the result until the next :meth:`append`.
+    """
+
+    def __init__(
+        self,
+        env_id: str,
+        episode_id: int,
+        seed: int,
+        state_fn: Callable[[Any], dict[str, Any]],
+        capacity: int = 64,
+    ):
+        self.env_id = env_id
+        self.episode_id = episode_id
+        self.seed = seed
+        self._state_fn = state_fn
+
+        capacity = max(1, int(capacity))
+        self._t = np.zeros(capacity, dtype=np.int64)
+        self._action = np.zeros(capacity, dtype=np.int64)
+        self._reward = np.zeros(capacity, dtype=np.float64)
+        self._terminated = np.zeros(capacity, dtype=bool)
+        self._truncated = np.zeros(capacity, dtype=bool)
+        self._agent_pos = np.zeros((capacity, 2), dtype=np.int64)
+        # Step i owns event ids ``_event_ids[_event_offsets[i]:_event_offsets[i + 1]]``.
+        self._event_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._event_ids: list[int] = []
+        self._event_table: list[str] = []
+        self._event_lookup: dict[str, int] = {}
+        self._states: list[Any] = []
+        self._planner: dict[int, dict[str, Any]] = {}
+        self._n = 0
+        self._export: dict[str, Any] | None = None
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def event_table(self) -> list[str]:
+        """Interned event names; ``columns()["event_ids"]`` indexes into this."""
+        return list(self._event_table)
+
+    def append(
+        self,
+        t: int,
+        action: int,
+        reward: float,
+        terminated: bool,
+        truncated: bool,
+        events: list[str],
+        state,
+    ) -> None:
+        if self._n == len(self._t):
+            self._grow()
+        i = self._n
+        self._t[i] = t
+        self._action[i] = action
+        self._reward[i] = reward
+        self._terminated[i] = terminated
+        self._truncated[i] = truncated
+        self._agent_pos[i] = state.agent_pos
+        for event in events:
+            event_id = self._event_lookup.get(event)
+            if event_id is None:
+                event_id = len(self._event_table)
+                self._event_lookup[event] = event_id
+                self._event_table.append(event)
+            self._event_ids.append(event_id)
+        self._event_offsets[i + 1] = len(self._event_ids)
+        self._states.append(state)
+        self._n += 1
+        self._export = None
+
+    def set_planner(self, planner: dict[str, Any]) -> None:
+        """Attach the agent's planner trace to the most recent step.
+
+        A previously exported dict (e.g. ``info["episode_trace"]`` from the final
+        step) is patched in place, so attaching the last planner trace does not
+        force a second export.
+        """
+        if self._n == 0:
+            return
+        i = self._n - 1
+        if planner:
+            self._planner[i] = planner
+        else:
+            self._planner.pop(i, None)
+        if self._export is not None:
+            self._export["steps"][i]["planner"] = to_jsonable_python(planner or {})
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Views of the filled part of each column (valid until the next append)."""
+        n = self._n
+        return {
+            "t": self._t[:n],
+            "action": self._action[:n],
+            "reward": self._reward[:n],
+            "terminated": self._terminated[:n],
+            "truncated": self._truncated[:n],
+            "agent_pos": self._agent_pos[:n],
+            "event_offsets": self._event_offsets[: n + 1],
+            "event_ids": np.asarray(self._event_ids, dtype=np.int64),
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """The trace as ``EpisodeTrace(...).model_dump(mode="json")`` would produce it."""
+        if self._export is not None:
+            return self._export
+        n = self._n
+        offsets = self._event_offsets[: n + 1].tolist()
+        table = self._event_table
+        ids = self._event_ids
+        steps = [
+            {
+                "t": t,
+                "action": action,
+                "reward": reward,
+                "terminated": terminated,
+                "truncated": truncated,
+                "events": [table[e] for e in ids[offsets[i] : offsets[i + 1]]],
+                "planner": to_jsonable_python(self._planner.get(i, {})),
+                "env_state": self._state_fn(self._states[i]),
+            }
+            for i, (t, action, reward, terminated, truncated) in enumerate(
+                zip(
+                    self._t[:n].tolist(),
+                    self._action[:n].tolist(),
+                    self._reward[:n].tolist(),
+                    self._terminated[:n].tolist(),
+                    self._truncated[:n].tolist(),
+                )
+            )
+        ]
+        self._export = {
+            "env_id": self.env_id,
+            "episode_id": self.episode_id,
+            "seed": self.seed,
+            "steps": steps,
+        }
+        return self._export
+
+    def steps(self) -> list[TraceStep]:
+        """Validated :class:`TraceStep` models (slow; for schema-level consumers)."""
+        return [TraceStep(**step) for step in self.to_dict()["steps"]]
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._t)
+        for name in ("_t", "_action", "_reward", "_terminated", "_truncated", "_agent_pos"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+        offsets = np.zeros(capacity + 1, dtype=np.int64)
+        offsets[: len(self._event_offsets)] = self._event_offsets
+        self._event_offsets = offsets
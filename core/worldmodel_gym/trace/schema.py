@@ -50,3 +50,5 @@ class RunMetrics(BaseModel):
     per_seed_return: dict[str, float] = Field(default_factory=dict)
     # Success rate aggregated per seed, keyed by seed (as string).
     per_seed_success_rate: dict[str, float] = Field(default_factory=dict)
+    # Episode-cache lookups ({"hits", "misses"}) over both tracks; empty when uncached.
+    episode_cache: dict[str, int] = Field(default_factory=dict)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import IO, Any
+
+TRACE_SUFFIXES: dict[str | None, str] = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def trace_filename(compression: str | None = None, stem: str = "trace.jsonl") -> str:
+    """File name for a trace written with ``compression`` (``None``, ``"gzip"``, ``"zstd"``)."""
+    if compression not in TRACE_SUFFIXES:
+        msg = f"Unsupported trace compression={compression!r}"
+        raise ValueError(msg)
+    return stem + TRACE_SUFFIXES[compression]
+
+
+def open_trace(path: str | Path, mode: str = "rt") -> IO[str]:
+    """Open a (possibly compressed) JSON-lines trace for text reading or writing."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode, encoding="utf-8")
+    if path.suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError as exc:
+            msg = "zstd trace compression requires the optional 'zstandard' package"
+            raise ImportError(msg) from exc
+        binary = zstandard.open(path, mode.replace("t", "") + "b")
+        return io.TextIOWrapper(binary, encoding="utf-8")
+    return path.open(mode.replace("t", ""), encoding="utf-8")
+
+
+class TraceWriter:
+    """Append episode trace dicts to a JSON-lines file as each episode finishes.
+
+    The compression is picked from the file suffix (see :func:`trace_filename`),
+    and nothing but the current line is held in memory. Use as a context manager
+    or call :meth:`close`.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.n_written = 0
+        self._fh = open_trace(self.path, "wt")
+
+    def write(self, trace: dict[str, Any]) -> None:
+        self._fh.write(json.dumps(trace) + "\n")
+        self.n_written += 1
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self) -> TraceWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
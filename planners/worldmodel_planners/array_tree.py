@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from math import sqrt
+
+import numpy as np
+
+# ``children`` entry for a legal edge whose next state has not been simulated yet.
+UNSIMULATED = -2
+
+
+class ArrayTree:
+    """Search tree stored in preallocated NumPy arrays.
+
+    Node ``i`` is described by ``visits[i]``, ``value_sum[i]``, ``parent[i]``
+    and ``action[i]`` (the action leading to it from its parent); its children
+    are ``children[i, a]`` for each action ``a``, with ``-1`` marking a missing
+    child. Node ``0`` is the root. Storage doubles when it runs out of rows.
+
+    A node is expanded once, and its children are allocated as one contiguous
+    block ``first_child[i] : first_child[i] + n_children[i]`` in action order,
+    so selection works on array slices rather than gathered copies.
+
+    Searches that keep states in the tree use ``states[i]`` (``None`` until
+    the node has been reached), ``reward[i]`` (the reward of the transition
+    into it) and ``terminal[i]``.
+
+    For transposition search the arrays hold a DAG instead: a node may be the
+    child of several parents, edges are created by :meth:`expand_edges` as
+    ``UNSIMULATED`` and linked with :meth:`link`, and rewards, dones and
+    action statistics live on the edges (``edge_*[i, a]``). Statistics kept
+    per edge stay meaningful when the graph has cycles, e.g. an action that
+    leaves the state unchanged.
+    """
+
+    def __init__(self, action_space_n: int, capacity: int = 256):
+        self.action_space_n = action_space_n
+        capacity = max(1, int(capacity))
+        self.visits = np.zeros(capacity, dtype=np.int64)
+        self.value_sum = np.zeros(capacity, dtype=np.float64)
+        self.parent = np.full(capacity, -1, dtype=np.int64)
+        self.action = np.full(capacity, -1, dtype=np.int64)
+        self.children = np.full((capacity, action_space_n), -1, dtype=np.int64)
+        self.first_child = np.zeros(capacity, dtype=np.int64)
+        self.n_children = np.zeros(capacity, dtype=np.int64)
+        self.reward = np.zeros(capacity, dtype=np.float64)
+        self.terminal = np.zeros(capacity, dtype=bool)
+        self.states: list = [None] * capacity
+        self.edge_reward = np.zeros((capacity, action_space_n), dtype=np.float64)
+        self.edge_done = np.zeros((capacity, action_space_n), dtype=bool)
+        self.edge_visits = np.zeros((capacity, action_space_n), dtype=np.int64)
+        self.edge_value_sum = np.zeros((capacity, action_space_n), dtype=np.float64)
+        self.n_nodes = 1
+
+    def __len__(self) -> int:
+        return self.n_nodes
+
+    def expanded(self, node: int) -> bool:
+        return bool(self.n_children[node])
+
+    def child_ids(self, node: int) -> range:
+        first = int(self.first_child[node])
+        return range(first, first + int(self.n_children[node]))
+
+    def child_actions(self, node: int) -> np.ndarray:
+        """Actions with a child under ``node``, in increasing order."""
+        first = self.first_child[node]
+        return self.action[first : first + self.n_children[node]]
+
+    def value(self, node: int) -> float:
+        visits = self.visits[node]
+        return float(self.value_sum[node] / visits) if visits else 0.0
+
+    def expand(self, node: int, actions: Iterable[int]) -> None:
+        """Give the leaf ``node`` one child per distinct action in ``actions``."""
+        if self.n_children[node]:
+            msg = f"ArrayTree node {node} is already expanded"
+            raise ValueError(msg)
+        actions = np.unique(np.fromiter(actions, dtype=np.int64))
+        if actions.size == 0:
+            return
+        while self.n_nodes + actions.size > len(self.visits):
+            self._grow()
+        first = self.n_nodes
+        ids = np.arange(first, first + actions.size)
+        self.children[node, actions] = ids
+        self.first_child[node] = first
+        self.n_children[node] = actions.size
+        self.parent[ids] = node
+        self.action[ids] = actions
+        self.n_nodes += actions.size
+
+    def select(self, node: int, c_uct: float, rng: np.random.Generator) -> tuple[int, int]:
+        """UCT-best ``(action, child)`` under ``node``; unvisited children come first.
+
+        Ties are broken uniformly with ``rng``, over the tied children in
+        action order.
+        """
+        first = int(self.first_child[node])
+        last = first + int(self.n_children[node])
+        visits = self.visits[first:last]
+        if visits[visits.argmin()] == 0:
+            tied = np.flatnonzero(visits == 0)
+        else:
+            explore = c_uct * sqrt(max(1, int(self.visits[node])))
+            scores = self.value_sum[first:last] / visits + explore / (1 + visits)
+            tied = np.flatnonzero(scores == scores[scores.argmax()])
+        pick = first + int(tied[0] if tied.size == 1 else tied[rng.integers(tied.size)])
+        return int(self.action[pick]), pick
+
+    def backup(self, path: list[int], value: float, discount: float) -> None:
+        """Add one visit along ``path`` (root first), discounting ``value`` per level upward."""
+        # Paths are at most ``max_depth`` long, where a scalar walk beats
+        # building index/factor arrays.
+        visits = self.visits
+        value_sum = self.value_sum
+        for node in reversed(path):
+            visits[node] += 1
+            value_sum[node] += value
+            value *= discount
+
+    def expand_edges(self, node: int, actions: Iterable[int]) -> None:
+        """Open an ``UNSIMULATED`` edge from ``node`` for every action in ``actions``."""
+        actions = np.unique(np.fromiter(actions, dtype=np.int64))
+        self.children[node, actions] = UNSIMULATED
+        self.n_children[node] = actions.size
+
+    def add_node(self, parent: int, action: int, state) -> int:
+        """Append a node first reached from ``parent`` by ``action``; returns its id."""
+        if self.n_nodes == len(self.visits):
+            self._grow()
+        node = self.n_nodes
+        self.parent[node] = parent
+        self.action[node] = action
+        self.states[node] = state
+        self.n_nodes += 1
+        return node
+
+    def link(self, node: int, action: int, child: int, reward: float, done: bool) -> None:
+        self.children[node, action] = child
+        self.edge_reward[node, action] = reward
+        self.edge_done[node, action] = done
+
+    def edge_value(self, node: int, action: int) -> float:
+        visits = self.edge_visits[node, action]
+        return float(self.edge_value_sum[node, action] / visits) if visits else 0.0
+
+    def select_edge(self, node: int, c_uct: float, rng: np.random.Generator) -> tuple[int, int]:
+        """UCT-best ``(action, child)`` over the edges of a DAG node; untried edges come first.
+
+        ``child`` is ``UNSIMULATED`` for an edge not simulated yet. Ties are
+        broken as in :meth:`select`.
+        """
+        actions = np.flatnonzero(self.children[node] != -1)
+        visits = self.edge_visits[node, actions]
+        if visits[visits.argmin()] == 0:
+            tied = np.flatnonzero(visits == 0)
+        else:
+            explore = c_uct * sqrt(max(1, int(self.visits[node])))
+            scores = self.edge_value_sum[node, actions] / visits + explore / (1 + visits)
+            tied = np.flatnonzero(scores == scores[scores.argmax()])
+        pick = int(tied[0] if tied.size == 1 else tied[rng.integers(tied.size)])
+        action = int(actions[pick])
+        return action, int(self.children[node, action])
+
+    def backup_edges(
+        self, path: list[int], actions: list[int], value: float, discount: float
+    ) -> None:
+        """:meth:`backup` for a DAG path ``path[i] --actions[i]--> path[i + 1]``.
+
+        Edge ``i`` is credited as :meth:`backup` credits the child it leads
+        to. A path through a cycle repeats nodes and edges; each is credited
+        once, an edge with the value of its shallowest occurrence.
+        """
+        values = []
+        for _action in actions:
+            values.append(value)
+            value *= discount
+        seen = set()
+        for node, action, edge_value in zip(path, actions, reversed(values)):
+            if (node, action) in seen:
+                continue
+            seen.add((node, action))
+            self.edge_visits[node, action] += 1
+            self.edge_value_sum[node, action] += edge_value
+        for node in set(path):
+            self.visits[node] += 1
+
+    def add_virtual_loss(self, path: list[int], loss: float) -> None:
+        """Count an in-flight visit along ``path`` that scores ``-loss`` until reverted."""
+        for node in path:
+            self.visits[node] += 1
+            self.value_sum[node] -= loss
+
+    def revert_virtual_loss(self, path: list[int], loss: float) -> None:
+        for node in path:
+            self.visits[node] -= 1
+            self.value_sum[node] += loss
+
+    def subtree(self, node: int) -> ArrayTree:
+        """Compacted copy of the subtree rooted at ``node``, which becomes node ``0``."""
+        old_ids = [np.array([node], dtype=np.int64)]
+        frontier = old_ids[0]
+        while True:
+            counts = self.n_children[frontier]
+            total = int(counts.sum())
+            if total == 0:
+                break
+            # Concatenate every frontier node's contiguous child block in one go.
+            starts = np.repeat(self.first_child[frontier] - (np.cumsum(counts) - counts), counts)
+            frontier = starts + np.arange(total)
+            old_ids.append(frontier)
+        old = np.concatenate(old_ids)
+        new_of_old = np.full(self.n_nodes, -1, dtype=np.int64)
+        new_of_old[old] = np.arange(old.size)
+
+        tree = ArrayTree(self.action_space_n, capacity=max(old.size, 1 + self.action_space_n))
+        tree.n_nodes = old.size
+        tree.visits[: old.size] = self.visits[old]
+        tree.value_sum[: old.size] = self.value_sum[old]
+        tree.reward[: old.size] = self.reward[old]
+        tree.terminal[: old.size] = self.terminal[old]
+        tree.states[: old.size] = [self.states[i] for i in old.tolist()]
+        tree.action[1 : old.size] = self.action[old[1:]]
+        tree.parent[1 : old.size] = new_of_old[self.parent[old[1:]]]
+        tree.n_children[: old.size] = self.n_children[old]
+        has_children = tree.n_children[: old.size] > 0
+        tree.first_child[: old.size][has_children] = new_of_old[self.first_child[old[has_children]]]
+        children = self.children[old]
+        tree.children[: old.size] = np.where(children >= 0, new_of_old[children], -1)
+        return tree
+
+    def subgraph(self, node: int) -> ArrayTree:
+        """Compacted copy of everything reachable from ``node`` in a DAG, rooted at ``0``."""
+        order = [node]
+        new_of_old = {node: 0}
+        frontier = [node]
+        while frontier:
+            nxt = []
+            for old in frontier:
+                for child in self.children[old][self.children[old] >= 0].tolist():
+                    if child not in new_of_old:
+                        new_of_old[child] = len(order)
+                        order.append(child)
+                        nxt.append(child)
+            frontier = nxt
+        old = np.asarray(order, dtype=np.int64)
+        remap = np.full(self.n_nodes, -1, dtype=np.int64)
+        remap[old] = np.arange(old.size)
+
+        tree = ArrayTree(self.action_space_n, capacity=max(old.size, 1 + self.action_space_n))
+        tree.n_nodes = old.size
+        for name in ("visits", "value_sum", "n_children", "reward", "terminal"):
+            getattr(tree, name)[: old.size] = getattr(self, name)[old]
+        tree.action[1 : old.size] = self.action[old[1:]]
+        parents = self.parent[old[1:]]
+        tree.parent[1 : old.size] = np.where(parents >= 0, remap[parents], -1)
+        tree.states[: old.size] = [self.states[i] for i in order]
+        children = self.children[old]
+        tree.children[: old.size] = np.where(children >= 0, remap[children], children)
+        for name in ("edge_reward", "edge_done", "edge_visits", "edge_value_sum"):
+            getattr(tree, name)[: old.size] = getattr(self, name)[old]
+        return tree
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self.visits)
+        for name, fill in (
+            ("visits", 0),
+            ("value_sum", 0.0),
+            ("parent", -1),
+            ("action", -1),
+            ("first_child", 0),
+            ("n_children", 0),
+            ("reward", 0.0),
+            ("terminal", False),
+        ):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+        children = np.full((capacity, self.action_space_n), -1, dtype=np.int64)
+        children[: len(self.children)] = self.children
+        self.children = children
+        for name in ("edge_reward", "edge_done", "edge_visits", "edge_value_sum"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, self.action_space_n), dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+        self.states.extend([None] * (capacity - len(self.states)))
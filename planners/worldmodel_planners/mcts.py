@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from math import sqrt
-from typing import Any, Callable
+from typing import Any, Callable, Hashable
 
 import numpy as np
 
+from worldmodel_planners.array_tree import UNSIMULATED, ArrayTree
 from worldmodel_planners.base import PlanningResult
 
 
@@ -22,6 +24,10 @@ class MCTSNode:
         return self.value_sum / self.visits if self.visits else 0.0
 
 
+# ``(parent_states, actions) -> (next_states, rewards, dones)`` for a batch of leaves.
+BatchTransitionFn = Callable[[list[Any], np.ndarray], tuple[Sequence[Any], Any, Any]]
+
+
 class MCTSPlanner:
     def __init__(
         self,
@@ -31,20 +37,56 @@ class MCTSPlanner:
         c_uct: float = 1.4,
         discount: float = 0.99,
         seed: int = 0,
+        tree: str = "array",
+        reuse_tree: bool = False,
+        state_key_fn: Callable[[Any], Hashable] | None = None,
+        batch_transition_fn: BatchTransitionFn | None = None,
+        leaf_batch_size: int = 8,
+        virtual_loss: float = 1.0,
+        transpositions: bool = False,
     ):
+        if tree not in ("nodes", "array"):
+            msg = f"Unknown MCTS tree representation {tree!r}; expected 'nodes' or 'array'"
+            raise ValueError(msg)
+        if batch_transition_fn is not None and tree != "array":
+            msg = "Batched MCTS (batch_transition_fn) requires tree='array'"
+            raise ValueError(msg)
+        if transpositions and (state_key_fn is None or tree != "array"):
+            msg = "Transposition search requires a state_key_fn and tree='array'"
+            raise ValueError(msg)
+        if transpositions and batch_transition_fn is not None:
+            msg = "Transposition search does not support batch_transition_fn"
+            raise ValueError(msg)
+        if leaf_batch_size < 1:
+            msg = f"leaf_batch_size must be >= 1, got {leaf_batch_size}"
+            raise ValueError(msg)
         self.action_space_n = action_space_n
         self.num_simulations = num_simulations
         self.max_depth = max_depth
         self.c_uct = c_uct
         self.discount = discount
         self.seed = seed
+        self.tree = tree
+        self.reuse_tree = reuse_tree
+        self.state_key_fn = state_key_fn
+        self.batch_transition_fn = batch_transition_fn
+        self.leaf_batch_size = leaf_batch_size
+        self.virtual_loss = virtual_loss
+        self.transpositions = transpositions
         self.rng = np.random.default_rng(seed)
+        # Subtree under the last chosen action and the key of its state, kept
+        # for the next ``plan`` call when ``reuse_tree`` is on.
+        self._retained: tuple[Any, Hashable | None] | None = None
 
     def reseed(self, seed: int) -> None:
         """Reset the planner RNG so repeated plan() calls are reproducible."""
         self.seed = seed
         self.rng = np.random.default_rng(seed)
 
+    def reset_tree(self) -> None:
+        """Forget the retained subtree, e.g. at an episode boundary."""
+        self._retained = None
+
     def plan(
         self,
         root_state: Any,
@@ -70,6 +112,43 @@ class MCTSPlanner:
         seed:
             Optional per-call seed. When provided, the planner RNG is reset to
             this seed before planning so that repeated calls are reproducible.
+
+        The search tree lives in an :class:`ArrayTree` (``tree="array"``, the
+        default) whose UCT scoring is vectorized over a node's children, or is
+        built from :class:`MCTSNode` objects (``tree="nodes"``). Both produce
+        the same trace schema and, with the default ``legal_actions_fn``, the
+        same search.
+
+        With ``reuse_tree=True`` the subtree under the returned action is kept
+        and promoted to the root of the next call, whose simulations then add
+        to its statistics (``reused_visits`` in the trace). The caller is
+        expected to execute the returned action. If ``state_key_fn`` is set, the
+        subtree is only reused when ``state_key_fn(root_state)`` equals the key
+        of the state the search reached by that action; otherwise (e.g. for a
+        learned model whose root latent is re-observed) it is reused as is.
+
+        When the planner was built with a ``batch_transition_fn``, the search
+        keeps each node's state in the tree and grows it ``leaf_batch_size``
+        leaves at a time: every descent stops at the first node not simulated
+        yet, holding a virtual loss on its path so the next descents spread
+        out, and the whole batch is simulated by one
+        ``batch_transition_fn(parent_states, actions)`` call returning
+        ``(next_states, rewards, dones)``. ``transition_fn`` and
+        ``clone_state_fn`` are not used in that mode, and states are never
+        copied, so ``batch_transition_fn`` must not modify its inputs.
+
+        With ``transpositions=True`` (exact simulators only) states reached by
+        different action sequences are merged through a table keyed by
+        ``state_key_fn``, which must only give one key to states whose
+        transitions (rewards and ``done`` included) are identical. This turns
+        the tree into a DAG in which everything searched below a state is
+        shared by all paths reaching it. Statistics are kept per
+        ``(state, action)`` edge, each node keeps its state, and every edge is
+        simulated at most once per call, so a simulation costs at most one
+        ``transition_fn`` call. Descents may run through cycles (up to
+        ``max_depth``); the backup credits each node and edge on the path
+        once. The trace reports the ``transposition_hits`` (simulated edges
+        that led to a known state).
         """
         if seed is not None:
             self.reseed(seed)
@@ -79,7 +158,79 @@ class MCTSPlanner:
             def legal_actions_fn(_state: Any) -> list[int]:
                 return list(range(self.action_space_n))
 
-        root = MCTSNode(parent=None, action_from_parent=None)
+        root = self._reused_root(root_state)
+        if root is None:
+            root = (
+                ArrayTree(self.action_space_n, capacity=1 + self.action_space_n * 64)
+                if self.tree == "array"
+                else MCTSNode(parent=None, action_from_parent=None)
+            )
+        reused_visits = int(root.visits[0] if self.tree == "array" else root.visits)
+        child_keys: dict[int, Hashable] = {}
+
+        if self.batch_transition_fn is not None:
+            root_children, max_reached_depth, n_transitions, n_batches = self._search_batched(
+                root, root_state, legal_actions_fn, value_fn
+            )
+            result = self._result(root_children, max_reached_depth, value_fn, n_transitions)
+            result.trace["leaf_batch_size"] = self.leaf_batch_size
+            result.trace["transition_batches"] = n_batches
+        elif self.transpositions:
+            root_children, max_reached_depth, n_transitions, n_hits = self._search_dag(
+                root, root_state, transition_fn, clone_state_fn, legal_actions_fn, value_fn
+            )
+            result = self._result(root_children, max_reached_depth, value_fn, n_transitions)
+            result.trace["transposition_hits"] = n_hits
+        else:
+            search = self._search_array if self.tree == "array" else self._search_nodes
+            root_children, max_reached_depth = search(
+                root,
+                root_state,
+                transition_fn,
+                clone_state_fn,
+                legal_actions_fn,
+                value_fn,
+                child_keys,
+            )
+            result = self._result(root_children, max_reached_depth, value_fn)
+        if self.reuse_tree:
+            result.trace["reused_visits"] = reused_visits
+            self._retain(root, result.action if root_children else None, child_keys)
+        return result
+
+    def _reused_root(self, root_state: Any):
+        retained, self._retained = self._retained, None
+        if not self.reuse_tree or retained is None:
+            return None
+        root, key = retained
+        if self.state_key_fn is not None and (key is None or key != self.state_key_fn(root_state)):
+            return None
+        return root
+
+    def _retain(self, root, action: int | None, child_keys: dict[int, Hashable]) -> None:
+        """Keep the subtree below ``action`` as the next root (if it exists)."""
+        self._retained = None
+        if action is None:
+            return
+        if self.tree == "array":
+            child = int(root.children[0, action])
+            if child >= 0:
+                key = child_keys.get(action)
+                if key is None and self.state_key_fn is not None and root.states[child] is not None:
+                    key = self.state_key_fn(root.states[child])
+                subtree = root.subgraph(child) if self.transpositions else root.subtree(child)
+                self._retained = (subtree, key)
+        else:
+            child = root.children.get(action)
+            if child is not None:
+                child.parent = None
+                child.action_from_parent = None
+                self._retained = (child, child_keys.get(action))
+
+    def _search_nodes(
+        self, root, root_state, transition_fn, clone_state_fn, legal_actions_fn, value_fn, keys
+    ):
+        key_fn = self.state_key_fn if self.reuse_tree else None
         max_reached_depth = 0
 
         for _ in range(self.num_simulations):
@@ -97,6 +248,8 @@ class MCTSPlanner:
                 node = child
                 path.append(node)
                 depth += 1
+                if key_fn is not None and depth == 1 and action not in keys:
+                    keys[action] = key_fn(state)
 
             if not done and depth < self.max_depth:
                 for action in legal_actions_fn(state):
@@ -110,6 +263,8 @@ class MCTSPlanner:
                     node = child
                     path.append(node)
                     depth += 1
+                    if key_fn is not None and depth == 1 and action not in keys:
+                        keys[action] = key_fn(state)
 
             max_reached_depth = max(max_reached_depth, depth)
 
@@ -127,19 +282,222 @@ class MCTSPlanner:
                 back_node.value_sum += value
                 value *= self.discount
 
-        if not root.children:
+        root_children = [
+            (action, child.visits, child.value) for action, child in root.children.items()
+        ]
+        return root_children, max_reached_depth
+
+    def _search_array(
+        self, tree, root_state, transition_fn, clone_state_fn, legal_actions_fn, value_fn, keys
+    ):
+        key_fn = self.state_key_fn if self.reuse_tree else None
+        max_reached_depth = 0
+
+        for _ in range(self.num_simulations):
+            state = clone_state_fn(root_state)
+            node = 0
+            path = [node]
+            rewards: list[float] = []
+            done = False
+            depth = 0
+
+            while tree.expanded(node) and not done and depth < self.max_depth:
+                action, node = tree.select(node, self.c_uct, self.rng)
+                state, reward, done = transition_fn(state, action)
+                rewards.append(reward)
+                path.append(node)
+                depth += 1
+                if key_fn is not None and depth == 1 and action not in keys:
+                    keys[action] = key_fn(state)
+
+            if not done and depth < self.max_depth:
+                tree.expand(node, legal_actions_fn(state))
+                if tree.expanded(node):
+                    action, node = tree.select(node, self.c_uct, self.rng)
+                    state, reward, done = transition_fn(state, action)
+                    rewards.append(reward)
+                    path.append(node)
+                    depth += 1
+                    if key_fn is not None and depth == 1 and action not in keys:
+                        keys[action] = key_fn(state)
+
+            max_reached_depth = max(max_reached_depth, depth)
+            leaf_value = 0.0
+            if value_fn is not None and not done:
+                leaf_value = float(value_fn(state))
+            tree.backup(path, self._discounted_return(rewards, leaf_value), self.discount)
+
+        root_children = [
+            (int(tree.action[child]), int(tree.visits[child]), tree.value(child))
+            for child in tree.child_ids(0)
+        ]
+        return root_children, max_reached_depth
+
+    def _search_batched(self, tree, root_state, legal_actions_fn, value_fn):
+        tree.states[0] = root_state
+        tree.terminal[0] = False
+        max_reached_depth = 0
+        n_transitions = 0
+        n_batches = 0
+        n_simulations = 0
+
+        while n_simulations < self.num_simulations:
+            pending: list[list[int]] = []
+            in_flight: set[int] = set()
+            while len(pending) < self.leaf_batch_size:
+                if n_simulations + len(pending) >= self.num_simulations:
+                    break
+                path = self._descend_to_leaf(tree, legal_actions_fn)
+                leaf = path[-1]
+                if leaf in in_flight:
+                    # Virtual loss no longer separates the descents; simulate what we have.
+                    break
+                depth = len(path) - 1
+                max_reached_depth = max(max_reached_depth, depth)
+                if tree.states[leaf] is None:
+                    tree.add_virtual_loss(path, self.virtual_loss)
+                    in_flight.add(leaf)
+                    pending.append(path)
+                    continue
+                # Terminal, depth-capped or action-less leaves need no simulation.
+                n_simulations += 1
+                leaf_value = 0.0
+                if value_fn is not None and not tree.terminal[leaf]:
+                    leaf_value = float(value_fn(tree.states[leaf]))
+                tree.backup(path, self._path_return(tree, path, leaf_value), self.discount)
+
+            if not pending:
+                continue
+            parents = [path[-2] for path in pending]
+            actions = tree.action[[path[-1] for path in pending]]
+            next_states, rewards, dones = self.batch_transition_fn(
+                [tree.states[parent] for parent in parents], actions
+            )
+            n_batches += 1
+            n_transitions += len(pending)
+            n_simulations += len(pending)
+            rewards = np.asarray(rewards, dtype=np.float64).reshape(-1)
+            dones = np.asarray(dones, dtype=bool).reshape(-1)
+            for i, path in enumerate(pending):
+                leaf = path[-1]
+                tree.states[leaf] = next_states[i]
+                tree.reward[leaf] = rewards[i]
+                tree.terminal[leaf] = dones[i]
+            for path in pending:
+                leaf = path[-1]
+                leaf_value = 0.0
+                if value_fn is not None and not tree.terminal[leaf]:
+                    leaf_value = float(value_fn(tree.states[leaf]))
+                tree.revert_virtual_loss(path, self.virtual_loss)
+                tree.backup(path, self._path_return(tree, path, leaf_value), self.discount)
+
+        root_children = [
+            (int(tree.action[child]), int(tree.visits[child]), tree.value(child))
+            for child in tree.child_ids(0)
+        ]
+        return root_children, max_reached_depth, n_transitions, n_batches
+
+    def _search_dag(
+        self, tree, root_state, transition_fn, clone_state_fn, legal_actions_fn, value_fn
+    ):
+        key_fn = self.state_key_fn
+        tree.states[0] = root_state
+        # A reused graph is re-indexed from its stored states.
+        table = {key_fn(tree.states[node]): node for node in range(1, len(tree))}
+        table[key_fn(root_state)] = 0
+        max_reached_depth = 0
+        n_transitions = 0
+        n_hits = 0
+
+        for _ in range(self.num_simulations):
+            node = 0
+            path = [node]
+            actions: list[int] = []
+            rewards: list[float] = []
+            done = False
+            while len(path) <= self.max_depth:
+                if not tree.expanded(node):
+                    tree.expand_edges(node, legal_actions_fn(tree.states[node]))
+                    if not tree.expanded(node):
+                        break
+                action, child = tree.select_edge(node, self.c_uct, self.rng)
+                new_edge = child == UNSIMULATED
+                if new_edge:
+                    state = clone_state_fn(tree.states[node])
+                    next_state, reward, edge_done = transition_fn(state, action)
+                    n_transitions += 1
+                    key = key_fn(next_state)
+                    child = table.get(key)
+                    if child is None:
+                        child = tree.add_node(node, action, next_state)
+                        table[key] = child
+                    else:
+                        n_hits += 1
+                    tree.link(node, action, child, reward, edge_done)
+                actions.append(action)
+                rewards.append(float(tree.edge_reward[node, action]))
+                done = bool(tree.edge_done[node, action])
+                path.append(child)
+                node = child
+                if new_edge or done:
+                    break
+
+            max_reached_depth = max(max_reached_depth, len(path) - 1)
+            leaf_value = 0.0
+            if value_fn is not None and not done:
+                leaf_value = float(value_fn(tree.states[node]))
+            value = self._discounted_return(rewards, leaf_value)
+            tree.backup_edges(path, actions, value, self.discount)
+
+        root_children = [
+            (action, int(tree.edge_visits[0, action]), tree.edge_value(0, action))
+            for action in np.flatnonzero(tree.children[0] != -1).tolist()
+        ]
+        return root_children, max_reached_depth, n_transitions, n_hits
+
+    def _descend_to_leaf(self, tree: ArrayTree, legal_actions_fn) -> list[int]:
+        """Path from the root to the first node without a state, expanding on the way.
+
+        Stops early at terminal nodes, at ``max_depth`` and at nodes without
+        legal actions; those leaves already carry a state.
+        """
+        node = 0
+        path = [node]
+        while not tree.terminal[node] and len(path) <= self.max_depth:
+            if not tree.expanded(node):
+                tree.expand(node, legal_actions_fn(tree.states[node]))
+                if not tree.expanded(node):
+                    break
+            _action, node = tree.select(node, self.c_uct, self.rng)
+            path.append(node)
+            if tree.states[node] is None:
+                break
+        return path
+
+    def _path_return(self, tree: ArrayTree, path: list[int], leaf_value: float) -> float:
+        return self._discounted_return(tree.reward[path[1:]].tolist(), leaf_value)
+
+    def _result(
+        self,
+        root_children: list[tuple[int, int, float]],
+        max_reached_depth: int,
+        value_fn: Callable[[Any], float] | None,
+        imagined_transitions: int | None = None,
+    ) -> PlanningResult:
+        """Build the :class:`PlanningResult` from ``(action, visits, value)`` root children."""
+        if not root_children:
             return PlanningResult(action=0, value=0.0, imagined_transitions=0, trace={"tree": {}})
 
-        best_action, best_child = self._argmax_visits(root)
+        best_action, _best_visits, best_value = self._argmax_root_visits(root_children)
         tree_stats = {
-            str(action): {"visits": child.visits, "value": child.value}
-            for action, child in root.children.items()
+            str(action): {"visits": visits, "value": value}
+            for action, visits, value in root_children
         }
 
-        ranked = sorted(root.children.items(), key=lambda kv: kv[1].value, reverse=True)
+        ranked = sorted(root_children, key=lambda child: child[2], reverse=True)
         top_rollouts = [
-            {"action": int(action), "value": float(child.value), "visits": int(child.visits)}
-            for action, child in ranked[:5]
+            {"action": int(action), "value": float(value), "visits": int(visits)}
+            for action, visits, value in ranked[:5]
         ]
 
         trace = {
@@ -154,22 +512,27 @@ class MCTSPlanner:
         }
         return PlanningResult(
             action=int(best_action),
-            value=float(best_child.value),
-            imagined_transitions=self.num_simulations * max(1, max_reached_depth),
+            value=float(best_value),
+            imagined_transitions=(
+                self.num_simulations * max(1, max_reached_depth)
+                if imagined_transitions is None
+                else imagined_transitions
+            ),
             trace=trace,
         )
 
-    def _argmax_visits(self, node: MCTSNode) -> tuple[int, MCTSNode]:
-        """Pick the most-visited child, breaking ties with the seeded RNG.
+    def _argmax_root_visits(
+        self, root_children: list[tuple[int, int, float]]
+    ) -> tuple[int, int, float]:
+        """Pick the most-visited root child, breaking ties with the seeded RNG.
 
         Using ``max()`` here would deterministically favor the lowest action
         index inserted first; under sparse reward every root action has equal
         visits, so that collapses to "always return action 0". We instead pick
         uniformly at random among the tied maxima.
         """
-        items = list(node.children.items())
-        best = max(child.visits for _, child in items)
-        tied = [(action, child) for action, child in items if child.visits == best]
+        best = max(visits for _, visits, _ in root_children)
+        tied = [child for child in root_children if child[1] == best]
         if len(tied) == 1:
             return tied[0]
         idx = int(self.rng.integers(len(tied)))
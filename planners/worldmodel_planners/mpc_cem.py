@@ -44,10 +44,22 @@ class MPCCEMPlanner:
     def plan(
         self,
         root_state: Any,
-        rollout_fn: Callable[[Any, np.ndarray], tuple[float, dict]],
-        clone_state_fn: Callable[[Any], Any],
+        rollout_fn: Callable[[Any, np.ndarray], tuple[float, dict]] | None = None,
+        clone_state_fn: Callable[[Any], Any] | None = None,
         seed: int | None = None,
+        batch_rollout_fn: Callable[[Any, np.ndarray], np.ndarray] | None = None,
     ) -> PlanningResult:
+        """Run CEM from ``root_state``.
+
+        Candidates are scored either one at a time by ``rollout_fn`` on a
+        ``clone_state_fn`` copy of the root, or, when ``batch_rollout_fn`` is
+        given, all at once: it receives the root state and the whole
+        ``[population, horizon]`` action matrix and returns ``population``
+        scores. It must not mutate the root state.
+        """
+        if batch_rollout_fn is None and (rollout_fn is None or clone_state_fn is None):
+            msg = "MPCCEMPlanner.plan needs batch_rollout_fn or rollout_fn and clone_state_fn"
+            raise ValueError(msg)
         if seed is not None:
             self.reseed(seed)
 
@@ -58,27 +70,26 @@ class MPCCEMPlanner:
 
         total_evals = 0
         for iteration in range(self.iterations):
-            seqs = np.zeros((self.population, self.horizon), dtype=np.int64)
-            scores = np.zeros(self.population, dtype=np.float64)
-
-            for i in range(self.population):
-                seq = np.array(
-                    [self.rng.choice(self.action_space_n, p=probs[t]) for t in range(self.horizon)],
-                    dtype=np.int64,
+            seqs = self._sample_sequences(probs)
+            if batch_rollout_fn is not None:
+                scores = np.asarray(batch_rollout_fn(root_state, seqs), dtype=np.float64)
+                scores = scores.reshape(self.population)
+            else:
+                scores = np.array(
+                    [rollout_fn(clone_state_fn(root_state), seq)[0] for seq in seqs],
+                    dtype=np.float64,
                 )
-                seqs[i] = seq
-                score, _ = rollout_fn(clone_state_fn(root_state), seq)
-                scores[i] = score
-                total_evals += 1
+            total_evals += self.population
 
             elite_n = max(1, int(self.population * self.elite_frac))
             elite_idx = self._select_elites(scores, elite_n)
             elites = seqs[elite_idx]
 
-            new_probs = np.zeros_like(probs)
-            for t in range(self.horizon):
-                counts = np.bincount(elites[:, t], minlength=self.action_space_n).astype(np.float64)
-                new_probs[t] = counts / max(1.0, counts.sum())
+            # One bincount over ``t * action_space_n + action`` counts every timestep.
+            flat = (elites + np.arange(self.horizon) * self.action_space_n).ravel()
+            counts = np.bincount(flat, minlength=self.horizon * self.action_space_n)
+            counts = counts.reshape(self.horizon, self.action_space_n).astype(np.float64)
+            new_probs = counts / np.maximum(1.0, counts.sum(axis=1, keepdims=True))
 
             probs = self.smoothing * probs + (1.0 - self.smoothing) * new_probs
 
@@ -112,6 +123,18 @@ class MPCCEMPlanner:
             trace=trace,
         )
 
+    def _sample_sequences(self, probs: np.ndarray) -> np.ndarray:
+        """Draw the ``[population, horizon]`` action matrix from per-step ``probs``.
+
+        Inverse-CDF sampling on one block of uniforms; it consumes the RNG
+        exactly like a per-member, per-timestep ``rng.choice(p=probs[t])`` loop
+        and yields the same actions.
+        """
+        cdf = np.cumsum(probs, axis=1)
+        cdf /= cdf[:, -1:]
+        u = self.rng.random((self.population, self.horizon))
+        return (u[:, :, None] >= cdf[None, :, :]).sum(axis=2).astype(np.int64)
+
     def _argmax_random_tie(self, scores: np.ndarray) -> int:
         """Index of the max score, breaking ties with the seeded RNG.
 
@@ -29,40 +29,58 @@ class TrajectorySamplingPlanner:
     def plan(
         self,
         root_state: Any,
-        rollout_fn: Callable[[Any, np.ndarray], tuple[float, dict]],
-        clone_state_fn: Callable[[Any], Any],
+        rollout_fn: Callable[[Any, np.ndarray], tuple[float, dict]] | None = None,
+        clone_state_fn: Callable[[Any], Any] | None = None,
         seed: int | None = None,
+        batch_rollout_fn: Callable[[Any, np.ndarray], np.ndarray] | None = None,
     ) -> PlanningResult:
+        """Score ``num_trajectories`` random action sequences and act on the best one.
+
+        All sequences are drawn up front as one ``[num_trajectories, horizon]``
+        array. They are scored one at a time by ``rollout_fn`` on a
+        ``clone_state_fn`` copy of the root or, when ``batch_rollout_fn`` is
+        given, by a single call that receives the root state and the whole
+        array and returns one score per row (it must not mutate the root).
+        The first action is taken from a best-scoring sequence chosen
+        uniformly among ties, so equal-reward rollouts don't always default to
+        the lowest-index sample. Only the top five sequences are copied into
+        the trace.
+        """
+        if batch_rollout_fn is None and (rollout_fn is None or clone_state_fn is None):
+            msg = (
+                "TrajectorySamplingPlanner.plan needs batch_rollout_fn or rollout_fn "
+                "and clone_state_fn"
+            )
+            raise ValueError(msg)
         if seed is not None:
             self.reseed(seed)
 
-        best_action = 0
-        best_score = -float("inf")
-        best_ties = 0
-        samples = []
-        for _ in range(self.num_trajectories):
-            seq = self.rng.integers(0, self.action_space_n, size=(self.horizon,), dtype=np.int64)
-            score, _ = rollout_fn(clone_state_fn(root_state), seq)
-            score = float(score)
-            samples.append({"sequence": seq.tolist(), "score": score})
-            if score > best_score:
-                best_score = score
-                best_action = int(seq[0])
-                best_ties = 1
-            elif score == best_score:
-                # Reservoir-style uniform choice among trajectories that tie for
-                # the best score, so equal-reward rollouts don't always default
-                # to the first (lowest-index) sampled action.
-                best_ties += 1
-                if int(self.rng.integers(best_ties)) == 0:
-                    best_action = int(seq[0])
+        seqs = self.rng.integers(
+            0, self.action_space_n, size=(self.num_trajectories, self.horizon), dtype=np.int64
+        )
+        if batch_rollout_fn is not None:
+            scores = np.asarray(batch_rollout_fn(root_state, seqs), dtype=np.float64)
+            scores = scores.reshape(self.num_trajectories)
+        else:
+            scores = np.array(
+                [rollout_fn(clone_state_fn(root_state), seq)[0] for seq in seqs],
+                dtype=np.float64,
+            )
+
+        best_score = float(scores.max())
+        tied = np.flatnonzero(scores == best_score)
+        best = int(tied[0] if tied.size == 1 else tied[self.rng.integers(tied.size)])
+        # Stable descending order, so equal scores keep their sampling order.
+        top = np.argsort(-scores, kind="stable")[:5]
 
         return PlanningResult(
-            action=best_action,
+            action=int(seqs[best, 0]),
             value=best_score,
             imagined_transitions=self.num_trajectories * self.horizon,
             trace={
                 "planner": "trajectory_sampling",
-                "top_rollouts": sorted(samples, key=lambda x: x["score"], reverse=True)[:5],
+                "top_rollouts": [
+                    {"sequence": seqs[i].tolist(), "score": float(scores[i])} for i in top
+                ],
             },
         )
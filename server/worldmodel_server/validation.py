@@ -34,6 +34,7 @@ _FINITE_MAP_FIELDS = (
     "achievement_completion",
     "per_seed_return",
     "per_seed_success_rate",
+    "episode_cache",
 )
 
 
@@ -6,6 +6,7 @@ import torch
 from worldmodel_agents.ppo_agent import ModelFreePPOAgent
 from worldmodel_agents.registry import AGENT_LABELS, create_agent, list_agents
 from worldmodel_gym.envs.registry import make_env
+from worldmodel_planners.array_tree import ArrayTree
 
 
 def _run_episode(agent, env, seed, max_steps=None, with_env_ref=False):
@@ -185,3 +186,32 @@ def test_planner_only_oracle_solves_memory_maze_fixed_seed():
     assert terminated, "planner-only oracle (MCTS over perfect sim) failed to reach goal"
     assert total_return >= 1.0
     assert agent.last_planner_trace.get("used_value_fn") is True
+
+
+def test_planner_only_oracle_keeps_truncation_exact_near_max_steps(monkeypatch):
+    # Plan from a root two steps before truncation: every state the search can
+    # reach lies within ``max_depth`` of ``max_steps``, so none may be merged
+    # with a snapshot at another step count (whose ``done`` would differ).
+    env = make_env("memory_maze", obs_mode="both", max_steps=40)
+    obs, info = env.reset(seed=7)
+    for _ in range(38):
+        obs, _reward, _term, _trunc, info = env.step(0)
+    info["env_ref"] = env
+
+    links = []
+    link = ArrayTree.link
+
+    def recording_link(tree, node, action, child, reward, done):
+        links.append((tree.states[node], tree.states[child], bool(done)))
+        link(tree, node, action, child, reward, done)
+
+    monkeypatch.setattr(ArrayTree, "link", recording_link)
+    agent = create_agent("planner_oracle")
+    agent.reset(seed=7)
+    agent.act(obs, info)
+
+    assert links
+    for parent, child, done in links:
+        assert child.step_count == parent.step_count + 1
+        if child.step_count >= env.config.max_steps:
+            assert done
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+
+from benchmarks.__main__ import main
+from benchmarks.cases import build_cases
+from benchmarks.runner import Settings, compare_results, run_suite, select_cases
+
+
+def test_every_hot_path_has_a_benchmark():
+    ids = [case.id for case in build_cases()]
+    assert len(ids) == len(set(ids))
+    for name in (
+        "env.step[memory_maze-lazy]",
+        "env.simulate_from_state[craft_lite-uncached]",
+        "planner.mcts[switch_quest-transpositions]",
+        "planner.mcts[world_model-leaf_batched]",
+        "planner.mpc_cem[world_model]",
+        "planner.trajectory_sampling[memory_maze]",
+        "world_model.update[ensemble_stacked]",
+        "eval.evaluate_and_write[ppo]",
+    ):
+        assert name in ids
+
+
+def test_run_writes_comparable_results(tmp_path, capsys):
+    out = tmp_path / "head.json"
+    args = ["run", "-k", "env.clone_env_state[memory_maze]", "-k", "world_model.predict[det"]
+    assert main([*args, "--repeat", "2", "--min-time", "0.001", "--out", str(out)]) == 0
+
+    document = json.loads(out.read_text())
+    assert document["metadata"]["code_version"]
+    results = {entry["id"]: entry for entry in document["results"]}
+    assert set(results) == {
+        "env.clone_env_state[memory_maze]",
+        "world_model.predict[deterministic]",
+    }
+    for entry in results.values():
+        assert entry["repeat"] == 2 and entry["median"] > 0
+
+    # The same document compares equal to itself; a 2x slower head is flagged.
+    base = tmp_path / "base.json"
+    for entry in document["results"]:
+        entry["median"] /= 2
+    base.write_text(json.dumps(document))
+    capsys.readouterr()
+    assert main(["compare", str(base), str(out)]) == 0
+    assert main(["compare", str(base), str(out), "--fail-on-regression"]) == 1
+    assert "2 slower" in capsys.readouterr().out
+    assert main(["compare", str(out), str(out), "--fail-on-regression"]) == 0
+
+
+def test_compare_reports_added_and_removed_benchmarks():
+    cases = select_cases(build_cases(), ["env.clone_env_state"])
+    document = run_suite(cases[:2], Settings(repeat=1, min_time=0.0))
+    base = {"results": document["results"][:1]}
+    head = {"results": document["results"][1:]}
+    statuses = [row.status(0.1) for row in compare_results(base, head)]
+    assert statuses == ["removed", "added"]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pickle
+
+import torch
+from worldmodel_agents.registry import create_agent
+from worldmodel_gym.eval import run
+from worldmodel_gym.eval.checkpoints import (
+    CheckpointKey,
+    CheckpointStore,
+    code_version,
+    pretrain_checkpoint,
+)
+from worldmodel_gym.eval.harness import evaluate_episodes
+
+
+def test_store_roundtrip_and_key_check(tmp_path):
+    store = CheckpointStore(tmp_path)
+    key = CheckpointKey("search_mcts", "memory_maze", 3136, 7, code_version())
+    assert store.load(key) is None
+    assert key not in store
+
+    path = store.save(key, {"weights": [1, 2, 3]})
+    assert key in store
+    assert CheckpointStore(tmp_path).load(key) == {"weights": [1, 2, 3]}
+
+    # A file whose recorded key differs (e.g. a digest collision) is not trusted.
+    other = CheckpointKey("search_mcts", "memory_maze", 3136, 8, code_version())
+    path.write_bytes(pickle.dumps({"key": vars(other), "state": {"weights": []}}))
+    assert CheckpointStore(tmp_path).load(key) is None
+
+
+def test_code_version_is_a_stable_short_hash():
+    assert code_version() == code_version()
+    assert len(code_version()) == 16
+
+
+def test_evaluation_runs_pretrained_world_model_frozen(tmp_path):
+    env_kwargs = {"max_steps": 20, "obs_mode": "symbolic"}
+    store = CheckpointStore(tmp_path)
+    path = pretrain_checkpoint(
+        "search_mcts", create_agent, "memory_maze", 211, store, env_kwargs, episodes=2
+    )
+    assert path is not None and path.exists()
+    trained = pickle.loads(path.read_bytes())["state"]["world_model"]["model"]
+
+    agent = create_agent("search_mcts")
+    evaluate_episodes(
+        "memory_maze",
+        agent,
+        [211],
+        env_kwargs,
+        max_episodes=1,
+        agent_name="search_mcts",
+        checkpoint_dir=tmp_path,
+        collect_transitions=False,
+    )
+    assert not agent.online_updates
+    assert len(agent.buffer) == 0
+    for name, value in agent.world_model.state_dict().items():
+        assert torch.equal(value, trained[name])
+
+    # Seeds without a checkpoint fall back to learning online.
+    evaluate_episodes(
+        "memory_maze",
+        agent,
+        [212],
+        env_kwargs,
+        max_episodes=1,
+        agent_name="search_mcts",
+        checkpoint_dir=tmp_path,
+        collect_transitions=False,
+    )
+    assert agent.online_updates
+    assert len(agent.buffer) > 0
+
+
+def test_pretrain_command_writes_one_checkpoint_per_seed(tmp_path, capsys):
+    run.main(
+        [
+            "pretrain",
+            "--agent",
+            "ppo,random",
+            "--env",
+            "memory_maze",
+            "--seeds",
+            "1,2",
+            "--episodes",
+            "1",
+            "--budget",
+            "max_steps=10",
+            "--out",
+            str(tmp_path),
+        ]
+    )
+    out = capsys.readouterr().out
+    assert "random: nothing to pretrain" in out
+    assert len(list((tmp_path / "ppo" / "memory_maze").glob("*.pkl"))) == 2
+
+    agent = create_agent("ppo")
+    evaluate_episodes(
+        "memory_maze",
+        agent,
+        [1],
+        {"max_steps": 10, "obs_mode": "symbolic"},
+        max_episodes=1,
+        agent_name="ppo",
+        checkpoint_dir=tmp_path,
+        collect_transitions=False,
+    )
+    assert not agent.online_updates
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np
+import pytest
+from worldmodel_agents.distance_fields import DistanceFields
+from worldmodel_agents.oracle_agent import GreedyOracleAgent
+from worldmodel_gym.envs.registry import make_env
+
+MOVES = [(1, (-1, 0)), (2, (1, 0)), (3, (0, -1)), (4, (0, 1))]
+
+
+def _reference_bfs(start, goal, walls, blocked=frozenset()):
+    """``(distance, first_action)`` from a per-query BFS out of ``start``."""
+    if start == goal:
+        return 0, 0
+    n = len(walls)
+
+    def passable(r, c):
+        inside = 0 <= r < n and 0 <= c < n
+        return inside and not walls[r][c] and ((r, c) not in blocked or (r, c) == goal)
+
+    queue = deque()
+    visited = {start}
+    for action, (dr, dc) in MOVES:
+        cell = (start[0] + dr, start[1] + dc)
+        if passable(*cell):
+            visited.add(cell)
+            queue.append((cell, 1, action))
+    while queue:
+        cell, dist, first = queue.popleft()
+        if cell == goal:
+            return dist, first
+        for _action, (dr, dc) in MOVES:
+            nxt = (cell[0] + dr, cell[1] + dc)
+            if nxt not in visited and passable(*nxt):
+                visited.add(nxt)
+                queue.append((nxt, dist + 1, first))
+    return None, None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_distance_fields_match_per_query_bfs(seed):
+    rng = np.random.default_rng(seed)
+    walls = (rng.random((9, 9)) < 0.3).astype(int).tolist()
+    fields = DistanceFields(walls)
+    cells = [(r, c) for r in range(9) for c in range(9)]
+    for _ in range(60):
+        start = cells[rng.integers(len(cells))]
+        goal = cells[rng.integers(len(cells))]
+        blocked = frozenset(cells[i] for i in rng.integers(len(cells), size=3))
+        for extra in (frozenset(), blocked):
+            dist, first = _reference_bfs(start, goal, walls, extra)
+            assert fields.distance(start, goal, extra) == dist
+            assert fields.first_step(start, goal, extra) == first
+
+
+def test_greedy_oracle_reuses_fields_within_an_episode():
+    env = make_env("memory_maze", obs_mode="symbolic", max_steps=60)
+    oracle = GreedyOracleAgent()
+    _obs, info = env.reset(seed=3)
+    oracle.act(None, info)
+    fields = oracle._fields
+    for _ in range(10):
+        _obs, _r, terminated, truncated, info = env.step(oracle.act(None, info))
+        if terminated or truncated:
+            break
+    assert oracle._fields is fields
+    # One field per (subgoal, blocked cells) pair, not one BFS per step.
+    assert len(fields._fields) <= 3
+
+    _obs, info = env.reset(seed=4)
+    oracle.act(None, info)
+    assert oracle._fields is not fields
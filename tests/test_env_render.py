@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import pickle
+
+import numpy as np
+import pytest
+from worldmodel_agents.oracle_agent import GreedyOracleAgent
+from worldmodel_gym.envs.registry import make_env
+
+
+def _reference_obs(env) -> dict[str, np.ndarray]:
+    tiles = env._tile_grid()
+    channels = np.stack([(tiles == i).astype(np.float32) for i in range(12)], axis=0)
+    extras = np.broadcast_to(
+        np.asarray(env._extra_values(), dtype=np.float32)[:, None, None], (4, *tiles.shape)
+    )
+    symbolic = np.concatenate([channels, extras], axis=0)
+    symbolic[:, ~env._visibility_mask()] = 0.0
+    return {"rgb": env._rgb_from_tiles(tiles), "symbolic": symbolic}
+
+
+@pytest.mark.parametrize("env_id", ["memory_maze", "switch_quest", "craft_lite"])
+def test_incremental_render_matches_full_rebuild(env_id):
+    env = make_env(env_id, obs_mode="both", max_steps=80)
+    oracle = GreedyOracleAgent()
+    rng = np.random.default_rng(1)
+    obs, info = env.reset(seed=11)
+
+    for _ in range(200):
+        np.testing.assert_array_equal(env._tiles, env._tile_grid())
+        expected = _reference_obs(env)
+        np.testing.assert_array_equal(obs["symbolic"], expected["symbolic"])
+        np.testing.assert_array_equal(obs["rgb"], expected["rgb"])
+
+        action = oracle.act(None, info) if rng.random() < 0.8 else int(rng.integers(8))
+        obs, _reward, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            obs, info = env.reset()
+
+
+def test_returned_observations_do_not_alias_buffers():
+    env = make_env("memory_maze", obs_mode="both")
+    first, _ = env.reset(seed=2)
+    first_rgb = first["rgb"].copy()
+    first_symbolic = first["symbolic"].copy()
+    for action in [1, 2, 3, 4]:
+        env.step(action)
+    np.testing.assert_array_equal(first["rgb"], first_rgb)
+    np.testing.assert_array_equal(first["symbolic"], first_symbolic)
+
+
+def test_step_patches_buffers_without_full_rebuild(monkeypatch):
+    env = make_env("craft_lite", obs_mode="both")
+    env.reset(seed=4)
+    rebuilds = []
+    original = env._tile_grid
+    monkeypatch.setattr(env, "_tile_grid", lambda: rebuilds.append(1) or original())
+    for action in [1, 2, 3, 4, 5, 6, 0, 7]:
+        env.step(action)
+    assert rebuilds == []
+
+
+@pytest.mark.parametrize("env_id", ["memory_maze", "switch_quest", "craft_lite"])
+def test_lazy_observations_match_eager_ones_even_when_read_late(env_id):
+    eager = make_env(env_id, obs_mode="both", max_steps=30)
+    lazy = make_env(env_id, obs_mode="lazy", max_steps=30)
+    rng = np.random.default_rng(3)
+    pairs = [(eager.reset(seed=7)[0], lazy.reset(seed=7)[0])]
+    for _ in range(70):
+        action = int(rng.integers(8))
+        expected, _r, terminated, truncated, _info = eager.step(action)
+        obs, *_ = lazy.step(action)
+        np.testing.assert_array_equal(obs["symbolic"], expected["symbolic"])
+        pairs.append((expected, obs))
+        if terminated or truncated:
+            pairs.append((eager.reset()[0], lazy.reset()[0]))
+
+    # Entries first read after the env moved on (or reset) render from the
+    # snapshot captured with the observation.
+    for expected, obs in pairs:
+        assert set(obs) == {"rgb", "symbolic"}
+        np.testing.assert_array_equal(obs["rgb"], expected["rgb"])
+        np.testing.assert_array_equal(obs["symbolic"], expected["symbolic"])
+
+    # Late reads must not disturb the live env.
+    live, *_ = lazy.step(1)
+    expected, *_ = eager.step(1)
+    np.testing.assert_array_equal(live["rgb"], expected["rgb"])
+
+
+def test_lazy_observation_renders_nothing_until_read(monkeypatch):
+    env = make_env("switch_quest", obs_mode="lazy")
+    env.reset(seed=1)
+    calls = []
+    monkeypatch.setattr(env, "render", lambda: calls.append("rgb") or np.zeros(1))
+    monkeypatch.setattr(env, "_symbolic_obs", lambda: calls.append("symbolic") or np.zeros(1))
+    for action in [1, 2, 3, 4]:
+        obs, *_ = env.step(action)
+    assert calls == []
+    obs["symbolic"]
+    obs["symbolic"]
+    assert calls == ["symbolic"]
+
+
+def test_lazy_observation_survives_pickling_after_env_moves_on():
+    env = make_env("craft_lite", obs_mode="lazy")
+    eager = make_env("craft_lite", obs_mode="both")
+    obs, _ = env.reset(seed=6)
+    expected, _ = eager.reset(seed=6)
+    for action in [1, 4, 5]:
+        env.step(action)
+    restored = pickle.loads(pickle.dumps(obs))
+    np.testing.assert_array_equal(restored["rgb"], expected["rgb"])
+    np.testing.assert_array_equal(restored["symbolic"], expected["symbolic"])
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from worldmodel_agents.oracle_agent import GreedyOracleAgent
+from worldmodel_gym.envs.registry import make_env
+
+ENV_IDS = ["memory_maze", "switch_quest", "craft_lite"]
+
+
+@pytest.mark.parametrize("env_id", ENV_IDS)
+def test_transition_matches_step_without_touching_env(env_id):
+    env = make_env(env_id, obs_mode="symbolic", max_steps=40)
+    oracle = GreedyOracleAgent()
+    rng = np.random.default_rng(0)
+    _obs, info = env.reset(seed=5)
+
+    for _ in range(60):
+        action = oracle.act(None, info) if rng.random() < 0.8 else int(rng.integers(8))
+        state = env.clone_env_state()
+        obs_before = env._symbolic_obs().copy()
+        n_trace = len(env.trace)
+
+        expected_state, expected_reward, expected_done = env.transition(state, action)
+        # The pure model must leave the live env, its observation and its trace alone.
+        assert env.clone_env_state() == state
+        np.testing.assert_array_equal(env._symbolic_obs(), obs_before)
+        assert len(env.trace) == n_trace
+
+        _obs, reward, terminated, truncated, info = env.step(action)
+        assert env.clone_env_state() == expected_state
+        assert reward == pytest.approx(expected_reward)
+        assert (terminated or truncated) == expected_done
+        if terminated or truncated:
+            _obs, info = env.reset()
+
+
+@pytest.mark.parametrize("env_id", ENV_IDS)
+def test_snapshot_restore_round_trip(env_id):
+    env = make_env(env_id, obs_mode="symbolic")
+    env.reset(seed=9)
+    start = env.snapshot()
+    start_obs = env._symbolic_obs().copy()
+    for action in [1, 4, 5, 2, 6, 3, 5]:
+        env.step(action)
+
+    env.restore(start)
+    assert env.snapshot() == start
+    np.testing.assert_array_equal(env._symbolic_obs(), start_obs)
+
+
+def test_snapshots_are_hashable_and_compare_by_value():
+    env = make_env("craft_lite", obs_mode="symbolic")
+    env.reset(seed=3)
+    state = env.clone_env_state()
+    same, _, _ = env.transition(state, 0)
+    other, _, _ = env.transition(state, 0)
+    assert same == other
+    assert len({same, other, state}) == 2
+
+
+@pytest.mark.parametrize("env_id", ENV_IDS)
+def test_transition_cache_matches_uncached_transitions(env_id):
+    cached = make_env(env_id, obs_mode="symbolic", max_steps=6, transition_cache_size=8)
+    plain = make_env(env_id, obs_mode="symbolic", max_steps=6, transition_cache_size=0)
+    cached.reset(seed=4)
+    plain.reset(seed=4)
+    rng = np.random.default_rng(1)
+    states = [cached.clone_env_state()]
+    for _ in range(200):
+        state = states[int(rng.integers(len(states)))]
+        action = int(rng.integers(8))
+        result = cached.transition(state, action)
+        assert result == plain.transition(state, action)
+        if not result[2]:
+            states.append(result[0])
+
+    info = cached.transition_cache_info()
+    assert info["hits"] > 0
+    assert info["hits"] + info["misses"] == 200
+    assert info["size"] <= info["capacity"] == 8
+    assert plain.transition_cache_info()["size"] == 0
+
+
+def test_transition_cache_is_dropped_with_the_wall_layout():
+    env = make_env("memory_maze", obs_mode="symbolic")
+    env.reset(seed=1)
+    first = env.clone_env_state()
+    env.transition(first, 1)
+    env.reset(seed=2)
+    second = env.clone_env_state()
+    env.transition(second, 1)
+    assert env.transition_cache_info()["size"] == 1
+    env.transition(first, 1)
+    assert env.transition_cache_info()["hits"] == 0
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+
+from worldmodel_agents.base import AgentConfig
+from worldmodel_agents.registry import create_agent
+from worldmodel_gym.eval.episode_cache import agent_config_hash
+from worldmodel_gym.eval.harness import evaluate_and_write, evaluate_episodes
+
+ENV_KWARGS = {"max_steps": 40, "obs_mode": "symbolic"}
+
+
+def _evaluate(agent, cache_dir, env_kwargs=ENV_KWARGS, collect_transitions=False):
+    return evaluate_episodes(
+        "memory_maze",
+        agent,
+        [3, 4],
+        env_kwargs,
+        max_episodes=2,
+        agent_name="greedy_oracle",
+        collect_transitions=collect_transitions,
+        episode_cache_dir=cache_dir,
+    )
+
+
+def test_second_evaluation_replays_stats_and_traces(tmp_path):
+    first = _evaluate(create_agent("greedy_oracle"), tmp_path)
+    assert first["episode_cache"] == {"hits": 0, "misses": 2}
+
+    second = _evaluate(create_agent("greedy_oracle"), tmp_path)
+    assert second["episode_cache"] == {"hits": 2, "misses": 0}
+    assert second["episodes"] == first["episodes"]
+    assert json.dumps(second["traces"]) == json.dumps(first["traces"])
+
+
+def test_key_covers_env_kwargs_and_agent_config(tmp_path):
+    _evaluate(create_agent("greedy_oracle"), tmp_path)
+
+    longer = _evaluate(create_agent("greedy_oracle"), tmp_path, {**ENV_KWARGS, "max_steps": 41})
+    assert longer["episode_cache"] == {"hits": 0, "misses": 2}
+
+    agent = create_agent("greedy_oracle")
+    agent.config = AgentConfig(action_space_n=6)
+    assert agent_config_hash(agent) != agent_config_hash(create_agent("greedy_oracle"))
+    assert _evaluate(agent, tmp_path)["episode_cache"] == {"hits": 0, "misses": 2}
+
+
+def test_cache_is_bypassed_for_non_reproducible_episodes(tmp_path):
+    # PPO keeps learning across episodes, so an episode depends on its history.
+    ppo = _evaluate(create_agent("ppo"), tmp_path)
+    assert ppo["episode_cache"] == {"hits": 0, "misses": 0}
+
+    collected = _evaluate(create_agent("greedy_oracle"), tmp_path / "t", collect_transitions=True)
+    assert collected["episode_cache"] == {"hits": 0, "misses": 0}
+    assert not (tmp_path / "t").exists()
+
+
+def test_metrics_json_reports_cache_counts(tmp_path):
+    kwargs = dict(
+        agent_name="random",
+        agent_factory=create_agent,
+        env_id="memory_maze",
+        track="test",
+        seeds=[5],
+        max_episodes=1,
+        budget={"max_steps": 20},
+        out_dir=str(tmp_path / "runs"),
+        episode_cache_dir=tmp_path / "cache",
+    )
+    _run_id, run_dir = evaluate_and_write(**kwargs)
+    first = json.loads((run_dir / "metrics.json").read_text())
+    _run_id, run_dir = evaluate_and_write(**kwargs)
+    second = json.loads((run_dir / "metrics.json").read_text())
+
+    # One train-track episode per train seed plus the single test episode.
+    assert first["episode_cache"]["hits"] == 0
+    assert second["episode_cache"] == {"hits": first["episode_cache"]["misses"], "misses": 0}
+    assert second["mean_return"] == first["mean_return"]
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import numpy as np
+import pytest
+from worldmodel_agents.registry import create_agent
 from worldmodel_gym.eval.harness import (
     GOAL_EVENTS,
     _reward_prediction_error,
     _trace_has_event,
+    evaluate_episodes,
+    model_fidelity_report,
+    select_obs_mode,
 )
 
 
@@ -101,6 +106,53 @@ def test_rollouts_do_not_cross_episode_boundaries():
     assert out["k1"] == 4.0
 
 
+class _ScalarOnly:
+    """Hides a model's batch methods so the per-start fallback path runs."""
+
+    def __init__(self, model):
+        self._model = model
+
+    def init_state(self, batch_size: int = 1):
+        return self._model.init_state(batch_size=batch_size)
+
+    def observe(self, prev_state, obs):
+        return self._model.observe(prev_state, obs)
+
+    def predict(self, state, action: int):
+        return self._model.predict(state, action)
+
+
+@pytest.mark.parametrize("name", ["deterministic", "ensemble"])
+def test_batched_fidelity_matches_per_start_rollouts(name):
+    from worldmodel_models.common import ModelConfig
+    from worldmodel_models.registry import create_world_model
+
+    rng = np.random.default_rng(0)
+    episodes = []
+    for length in (13, 4, 1):
+        obs = rng.normal(size=(length + 1, 3, 4)).astype(np.float32)
+        episodes.append(
+            [
+                (obs[i], int(rng.integers(4)), float(rng.normal()), i == length - 1, obs[i + 1])
+                for i in range(length)
+            ]
+        )
+    model = create_world_model(
+        name, config=ModelConfig(obs_dim=12, action_dim=4, latent_dim=8), seed=3
+    )
+    ks = (1, 2, 5, 10, 20)
+
+    batched = model_fidelity_report(_Agent(model), episodes, ks=ks)
+    scalar = model_fidelity_report(_Agent(_ScalarOnly(model)), episodes, ks=ks)
+
+    assert set(batched) == {f"k{k}" for k in ks} | {f"obs_k{k}" for k in ks}
+    assert batched == pytest.approx(scalar, rel=1e-5)
+    assert batched["k20"] == 0.0
+    assert _reward_prediction_error(_Agent(model), episodes, ks=ks) == {
+        f"k{k}": batched[f"k{k}"] for k in ks
+    }
+
+
 def test_no_world_model_returns_zeroes():
     out = _reward_prediction_error(object(), [_make_transitions([1], [1.0])], ks=(1, 5))
     assert out == {"k1": 0.0, "k5": 0.0}
@@ -121,3 +173,64 @@ def test_goal_events_cover_all_envs():
     assert GOAL_EVENTS["MemoryMazeEnv"] == "goal_reached"
     assert GOAL_EVENTS["SwitchQuestEnv"] == "switch_chain_complete"
     assert GOAL_EVENTS["CraftLiteEnv"] == "craft_goal_complete"
+
+
+def test_select_obs_mode_follows_agent_declared_keys():
+    assert select_obs_mode(create_agent("random")) == "lazy"
+    assert select_obs_mode(create_agent("planner_oracle")) == "lazy"
+    assert select_obs_mode(create_agent("search_mcts")) == "symbolic"
+    assert select_obs_mode(_Agent(world_model=None)) == "both"
+
+
+def _factory(name: str):
+    return create_agent(name)
+
+
+def _strip_timing(episodes):
+    return [dict(vars(ep), wall_clock_ms=0.0) for ep in episodes]
+
+
+def test_parallel_episodes_match_serial_order_and_results():
+    kwargs = {"obs_mode": "symbolic", "max_steps": 25}
+    runs = [
+        evaluate_episodes(
+            "switch_quest",
+            _factory("search_mcts"),
+            seeds=[3, 4, 5],
+            env_kwargs=kwargs,
+            max_episodes=5,
+            workers=workers,
+            agent_factory=_factory,
+            agent_name="search_mcts",
+        )
+        for workers in (1, 3)
+    ]
+    serial, parallel = runs
+    assert _strip_timing(parallel["episodes"]) == _strip_timing(serial["episodes"])
+    assert [ep.seed for ep in parallel["episodes"]] == [3, 4, 5, 3, 4]
+    assert parallel["traces"] == serial["traces"]
+    for ep_serial, ep_parallel in zip(
+        serial["episode_transitions"], parallel["episode_transitions"]
+    ):
+        assert [t[1:4] for t in ep_parallel] == [t[1:4] for t in ep_serial]
+        np.testing.assert_array_equal(ep_parallel[-1][4], ep_serial[-1][4])
+
+
+def test_agents_learning_across_episodes_stay_serial(monkeypatch):
+    import worldmodel_gym.eval.harness as harness
+
+    def _no_pool(*args, **kwargs):
+        raise AssertionError("process pool must not be used")
+
+    monkeypatch.setattr(harness, "ProcessPoolExecutor", _no_pool)
+    result = evaluate_episodes(
+        "memory_maze",
+        _factory("ppo"),
+        seeds=[1, 2],
+        env_kwargs={"obs_mode": "symbolic", "max_steps": 10},
+        max_episodes=2,
+        workers=2,
+        agent_factory=_factory,
+        agent_name="ppo",
+    )
+    assert len(result["episodes"]) == 2
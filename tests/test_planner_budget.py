@@ -4,6 +4,8 @@ import copy
 from collections import Counter
 
 import numpy as np
+import pytest
+from worldmodel_planners.array_tree import ArrayTree
 from worldmodel_planners.mcts import MCTSPlanner
 from worldmodel_planners.mpc_cem import MPCCEMPlanner
 from worldmodel_planners.trajectory_sampling import TrajectorySamplingPlanner
@@ -83,6 +85,254 @@ def _distance_heuristic(state):
     return -float(GOAL - state["pos"])
 
 
+@pytest.mark.parametrize("use_value_fn", [False, True])
+def test_mcts_array_tree_matches_node_tree(use_value_fn):
+    kwargs = {
+        "root_state": {"pos": 0},
+        "transition_fn": _corridor_transition,
+        "clone_state_fn": copy.deepcopy,
+        "value_fn": _distance_heuristic if use_value_fn else None,
+        "seed": 3,
+    }
+    results = [
+        MCTSPlanner(action_space_n=3, num_simulations=60, max_depth=6, tree=tree).plan(**kwargs)
+        for tree in ("nodes", "array")
+    ]
+    assert results[0].trace == results[1].trace
+    assert results[0].value == results[1].value
+
+
+def test_array_tree_grows_and_keeps_children_contiguous():
+    tree = ArrayTree(action_space_n=4, capacity=2)
+    tree.expand(0, [3, 1, 1])
+    tree.expand(1, range(4))
+    assert len(tree) == 7
+    np.testing.assert_array_equal(tree.child_actions(0), [1, 3])
+    assert tree.children[0, 3] == 2
+    assert list(tree.child_ids(1)) == [3, 4, 5, 6]
+    assert tree.parent[5] == 1
+    tree.backup([0, 1, 4], 1.0, 0.5)
+    assert tree.visits[[0, 1, 4]].tolist() == [1, 1, 1]
+    assert tree.value_sum[[0, 1, 4]].tolist() == [0.25, 0.5, 1.0]
+    with pytest.raises(ValueError):
+        tree.expand(1, [0])
+
+
+def test_array_subtree_is_compacted_copy():
+    planner = MCTSPlanner(action_space_n=3, num_simulations=80, max_depth=5)
+    tree = ArrayTree(action_space_n=3)
+    planner._search_array(
+        tree, {"pos": 0}, _corridor_transition, copy.deepcopy, lambda s: [0, 1, 2], None, {}
+    )
+    child = int(tree.children[0, 1])
+    sub = tree.subtree(child)
+
+    assert sub.visits[0] == tree.visits[child]
+    assert sub.parent[0] == -1
+    for action in range(3):
+        old, new = tree.children[child, action], sub.children[0, action]
+        assert sub.visits[new] == tree.visits[old]
+        assert sub.value_sum[new] == tree.value_sum[old]
+        assert sub.parent[new] == 0
+    assert sub.visits[1 : len(sub)].max() <= sub.visits[0]
+    assert len(sub) < len(tree)
+
+
+@pytest.mark.parametrize("tree", ["nodes", "array"])
+def test_mcts_reuses_subtree_under_executed_action(tree):
+    planner = MCTSPlanner(
+        action_space_n=3,
+        num_simulations=40,
+        max_depth=4,
+        seed=2,
+        tree=tree,
+        reuse_tree=True,
+        state_key_fn=lambda state: state["pos"],
+    )
+    kwargs = {
+        "transition_fn": _corridor_transition,
+        "clone_state_fn": copy.deepcopy,
+        "value_fn": _distance_heuristic,
+    }
+    first = planner.plan(root_state={"pos": 0}, **kwargs)
+    assert first.trace["reused_visits"] == 0
+    carried = first.trace["root_children"][str(first.action)]["visits"]
+
+    state, _reward, _done = _corridor_transition({"pos": 0}, first.action)
+    second = planner.plan(root_state=state, **kwargs)
+    assert second.trace["reused_visits"] == carried > 0
+    children = second.trace["root_children"].values()
+    assert sum(child["visits"] for child in children) >= carried + 40 - 1
+
+    # A root that does not match the retained subtree starts from scratch.
+    third = planner.plan(root_state={"pos": 0}, **kwargs)
+    assert third.trace["reused_visits"] == 0
+
+
+def test_mcts_tree_reuse_is_identical_across_tree_representations():
+    traces = {}
+    for tree in ("nodes", "array"):
+        planner = MCTSPlanner(
+            action_space_n=3, num_simulations=30, max_depth=4, seed=5, tree=tree, reuse_tree=True
+        )
+        state, steps = {"pos": 0}, []
+        for _ in range(3):
+            result = planner.plan(
+                root_state=state,
+                transition_fn=_corridor_transition,
+                clone_state_fn=copy.deepcopy,
+                value_fn=_distance_heuristic,
+            )
+            steps.append(result.trace)
+            state, _reward, _done = _corridor_transition(state, result.action)
+        traces[tree] = steps
+    assert traces["nodes"] == traces["array"]
+    assert traces["array"][-1]["reused_visits"] > 0
+
+
+def _batched_corridor(calls):
+    def batch_transition(states, actions):
+        calls.append([int(a) for a in actions])
+        out = [_corridor_transition(state, int(a)) for state, a in zip(states, actions)]
+        return [o[0] for o in out], [o[1] for o in out], [o[2] for o in out]
+
+    return batch_transition
+
+
+def test_batched_mcts_simulates_leaves_in_batches():
+    calls = []
+    planner = MCTSPlanner(
+        action_space_n=3,
+        num_simulations=64,
+        max_depth=4,
+        seed=7,
+        batch_transition_fn=_batched_corridor(calls),
+        leaf_batch_size=3,
+    )
+    result = planner.plan(
+        root_state={"pos": 0},
+        transition_fn=None,
+        clone_state_fn=None,
+        value_fn=_distance_heuristic,
+    )
+    assert result.action == OPTIMAL_FIRST_ACTION
+    # Virtual loss sends the first round's descents to three different root actions.
+    assert sorted(calls[0]) == [0, 1, 2]
+    assert all(len(batch) <= 3 for batch in calls)
+    assert result.trace["transition_batches"] == len(calls)
+    assert result.imagined_transitions == sum(len(batch) for batch in calls) <= 64
+    assert sum(child["visits"] for child in result.trace["root_children"].values()) == 64
+
+
+def test_batched_mcts_reuses_stored_subtree_states():
+    calls = []
+    planner = MCTSPlanner(
+        action_space_n=3,
+        num_simulations=30,
+        max_depth=4,
+        batch_transition_fn=_batched_corridor(calls),
+        reuse_tree=True,
+        state_key_fn=lambda state: state["pos"],
+    )
+    first = planner.plan({"pos": 0}, None, None, value_fn=_distance_heuristic, seed=1)
+    state, _reward, _done = _corridor_transition({"pos": 0}, first.action)
+    second = planner.plan(state, None, None, value_fn=_distance_heuristic)
+    assert second.trace["reused_visits"] == first.trace["root_children"]["1"]["visits"] > 0
+
+
+def test_batched_mcts_requires_array_tree():
+    with pytest.raises(ValueError):
+        MCTSPlanner(action_space_n=3, tree="nodes", batch_transition_fn=lambda s, a: (s, a, a))
+    with pytest.raises(ValueError):
+        MCTSPlanner(action_space_n=3, batch_transition_fn=lambda s, a: (s, a, a), leaf_batch_size=0)
+
+
+def _counting(transition_fn, calls):
+    def counted(state, action):
+        calls.append((state["pos"], action))
+        return transition_fn(state, action)
+
+    return counted
+
+
+def test_transposition_mcts_simulates_each_edge_once():
+    calls = []
+    planner = MCTSPlanner(
+        action_space_n=3,
+        num_simulations=64,
+        max_depth=4,
+        seed=3,
+        state_key_fn=lambda state: state["pos"],
+        transpositions=True,
+    )
+    result = planner.plan(
+        root_state={"pos": 0},
+        transition_fn=_counting(_corridor_transition, calls),
+        clone_state_fn=copy.deepcopy,
+        value_fn=_distance_heuristic,
+    )
+    assert result.action == OPTIMAL_FIRST_ACTION
+    # Staying or stepping back revisits known positions: at most 3 edges per
+    # non-goal position are ever simulated, however many simulations run.
+    assert len(calls) == len(set(calls)) <= 3 * GOAL
+    assert result.imagined_transitions == len(calls)
+    assert result.trace["transposition_hits"] > 0
+
+
+def test_dag_backup_credits_cycles_once():
+    tree = ArrayTree(action_space_n=2)
+    tree.expand_edges(0, [0, 1])
+    child = tree.add_node(0, 1, "b")
+    tree.link(0, 0, 0, reward=0.0, done=False)
+    tree.link(0, 1, child, reward=0.0, done=False)
+    assert tree.select_edge(0, c_uct=1.0, rng=np.random.default_rng(0))[1] in (0, child)
+
+    # 0 -0-> 0 -0-> 0 -1-> child: the self-loop edge is credited once, at depth 0.
+    tree.backup_edges([0, 0, 0, child], [0, 0, 1], value=1.0, discount=0.5)
+    assert tree.visits[0] == 1 and tree.visits[child] == 1
+    assert tree.edge_visits[0].tolist() == [1, 1]
+    assert tree.edge_value_sum[0].tolist() == [0.25, 1.0]
+
+    sub = tree.subgraph(child)
+    assert len(sub) == 1 and sub.states[0] == "b"
+    loop = tree.subgraph(0)
+    assert len(loop) == 2 and loop.children[0].tolist() == [0, 1]
+
+
+def test_transposition_mcts_reuses_graph_under_executed_action():
+    calls = []
+    planner = MCTSPlanner(
+        action_space_n=3,
+        num_simulations=40,
+        max_depth=4,
+        seed=2,
+        reuse_tree=True,
+        state_key_fn=lambda state: state["pos"],
+        transpositions=True,
+    )
+    transition_fn = _counting(_corridor_transition, calls)
+    first = planner.plan({"pos": 0}, transition_fn, copy.deepcopy, value_fn=_distance_heuristic)
+    n_first = len(calls)
+    state, _reward, _done = _corridor_transition({"pos": 0}, first.action)
+    second = planner.plan(state, transition_fn, copy.deepcopy, value_fn=_distance_heuristic)
+    assert second.action == OPTIMAL_FIRST_ACTION
+    assert second.trace["reused_visits"] > 0
+    # Edges simulated by the first plan are not simulated again.
+    assert len(set(calls[n_first:]) & set(calls[:n_first])) == 0
+
+
+def test_transpositions_require_key_fn_and_array_tree():
+    with pytest.raises(ValueError):
+        MCTSPlanner(action_space_n=3, transpositions=True)
+    with pytest.raises(ValueError):
+        MCTSPlanner(action_space_n=3, tree="nodes", state_key_fn=id, transpositions=True)
+
+
+def test_mcts_rejects_unknown_tree():
+    with pytest.raises(ValueError):
+        MCTSPlanner(action_space_n=3, tree="hash")
+
+
 def test_mcts_heuristic_selects_optimal_first_action():
     # Sparse reward + a distance-to-goal leaf value lets credit propagate
     # before the goal is ever reached, so the planner must commit to the
@@ -205,6 +455,35 @@ def test_mpc_cem_is_seed_reproducible():
     assert r1.trace["best_sequence"] == r2.trace["best_sequence"]
 
 
+def test_mpc_cem_batched_rollout_matches_per_member_rollouts():
+    def corridor_rollout(state, seq):
+        total = 0.0
+        for a in seq:
+            state, reward, done = _corridor_transition(state, int(a))
+            total += reward
+            if done:
+                break
+        return total, {}
+
+    calls = []
+
+    def batch_rollout(state, seqs):
+        calls.append(seqs.shape)
+        return [corridor_rollout(state, seq)[0] for seq in seqs]
+
+    kwargs = {"action_space_n": 3, "horizon": 6, "population": 20, "iterations": 3}
+    scalar = MPCCEMPlanner(**kwargs).plan(
+        root_state={"pos": 0}, rollout_fn=corridor_rollout, clone_state_fn=copy.deepcopy, seed=4
+    )
+    batched = MPCCEMPlanner(**kwargs).plan(
+        root_state={"pos": 0}, batch_rollout_fn=batch_rollout, seed=4
+    )
+
+    assert calls == [(20, 6)] * 3
+    assert batched.trace == scalar.trace
+    assert batched.imagined_transitions == scalar.imagined_transitions
+
+
 def test_trajectory_sampling_no_index_bias_and_reproducible():
     def flat_rollout(state, seq):
         return 0.0, {}
@@ -228,3 +507,30 @@ def test_trajectory_sampling_no_index_bias_and_reproducible():
         root_state={}, rollout_fn=sum_rollout, clone_state_fn=copy.deepcopy, seed=9
     )
     assert a.action == b.action
+
+
+def test_trajectory_sampling_batched_rollout_matches_per_trajectory_rollouts():
+    def sum_rollout(state, seq):
+        return float((seq == 2).sum()), {}
+
+    calls = []
+
+    def batch_rollout(state, seqs):
+        calls.append(seqs.shape)
+        return (seqs == 2).sum(axis=1)
+
+    kwargs = {"action_space_n": 3, "horizon": 5, "num_trajectories": 4096}
+    scalar = TrajectorySamplingPlanner(**kwargs).plan(
+        root_state={}, rollout_fn=sum_rollout, clone_state_fn=copy.deepcopy, seed=6
+    )
+    batched = TrajectorySamplingPlanner(**kwargs).plan(
+        root_state={}, batch_rollout_fn=batch_rollout, seed=6
+    )
+
+    assert calls == [(4096, 5)]
+    assert batched.action == scalar.action == 2
+    assert batched.value == 5.0
+    assert batched.trace == scalar.trace
+    assert [r["sequence"] for r in batched.trace["top_rollouts"]] == [[2] * 5] * 5
+    with pytest.raises(ValueError):
+        TrajectorySamplingPlanner(action_space_n=3).plan(root_state={})
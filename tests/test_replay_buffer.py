@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from worldmodel_agents.replay import ReplayBuffer
+from worldmodel_models.common import ModelConfig
+from worldmodel_models.registry import create_world_model
+
+
+def _transition(i: int, obs_dim: int = 6) -> dict:
+    return {
+        "obs": {"symbolic": np.full(obs_dim, i, dtype=np.float32), "rgb": np.zeros((4, 4, 3))},
+        "action": i % 4,
+        "reward": 0.5 * i,
+        "done": i % 3 == 0,
+    }
+
+
+def test_ring_keeps_newest_and_samples_like_a_list():
+    buffer = ReplayBuffer(capacity=8)
+    history = [_transition(i) for i in range(13)]
+    for transition in history:
+        buffer.add(transition)
+    assert len(buffer) == 8
+
+    kept = history[-8:]
+    rng_list, rng_ring = np.random.default_rng(0), np.random.default_rng(0)
+    for _ in range(5):
+        idx = rng_list.choice(len(kept), size=5, replace=False)
+        batch = buffer.sample(5, rng_ring)
+        expected = [kept[int(i)] for i in idx]
+        assert batch["obs"].shape == (5, 6)
+        np.testing.assert_array_equal(
+            batch["obs"][:, 0], [t["obs"]["symbolic"][0] for t in expected]
+        )
+        np.testing.assert_array_equal(batch["action"], [t["action"] for t in expected])
+        np.testing.assert_allclose(batch["reward"], [t["reward"] for t in expected])
+        np.testing.assert_array_equal(batch["done"], [float(t["done"]) for t in expected])
+
+
+def test_clear_and_validation():
+    buffer = ReplayBuffer(capacity=4)
+    buffer.add(_transition(1))
+    with pytest.raises(ValueError, match="observation size"):
+        buffer.add(_transition(2, obs_dim=5))
+    with pytest.raises(ValueError, match="cannot sample"):
+        buffer.sample(2, np.random.default_rng(0))
+    buffer.clear()
+    assert len(buffer) == 0
+    buffer.add(_transition(2, obs_dim=5))
+    assert buffer.obs.shape == (4, 5)
+    with pytest.raises(ValueError, match="capacity"):
+        ReplayBuffer(capacity=0)
+
+
+@pytest.mark.parametrize("name", ["deterministic", "stochastic", "ensemble", "ensemble_stacked"])
+def test_world_model_update_accepts_sampled_arrays(name: str):
+    config = ModelConfig(obs_dim=6, action_dim=4, latent_dim=8)
+    buffer = ReplayBuffer(capacity=16)
+    history = [_transition(i) for i in range(10)]
+    for transition in history:
+        buffer.add(transition)
+    arrays = buffer.sample(10, np.random.default_rng(0))
+    idx = np.random.default_rng(0).choice(10, size=10, replace=False)
+    dicts = [history[int(i)] for i in idx]
+
+    from_arrays = create_world_model(name, config=config, seed=3).update(arrays)
+    from_dicts = create_world_model(name, config=config, seed=3).update(dicts)
+    assert from_arrays["loss"] == pytest.approx(from_dicts["loss"], abs=1e-6)
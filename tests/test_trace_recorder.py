@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from worldmodel_agents.oracle_agent import GreedyOracleAgent
+from worldmodel_gym.envs.registry import make_env
+from worldmodel_gym.trace.recorder import TraceRecorder
+from worldmodel_gym.trace.schema import EpisodeTrace, TraceStep
+
+
+def _run_episode(env, seed: int):
+    oracle = GreedyOracleAgent()
+    _obs, info = env.reset(seed=seed)
+    steps = []
+    while True:
+        action = oracle.act(None, info)
+        _obs, reward, terminated, truncated, info = env.step(action)
+        steps.append(
+            TraceStep(
+                t=info["step"],
+                action=action,
+                reward=reward,
+                terminated=terminated,
+                truncated=truncated,
+                events=list(info["events"]),
+                env_state=env._trace_state(env.snapshot()),
+            )
+        )
+        if terminated or truncated:
+            return steps, info
+
+
+@pytest.mark.parametrize("env_id", ["memory_maze", "switch_quest", "craft_lite"])
+def test_recorded_trace_matches_pydantic_dump(env_id):
+    env = make_env(env_id, obs_mode="symbolic", max_steps=50)
+    steps, info = _run_episode(env, seed=21)
+    expected = EpisodeTrace(
+        env_id=env.__class__.__name__,
+        episode_id=env.episode_id,
+        seed=21,
+        steps=steps,
+    ).model_dump(mode="json")
+    assert info["episode_trace"] == expected
+    assert env.trace.to_dict() is info["episode_trace"]
+    assert [step.model_dump() for step in env.trace_steps] == [s.model_dump() for s in steps]
+
+
+def test_recorder_grows_past_capacity_and_interns_events():
+    env = make_env("memory_maze", obs_mode="symbolic")
+    env.reset(seed=5)
+    recorder = TraceRecorder("MemoryMazeEnv", 1, 5, env._trace_state, capacity=2)
+    for t in range(1, 11):
+        recorder.append(t, t % 8, 0.5, False, t == 10, ["found_key"] * (t % 2), env.snapshot())
+    columns = recorder.columns()
+    assert len(recorder) == 10
+    np.testing.assert_array_equal(columns["t"], np.arange(1, 11))
+    np.testing.assert_array_equal(columns["truncated"], [False] * 9 + [True])
+    assert columns["agent_pos"].shape == (10, 2)
+    assert recorder.event_table == ["found_key"]
+    np.testing.assert_array_equal(columns["event_ids"], [0] * 5)
+    dumped = recorder.to_dict()
+    EpisodeTrace(**dumped)
+    assert [step["events"] for step in dumped["steps"]][:2] == [["found_key"], []]
+
+
+def test_set_planner_patches_exported_trace():
+    env = make_env("switch_quest", obs_mode="symbolic", max_steps=3)
+    env.reset(seed=1)
+    info = {}
+    for _ in range(3):
+        _obs, _r, _te, _tr, info = env.step(0)
+        env.trace.set_planner({"visits": (1, 2)})
+    assert info["episode_trace"]["steps"][-1]["planner"] == {"visits": [1, 2]}
+    assert info["episode_trace"]["steps"][0]["planner"] == {"visits": [1, 2]}
+
+
+def test_record_trace_false_skips_recording():
+    fast = make_env("craft_lite", obs_mode="symbolic", max_steps=5, record_trace=False)
+    slow = make_env("craft_lite", obs_mode="symbolic", max_steps=5)
+    fast.reset(seed=2)
+    slow.reset(seed=2)
+    assert fast.trace is None
+    for _ in range(5):
+        obs_a, reward_a, _te, trunc_a, info_a = fast.step(1)
+        obs_b, reward_b, _te, trunc_b, info_b = slow.step(1)
+        np.testing.assert_array_equal(obs_a, obs_b)
+        assert (reward_a, trunc_a) == (reward_b, trunc_b)
+    assert trunc_a
+    assert "episode_trace" not in info_a
+    assert len(info_b["episode_trace"]["steps"]) == 5
+    assert fast.trace_steps == []
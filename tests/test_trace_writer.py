@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+from worldmodel_agents.registry import create_agent
+from worldmodel_gym.eval.harness import (
+    _reward_prediction_error,
+    evaluate_and_write,
+    evaluate_episodes,
+)
+from worldmodel_gym.eval.spill import SpilledTransitions
+from worldmodel_gym.trace.writer import TraceWriter, open_trace, trace_filename
+
+
+def _factory(name: str):
+    return create_agent(name)
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_trace_writer_round_trips(tmp_path, compression):
+    path = tmp_path / trace_filename(compression)
+    traces = [{"env_id": "X", "episode_id": i, "seed": i, "steps": []} for i in range(3)]
+    with TraceWriter(path) as writer:
+        for trace in traces:
+            writer.write(trace)
+    assert writer.n_written == 3
+    with open_trace(path) as f:
+        assert [json.loads(line) for line in f] == traces
+
+
+def test_trace_filename_rejects_unknown_compression():
+    with pytest.raises(ValueError, match="compression"):
+        trace_filename("bz2")
+
+
+def test_zstd_trace_writer_round_trips(tmp_path):
+    pytest.importorskip("zstandard")
+    path = tmp_path / trace_filename("zstd")
+    with TraceWriter(path) as writer:
+        writer.write({"steps": [1]})
+    with open_trace(path) as f:
+        assert json.loads(f.readline()) == {"steps": [1]}
+
+
+def test_spilled_transitions_match_in_memory_ones(tmp_path):
+    kwargs = {"obs_mode": "symbolic", "max_steps": 12}
+    common = dict(seeds=[1, 2], env_kwargs=kwargs, max_episodes=3)
+    memory_agent = _factory("search_mcts")
+    in_memory = evaluate_episodes("memory_maze", memory_agent, **common)
+    spill_agent = _factory("search_mcts")
+    streamed: list[dict] = []
+    spilled = evaluate_episodes(
+        "memory_maze", spill_agent, **common, trace_sink=streamed.append, spill_dir=tmp_path
+    )
+
+    assert isinstance(spilled["episode_transitions"], SpilledTransitions)
+    assert spilled["traces"] == []
+    assert streamed == in_memory["traces"]
+    assert len(spilled["episode_transitions"]) == 3
+    for ep_mem, ep_disk in zip(in_memory["episode_transitions"], spilled["episode_transitions"]):
+        assert len(ep_mem) == len(ep_disk)
+        for t_mem, t_disk in zip(ep_mem, ep_disk):
+            np.testing.assert_array_equal(t_disk[0], t_mem[0])
+            assert t_disk[1:4] == t_mem[1:4]
+            np.testing.assert_array_equal(t_disk[4], t_mem[4])
+    assert _reward_prediction_error(
+        spill_agent, spilled["episode_transitions"]
+    ) == _reward_prediction_error(memory_agent, in_memory["episode_transitions"])
+
+
+def test_evaluate_and_write_streams_compressed_trace(tmp_path):
+    _run_id, run_dir = evaluate_and_write(
+        agent_name="random",
+        agent_factory=_factory,
+        env_id="switch_quest",
+        track="test",
+        seeds=[5, 6],
+        max_episodes=2,
+        budget={"max_steps": 20},
+        out_dir=str(tmp_path),
+        trace_compression="gzip",
+    )
+    with open_trace(run_dir / "trace.jsonl.gz") as f:
+        lines = [json.loads(line) for line in f]
+    assert [trace["seed"] for trace in lines] == [5, 6]
+    # The transition spill directory is removed once fidelity is scored.
+    assert sorted(p.name for p in run_dir.iterdir()) == [
+        "config.yaml",
+        "metrics.json",
+        "trace.jsonl.gz",
+    ]
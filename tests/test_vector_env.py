@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from worldmodel_agents.oracle_agent import GreedyOracleAgent
+from worldmodel_gym.envs.registry import make_env
+from worldmodel_gym.envs.vector import make_vec_env
+from worldmodel_gym.eval.seeds import TEST_SEEDS
+
+ENV_IDS = ["memory_maze", "switch_quest", "craft_lite"]
+
+
+def _assert_obs_equal(vec_obs, scalar_obs, i):
+    if isinstance(scalar_obs, dict):
+        for key in scalar_obs:
+            np.testing.assert_array_equal(vec_obs[key][i], scalar_obs[key])
+    else:
+        np.testing.assert_array_equal(vec_obs[i], scalar_obs)
+
+
+@pytest.mark.parametrize("env_id", ENV_IDS)
+@pytest.mark.parametrize("obs_mode", ["both", "symbolic", "rgb"])
+def test_vector_env_matches_scalar_envs_bit_for_bit(env_id, obs_mode):
+    # A short max_steps forces truncation, and oracle-driven actions reach the
+    # goal, so both auto-reset paths are compared against scalar reset().
+    seeds = TEST_SEEDS[env_id]
+    kwargs = {"obs_mode": obs_mode, "max_steps": 60}
+    scalar = [make_env(env_id, **kwargs) for _ in seeds]
+    vec = make_vec_env(env_id, len(seeds), **kwargs)
+    oracles = [GreedyOracleAgent() for _ in seeds]
+    rng = np.random.default_rng(0)
+
+    vec_obs, _ = vec.reset(seed=seeds)
+    infos = []
+    for i, (env, seed) in enumerate(zip(scalar, seeds)):
+        obs, info = env.reset(seed=seed)
+        infos.append(info)
+        _assert_obs_equal(vec_obs, obs, i)
+
+    for _ in range(150):
+        actions = np.array(
+            [
+                oracle.act(None, info) if rng.random() < 0.8 else int(rng.integers(8))
+                for oracle, info in zip(oracles, infos)
+            ]
+        )
+        vec_obs, rewards, terminated, truncated, vec_infos = vec.step(actions)
+        for i, env in enumerate(scalar):
+            obs, reward, term, trunc, info = env.step(int(actions[i]))
+            assert rewards[i] == reward
+            assert terminated[i] == term
+            assert truncated[i] == trunc
+            assert vec_infos["events"][i] == info["events"]
+            if term or trunc:
+                assert vec_infos["_final_obs"][i]
+                _assert_obs_equal(vec_infos["final_obs"], obs, i)
+                obs, info = env.reset()
+            infos[i] = info
+            _assert_obs_equal(vec_obs, obs, i)
+
+
+def test_vector_env_int_seed_offsets_per_env():
+    vec = make_vec_env("memory_maze", 3, obs_mode="symbolic")
+    obs, info = vec.reset(seed=10)
+    assert info["seeds"] == [10, 11, 12]
+    scalar_obs, _ = make_env("memory_maze", obs_mode="symbolic").reset(seed=12)
+    np.testing.assert_array_equal(obs[2], scalar_obs)
+
+
+def test_vector_env_rejects_wrong_seed_count():
+    vec = make_vec_env("switch_quest", 2)
+    with pytest.raises(ValueError, match="seeds"):
+        vec.reset(seed=[1, 2, 3])
@@ -8,7 +8,7 @@ import pytest
 from worldmodel_models.common import ModelConfig
 from worldmodel_models.registry import create_world_model
 
-MODEL_NAMES = ["deterministic", "stochastic", "ensemble"]
+MODEL_NAMES = ["deterministic", "stochastic", "ensemble", "ensemble_stacked"]
 
 
 def _config() -> ModelConfig:
@@ -96,6 +96,50 @@ def test_different_seed_differs(name: str):
     assert reward_a != pytest.approx(reward_b, abs=1e-9)
 
 
+@pytest.mark.parametrize("name", ["deterministic", "ensemble", "ensemble_stacked"])
+def test_predict_batch_rows_match_scalar_predict(name: str):
+    model = create_world_model(name, config=_config(), seed=5)
+    obs = np.random.RandomState(1).randn(3, 32).astype(np.float32)
+    actions = [0, 3, 9]
+    state = model.observe_batch(model.init_state(batch_size=3), obs)
+    _next, pred_obs, rewards, dones, _aux = model.predict_batch(state, actions)
+
+    assert tuple(pred_obs.shape) == (3, 32)
+    for row, (o, a) in enumerate(zip(obs, actions)):
+        _s, obs_i, reward_i, done_i, _a = model.predict(model.observe(model.init_state(), o), a)
+        assert float(rewards[row]) == pytest.approx(reward_i, abs=1e-5)
+        assert bool(dones[row]) == done_i
+        np.testing.assert_allclose(pred_obs[row].numpy(), obs_i, atol=1e-5)
+
+
+@pytest.mark.parametrize("name", MODEL_NAMES)
+def test_imagine_rollout_batch_masks_after_done(name: str):
+    model = create_world_model(name, config=_config(), seed=11)
+    state = model.observe(model.init_state(), _obs())
+    action_seqs = np.random.RandomState(2).randint(0, 4, size=(16, 12))
+    out = model.imagine_rollout_batch(state, action_seqs)
+
+    mask = out["mask"].numpy()
+    dones = out["pred_dones"].numpy()
+    assert out["pred_rewards"].shape == (16, 12)
+    assert out["uncertainty"].shape == (16,)
+    assert mask[:, 0].all()
+    # A row stays live up to and including its first predicted done.
+    for row in range(16):
+        steps = int(mask[row].sum())
+        assert not mask[row, steps:].any()
+        assert not dones[row, : steps - 1].any()
+        assert steps == 12 or dones[row, steps - 1]
+    assert (out["pred_rewards"].numpy()[~mask] == 0.0).all()
+
+    if name != "stochastic":
+        scalar = model.imagine_rollout(state, action_seqs[0].tolist())
+        assert len(scalar["pred_rewards"]) == int(mask[0].sum())
+        np.testing.assert_allclose(
+            scalar["pred_rewards"], out["pred_rewards"][0, : int(mask[0].sum())], atol=1e-6
+        )
+
+
 def test_ensemble_reports_reward_std_with_multiple_members():
     obs = _obs()
     model = create_world_model("ensemble", config=_config(), seed=7)
@@ -108,6 +152,59 @@ def test_ensemble_reports_reward_std_with_multiple_members():
     assert aux["reward_std"] > 0.0
 
 
+def test_stacked_ensemble_matches_member_list_ensemble():
+    rng = np.random.RandomState(4)
+    listed = create_world_model("ensemble", config=_config(), seed=7)
+    stacked = create_world_model("ensemble_stacked", config=_config(), seed=7)
+    for _ in range(5):
+        batch = [
+            {
+                "obs": rng.randn(32).astype(np.float32),
+                "action": int(rng.randint(4)),
+                "reward": float(rng.rand()),
+                "done": bool(rng.rand() < 0.3),
+            }
+            for _ in range(8)
+        ]
+        # One optimizer step for all members, clipped per member like the list's optimizers.
+        assert stacked.update(batch)["loss"] == pytest.approx(
+            listed.update(batch)["loss"], abs=1e-5
+        )
+
+    obs = _obs()
+    _, obs_a, reward_a, done_a, aux_a = listed.predict(listed.observe(listed.init_state(), obs), 2)
+    _, obs_b, reward_b, done_b, aux_b = stacked.predict(
+        stacked.observe(stacked.init_state(), obs), 2
+    )
+    assert reward_b == pytest.approx(reward_a, abs=1e-5)
+    assert done_b == done_a
+    np.testing.assert_allclose(obs_b, obs_a, atol=1e-5)
+    assert aux_b["reward_std"] == pytest.approx(aux_a["reward_std"], abs=1e-5)
+    assert aux_b["done_mean"] == aux_a["done_mean"]
+    np.testing.assert_allclose(aux_b["model_rewards"], aux_a["model_rewards"], atol=1e-5)
+
+
+def test_deterministic_batched_update_matches_per_item_losses():
+    rng = np.random.RandomState(1)
+    batch = [
+        {
+            "obs": rng.randn(32).astype(np.float32),
+            "action": int(rng.randint(4)),
+            "reward": float(rng.rand()),
+            "done": bool(rng.rand() < 0.3),
+        }
+        for _ in range(8)
+    ]
+    # ``update`` reports the pre-step loss, so fresh same-seed models give
+    # each item's loss on its own and the batch loss must be their mean.
+    per_item = [
+        create_world_model("deterministic", config=_config(), seed=5).update([item])["loss"]
+        for item in batch
+    ]
+    model = create_world_model("deterministic", config=_config(), seed=5)
+    assert model.update(batch)["loss"] == pytest.approx(float(np.mean(per_item)), abs=1e-6)
+
+
 @pytest.mark.parametrize("name", MODEL_NAMES)
 def test_save_load_roundtrip_reproduces_predictions(name: str):
     obs = _obs()
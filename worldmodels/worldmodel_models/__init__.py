@@ -2,6 +2,7 @@ from worldmodel_models.common import ModelConfig
 from worldmodel_models.deterministic import DeterministicLatentModel
 from worldmodel_models.ensemble import EnsembleWorldModel
 from worldmodel_models.registry import create_world_model
+from worldmodel_models.stacked_ensemble import StackedEnsembleWorldModel
 from worldmodel_models.stochastic import StochasticLatentModel
 
 __all__ = [
@@ -9,5 +10,6 @@ __all__ = [
     "DeterministicLatentModel",
     "StochasticLatentModel",
     "EnsembleWorldModel",
+    "StackedEnsembleWorldModel",
     "create_world_model",
 ]
@@ -1,14 +1,24 @@
 from __future__ import annotations
 
 import warnings
+from collections.abc import Mapping
 from dataclasses import dataclass
+from typing import Any
 
 import numpy as np
 import torch
 
+# ``update`` batches: transition dicts, or stacked arrays keyed obs/action/reward/done.
+TransitionBatch = list[dict] | Mapping[str, Any]
+
+
+def batch_len(batch: TransitionBatch) -> int:
+    """Number of transitions in an ``update`` batch of either form."""
+    return len(batch["reward"]) if isinstance(batch, Mapping) else len(batch)
+
 
 def to_numpy_obs(obs) -> np.ndarray:
-    if isinstance(obs, dict):
+    if isinstance(obs, Mapping):
         if "symbolic" in obs:
             arr = np.asarray(obs["symbolic"], dtype=np.float32)
         elif "rgb" in obs:
@@ -20,6 +30,95 @@ def to_numpy_obs(obs) -> np.ndarray:
     return arr.reshape(-1)
 
 
+def broadcast_state(state, batch_size: int):
+    """Expand every batch-1 tensor in a (nested dict/list) model state to ``batch_size`` rows."""
+    if isinstance(state, dict):
+        return {key: broadcast_state(value, batch_size) for key, value in state.items()}
+    if isinstance(state, list):
+        return [broadcast_state(value, batch_size) for value in state]
+    if isinstance(state, torch.Tensor) and state.shape[0] == 1 and batch_size != 1:
+        return state.expand(batch_size, *state.shape[1:])
+    return state
+
+
+def masked_rollout(
+    predict_batch,
+    state,
+    action_seqs,
+    uncertainty_key: str | None = None,
+    return_obs: bool = False,
+) -> dict[str, torch.Tensor]:
+    """Roll ``predict_batch`` over ``action_seqs`` ``[B, T]`` in ``T`` batched steps.
+
+    Instead of stopping at a predicted done, each row keeps stepping but is
+    masked out from the step after its first done: ``mask[b, t]`` is true for
+    the steps row ``b`` actually reaches, and ``pred_rewards``/``pred_dones``
+    are zero past that point. ``uncertainty`` is the per-row mean of
+    ``aux[uncertainty_key]`` over unmasked steps (zero without a key).
+    """
+    actions = torch.as_tensor(np.asarray(action_seqs), dtype=torch.long)
+    if actions.dim() == 1:
+        actions = actions.unsqueeze(0)
+    batch_size, horizon = actions.shape
+    state = broadcast_state(state, batch_size)
+
+    rewards, dones, masks, observations, spreads = [], [], [], [], []
+    alive = None
+    for t in range(horizon):
+        state, pred_obs, pred_reward, pred_done, aux = predict_batch(state, actions[:, t])
+        if alive is None:
+            alive = torch.ones_like(pred_done)
+        masks.append(alive)
+        rewards.append(torch.where(alive, pred_reward, torch.zeros_like(pred_reward)))
+        dones.append(pred_done & alive)
+        if return_obs:
+            observations.append(pred_obs)
+        if uncertainty_key is not None:
+            spreads.append(aux[uncertainty_key])
+        alive = alive & ~pred_done
+
+    if horizon == 0:
+        empty = torch.zeros((batch_size, 0))
+        out = {
+            "pred_rewards": empty,
+            "pred_dones": empty.bool(),
+            "mask": empty.bool(),
+            "uncertainty": torch.zeros(batch_size),
+        }
+        if return_obs:
+            out["pred_obs"] = torch.zeros((batch_size, 0, 0))
+        return out
+
+    mask = torch.stack(masks, dim=1)
+    steps = mask.sum(dim=1).clamp(min=1)
+    if spreads:
+        uncertainty = (torch.stack(spreads, dim=1) * mask).sum(dim=1) / steps
+    else:
+        uncertainty = torch.zeros(batch_size, device=mask.device)
+    out = {
+        "pred_rewards": torch.stack(rewards, dim=1),
+        "pred_dones": torch.stack(dones, dim=1),
+        "mask": mask,
+        "uncertainty": uncertainty,
+    }
+    if return_obs:
+        out["pred_obs"] = torch.stack(observations, dim=1)
+    return out
+
+
+def first_rollout(out: dict[str, torch.Tensor]) -> dict[str, Any]:
+    """Row 0 of a :func:`masked_rollout` result as the scalar ``imagine_rollout`` lists."""
+    n = int(out["mask"][0].sum().item())
+    rollout = {
+        "pred_rewards": out["pred_rewards"][0, :n].tolist(),
+        "pred_dones": out["pred_dones"][0, :n].tolist(),
+        "uncertainty": float(out["uncertainty"][0].item()),
+    }
+    if "pred_obs" in out:
+        rollout["pred_obs"] = list(out["pred_obs"][0, :n].cpu().numpy())
+    return rollout
+
+
 @dataclass
 class ModelConfig:
     obs_dim: int = 16 * 14 * 14
@@ -125,6 +224,60 @@ class TorchModelBase(torch.nn.Module):
         tensor = torch.from_numpy(arr).float().to(self.device)
         return tensor.unsqueeze(0)
 
+    def _obs_batch_tensor(self, obs_batch) -> torch.Tensor:
+        """``[B, obs_dim]`` tensor from a stack (or sequence) of observations."""
+        if isinstance(obs_batch, np.ndarray):
+            arr = obs_batch.astype(np.float32, copy=False).reshape(len(obs_batch), -1)
+        else:
+            arr = np.stack([to_numpy_obs(obs) for obs in obs_batch])
+        obs_dim = self.config.obs_dim
+        if arr.shape[1] != obs_dim:
+            warnings.warn(
+                f"Observation size {arr.shape[1]} does not match configured obs_dim "
+                f"{obs_dim}; "
+                + ("zero-padding" if arr.shape[1] < obs_dim else "truncating")
+                + " to fit. This may indicate a mis-configured ModelConfig.obs_dim.",
+                stacklevel=2,
+            )
+            fitted = np.zeros((len(arr), obs_dim), dtype=np.float32)
+            width = min(arr.shape[1], obs_dim)
+            fitted[:, :width] = arr[:, :width]
+            arr = fitted
+        return torch.from_numpy(np.ascontiguousarray(arr)).to(self.device)
+
+    def _action_batch_tensor(self, actions) -> torch.Tensor:
+        """``[B, action_dim]`` one-hot rows, clipping out-of-range actions like ``_action_tensor``."""
+        idx = torch.as_tensor(np.asarray(actions), dtype=torch.long, device=self.device)
+        idx = idx.reshape(-1).clamp(0, self.config.action_dim - 1)
+        return torch.nn.functional.one_hot(idx, self.config.action_dim).float()
+
+    def _batch_tensors(
+        self, batch: TransitionBatch
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Stack a batch into ``(obs [N, obs_dim], actions [N, action_dim], rewards [N],
+        dones [N])`` tensors for a batched ``update``.
+
+        ``batch`` is a list of transition dicts or a dict of stacked arrays
+        keyed ``obs``/``action``/``reward``/``done`` (see ``ReplayBuffer.sample``).
+        """
+        if isinstance(batch, Mapping):
+            obs = self._obs_batch_tensor(np.asarray(batch["obs"]))
+            actions = self._action_batch_tensor(batch["action"])
+            rewards = torch.as_tensor(
+                np.asarray(batch["reward"], dtype=np.float32), device=self.device
+            )
+            dones = torch.as_tensor(np.asarray(batch["done"], dtype=np.float32), device=self.device)
+            return obs, actions, rewards, dones
+        obs = self._obs_batch_tensor([item["obs"] for item in batch])
+        actions = self._action_batch_tensor([int(item["action"]) for item in batch])
+        rewards = torch.tensor(
+            [float(item["reward"]) for item in batch], dtype=torch.float32, device=self.device
+        )
+        dones = torch.tensor(
+            [float(item["done"]) for item in batch], dtype=torch.float32, device=self.device
+        )
+        return obs, actions, rewards, dones
+
     def _action_tensor(self, action: int) -> torch.Tensor:
         idx = max(0, min(self.config.action_dim - 1, int(action)))
         one_hot = torch.zeros((1, self.config.action_dim), dtype=torch.float32, device=self.device)
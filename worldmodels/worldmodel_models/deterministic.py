@@ -4,7 +4,14 @@ from typing import Any
 
 import torch
 
-from worldmodel_models.common import ModelConfig, TorchModelBase
+from worldmodel_models.common import (
+    ModelConfig,
+    TorchModelBase,
+    TransitionBatch,
+    batch_len,
+    first_rollout,
+    masked_rollout,
+)
 
 
 class DeterministicLatentModel(TorchModelBase):
@@ -42,69 +49,74 @@ class DeterministicLatentModel(TorchModelBase):
         return {"latent": latent}
 
     def predict(self, state: dict[str, torch.Tensor], action: int):
-        a = self._action_tensor(action)
-        x = torch.cat([state["latent"], a], dim=-1)
-        next_latent = self.transition(x)
-
-        pred_obs = self.obs_head(next_latent)
-        pred_reward = self.reward_head(next_latent)
-        pred_done_logit = self.done_head(next_latent)
-        pred_done = torch.sigmoid(pred_done_logit)
-
-        next_state = {"latent": next_latent}
-        aux = {"done_prob": float(pred_done.item())}
+        next_state, pred_obs, pred_reward, pred_done, aux = self.predict_batch(state, [action])
         return (
             next_state,
-            pred_obs.detach().cpu().numpy().reshape(-1),
+            pred_obs.cpu().numpy().reshape(-1),
             float(pred_reward.item()),
-            bool(pred_done.item() > 0.5),
-            aux,
+            bool(pred_done.item()),
+            {"done_prob": float(aux["done_prob"].item())},
         )
 
-    def imagine_rollout(self, state: dict[str, torch.Tensor], action_seq) -> dict[str, Any]:
-        cur = {"latent": state["latent"].clone()}
-        rewards = []
-        dones = []
-        obs = []
-        for action in action_seq:
-            cur, pred_obs, pred_reward, pred_done, aux = self.predict(cur, int(action))
-            rewards.append(pred_reward)
-            dones.append(pred_done)
-            obs.append(pred_obs)
-            if pred_done:
-                break
-
-        return {
-            "pred_rewards": rewards,
-            "pred_dones": dones,
-            "pred_obs": obs,
-            "uncertainty": 0.0,
-        }
-
-    def update(self, batch: list[dict]) -> dict[str, float]:
-        if not batch:
-            return {"loss": 0.0}
+    @torch.no_grad()
+    def observe_batch(self, prev_state: dict[str, torch.Tensor], obs_batch):
+        """Batched :meth:`observe`: row ``i`` of ``obs_batch`` updates row ``i`` of the state."""
+        obs_emb = self.obs_encoder(self._obs_batch_tensor(obs_batch))
+        return {"latent": self.gru(obs_emb, prev_state["latent"])}
 
-        self.train()
-        loss = torch.zeros((), dtype=torch.float32, device=self.device)
+    @torch.no_grad()
+    def predict_batch(self, state: dict[str, torch.Tensor], actions):
+        """Predict one step for ``B`` latents, one action per row.
 
-        for item in batch:
-            state = self.observe(self.init_state(batch_size=1), item["obs"])
-            action_tensor = self._action_tensor(int(item["action"]))
-            transition_input = torch.cat([state["latent"], action_tensor], dim=-1)
-            next_latent = self.transition(transition_input)
+        Returns ``(next_state, pred_obs [B, obs_dim], pred_rewards [B],
+        pred_dones [B], aux)`` as tensors, without host syncs.
+        """
+        x = torch.cat([state["latent"], self._action_batch_tensor(actions)], dim=-1)
+        next_latent = self.transition(x)
+        done_prob = torch.sigmoid(self.done_head(next_latent)).squeeze(-1)
+        return (
+            {"latent": next_latent},
+            self.obs_head(next_latent),
+            self.reward_head(next_latent).squeeze(-1),
+            done_prob > 0.5,
+            {"done_prob": done_prob},
+        )
 
-            pred_reward = self.reward_head(next_latent).squeeze(-1)
-            pred_done_prob = torch.sigmoid(self.done_head(next_latent)).squeeze(-1)
+    def imagine_rollout(self, state: dict[str, torch.Tensor], action_seq) -> dict[str, Any]:
+        out = self.imagine_rollout_batch(state, [list(action_seq)], return_obs=True)
+        rollout = first_rollout(out)
+        rollout["uncertainty"] = 0.0
+        return rollout
+
+    def imagine_rollout_batch(
+        self, state: dict[str, torch.Tensor], action_seqs, return_obs: bool = False
+    ) -> dict[str, torch.Tensor]:
+        """Imagine ``B`` action sequences ``[B, T]`` in ``T`` batched steps.
+
+        See :func:`~worldmodel_models.common.masked_rollout` for the done mask.
+        """
+        return masked_rollout(self.predict_batch, state, action_seqs, return_obs=return_obs)
+
+    def update(self, batch: TransitionBatch) -> dict[str, float]:
+        """One optimizer step on the mean one-step reward/done loss over ``batch``.
+
+        Every transition starts from a fresh latent, so the whole batch runs
+        as one ``[N, ...]`` forward and backward pass.
+        """
+        if not batch_len(batch):
+            return {"loss": 0.0}
 
-            target_reward = torch.tensor([item["reward"]], device=self.device)
-            target_done = torch.tensor([float(item["done"])], device=self.device)
+        self.train()
+        obs, actions, target_reward, target_done = self._batch_tensors(batch)
+        latent = self.gru(self.obs_encoder(obs), self.init_state(batch_size=len(obs))["latent"])
+        next_latent = self.transition(torch.cat([latent, actions], dim=-1))
 
-            reward_loss = (pred_reward - target_reward).pow(2).mean()
-            done_loss = (pred_done_prob - target_done).pow(2).mean()
-            loss = loss + reward_loss + done_loss
+        pred_reward = self.reward_head(next_latent).squeeze(-1)
+        pred_done_prob = torch.sigmoid(self.done_head(next_latent)).squeeze(-1)
+        reward_loss = (pred_reward - target_reward).pow(2)
+        done_loss = (pred_done_prob - target_done).pow(2)
+        loss = (reward_loss + done_loss).mean()
 
-        loss = loss / len(batch)
         self.optimizer.zero_grad()
         loss.backward()
         torch.nn.utils.clip_grad_norm_(self.parameters(), 1.0)
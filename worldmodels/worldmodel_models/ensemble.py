@@ -3,8 +3,9 @@ from __future__ import annotations
 from typing import Any
 
 import numpy as np
+import torch
 
-from worldmodel_models.common import ModelConfig
+from worldmodel_models.common import ModelConfig, TransitionBatch, first_rollout, masked_rollout
 from worldmodel_models.deterministic import DeterministicLatentModel
 
 
@@ -36,38 +37,56 @@ class EnsembleWorldModel:
         return [m.observe(s, obs) for m, s in zip(self.models, prev_state, strict=False)]
 
     def predict(self, state: list[Any], action: int):
-        outputs = [m.predict(s, action) for m, s in zip(self.models, state, strict=False)]
-        next_states = [o[0] for o in outputs]
-        obs = np.mean(np.stack([o[1] for o in outputs], axis=0), axis=0)
-        rewards = np.array([o[2] for o in outputs], dtype=np.float32)
-        dones = np.array([float(o[3]) for o in outputs], dtype=np.float32)
+        next_states, pred_obs, pred_reward, pred_done, aux = self.predict_batch(state, [action])
+        return (
+            next_states,
+            pred_obs.cpu().numpy().reshape(-1),
+            float(pred_reward.item()),
+            bool(pred_done.item()),
+            {
+                "reward_std": float(aux["reward_std"].item()),
+                "done_mean": float(aux["done_mean"].item()),
+                "model_rewards": aux["model_rewards"][:, 0].tolist(),
+            },
+        )
 
+    def observe_batch(self, prev_state: list[Any], obs_batch):
+        return [
+            m.observe_batch(s, obs_batch) for m, s in zip(self.models, prev_state, strict=False)
+        ]
+
+    def predict_batch(self, state: list[Any], actions):
+        """Batched :meth:`predict`: member means per row, plus per-row ``reward_std``."""
+        outputs = [m.predict_batch(s, actions) for m, s in zip(self.models, state, strict=False)]
+        rewards = torch.stack([o[2] for o in outputs], dim=0)
+        dones = torch.stack([o[3] for o in outputs], dim=0).float().mean(dim=0)
         aux = {
-            "reward_std": float(rewards.std()),
-            "done_mean": float(dones.mean()),
-            "model_rewards": rewards.tolist(),
+            "reward_std": rewards.std(dim=0, unbiased=False),
+            "done_mean": dones,
+            "model_rewards": rewards,
         }
-        return next_states, obs, float(rewards.mean()), bool(dones.mean() > 0.5), aux
+        return (
+            [o[0] for o in outputs],
+            torch.stack([o[1] for o in outputs], dim=0).mean(dim=0),
+            rewards.mean(dim=0),
+            dones > 0.5,
+            aux,
+        )
 
     def imagine_rollout(self, state: list[Any], action_seq):
-        cur = state
-        rewards = []
-        dones = []
-        uncertainties = []
-        for action in action_seq:
-            cur, _obs, reward, done, aux = self.predict(cur, int(action))
-            rewards.append(reward)
-            dones.append(done)
-            uncertainties.append(aux.get("reward_std", 0.0))
-            if done:
-                break
-        return {
-            "pred_rewards": rewards,
-            "pred_dones": dones,
-            "uncertainty": float(np.mean(uncertainties) if uncertainties else 0.0),
-        }
+        return first_rollout(self.imagine_rollout_batch(state, [list(action_seq)]))
+
+    def imagine_rollout_batch(self, state: list[Any], action_seqs, return_obs: bool = False):
+        """Batched :meth:`imagine_rollout`; ``uncertainty`` is the mean member reward std."""
+        return masked_rollout(
+            self.predict_batch,
+            state,
+            action_seqs,
+            uncertainty_key="reward_std",
+            return_obs=return_obs,
+        )
 
-    def update(self, batch: list[dict]) -> dict[str, float]:
+    def update(self, batch: TransitionBatch) -> dict[str, float]:
         losses = [m.update(batch) for m in self.models]
         mean_loss = float(np.mean([x.get("loss", 0.0) for x in losses]))
         return {"loss": mean_loss}
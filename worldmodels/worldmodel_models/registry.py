@@ -5,6 +5,7 @@ import torch
 from worldmodel_models.common import ModelConfig
 from worldmodel_models.deterministic import DeterministicLatentModel
 from worldmodel_models.ensemble import EnsembleWorldModel
+from worldmodel_models.stacked_ensemble import StackedEnsembleWorldModel
 from worldmodel_models.stochastic import StochasticLatentModel
 
 
@@ -18,8 +19,10 @@ def create_world_model(
     ``seed`` is optional and backward compatible. When provided (an int or a
     ``torch.Generator``) the returned model uses it for deterministic weight
     initialization and for all stochastic sampling, so two models built with
-    the same seed produce identical predictions. The ensemble only accepts an
-    integer seed (each member is offset deterministically).
+    the same seed produce identical predictions. The ensembles only accept an
+    integer seed (each member is offset deterministically). ``"ensemble"``
+    keeps one model object per member; ``"ensemble_stacked"`` is the same
+    ensemble with member weights stacked into batched tensors.
     """
     key = name.lower()
     if key in {"det", "deterministic", "deterministic_mlp"}:
@@ -31,5 +34,10 @@ def create_world_model(
             msg = "EnsembleWorldModel requires an integer seed, not a torch.Generator"
             raise TypeError(msg)
         return EnsembleWorldModel(config=config, seed=seed)
+    if key in {"ensemble_stacked", "stacked_ensemble"}:
+        if isinstance(seed, torch.Generator):
+            msg = "StackedEnsembleWorldModel requires an integer seed, not a torch.Generator"
+            raise TypeError(msg)
+        return StackedEnsembleWorldModel(config=config, seed=seed)
     msg = f"Unknown world model: {name}"
     raise ValueError(msg)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from typing import Any
+
+import torch
+
+from worldmodel_models.common import (
+    ModelConfig,
+    TorchModelBase,
+    TransitionBatch,
+    batch_len,
+    first_rollout,
+    masked_rollout,
+)
+from worldmodel_models.deterministic import DeterministicLatentModel
+
+# Stacked parameter name -> parameter of the DeterministicLatentModel member it stacks.
+_MEMBER_PARAMS: dict[str, str] = {
+    "enc1_w": "obs_encoder.0.weight",
+    "enc1_b": "obs_encoder.0.bias",
+    "enc2_w": "obs_encoder.2.weight",
+    "enc2_b": "obs_encoder.2.bias",
+    "gru_w_ih": "gru.weight_ih",
+    "gru_w_hh": "gru.weight_hh",
+    "gru_b_ih": "gru.bias_ih",
+    "gru_b_hh": "gru.bias_hh",
+    "trans_w": "transition.0.weight",
+    "trans_b": "transition.0.bias",
+    "obs_w": "obs_head.weight",
+    "obs_b": "obs_head.bias",
+    "reward_w": "reward_head.weight",
+    "reward_b": "reward_head.bias",
+    "done_w": "done_head.weight",
+    "done_b": "done_head.bias",
+}
+
+
+def _linear(x: torch.Tensor, weight: torch.Tensor, bias: torch.Tensor) -> torch.Tensor:
+    """Per-member linear layer: ``x [M, B, in]``, ``weight [M, out, in]`` -> ``[M, B, out]``."""
+    return torch.baddbmm(bias.unsqueeze(1), x, weight.transpose(1, 2))
+
+
+class StackedEnsembleWorldModel(TorchModelBase):
+    """:class:`~worldmodel_models.ensemble.EnsembleWorldModel` with stacked member weights.
+
+    Every member is the network of a :class:`DeterministicLatentModel`, but
+    parameter ``p`` of member ``m`` lives at ``p[m]`` of one stacked tensor,
+    so all members run in a single batched matmul per layer and :meth:`update`
+    takes one backward pass and one Adam step for the whole ensemble, clipping
+    each member's gradient norm separately as the per-member optimizers do.
+
+    Members are built exactly like ``EnsembleWorldModel``'s (seed ``seed + i``)
+    and their weights stacked, so with the same seed both start from the same
+    ensemble and report the same means and uncertainties (``reward_std``,
+    ``done_mean``, ``model_rewards``). States are ``{"latent": [B, n_models,
+    latent_dim]}``.
+    """
+
+    def __init__(
+        self,
+        n_models: int = 5,
+        config: ModelConfig | None = None,
+        seed: int | None = None,
+    ):
+        super().__init__(config or ModelConfig(), seed=seed)
+        self.n_models = n_models
+        members = [
+            DeterministicLatentModel(config=self.config, seed=None if seed is None else seed + i)
+            for i in range(n_models)
+        ]
+        member_params = [dict(member.named_parameters()) for member in members]
+        for name, member_name in _MEMBER_PARAMS.items():
+            stacked = torch.stack([params[member_name].detach() for params in member_params])
+            self.register_parameter(name, torch.nn.Parameter(stacked.clone()))
+        self.to(self.device)
+        self.optimizer = torch.optim.Adam(self.parameters(), lr=self.config.lr)
+
+    def init_state(self, batch_size: int = 1) -> dict[str, torch.Tensor]:
+        latent = torch.zeros(
+            (batch_size, self.n_models, self.config.latent_dim),
+            dtype=torch.float32,
+            device=self.device,
+        )
+        return {"latent": latent}
+
+    def _encode(self, obs: torch.Tensor) -> torch.Tensor:
+        """``[B, obs_dim]`` observations shared by all members -> ``[M, B, latent_dim]``."""
+        hidden = torch.matmul(obs, self.enc1_w.transpose(1, 2)) + self.enc1_b.unsqueeze(1)
+        return _linear(torch.relu(hidden), self.enc2_w, self.enc2_b)
+
+    def _gru(self, x: torch.Tensor, h: torch.Tensor) -> torch.Tensor:
+        """``torch.nn.GRUCell`` over ``[M, B, latent_dim]`` inputs and hidden states."""
+        in_r, in_z, in_n = _linear(x, self.gru_w_ih, self.gru_b_ih).chunk(3, dim=-1)
+        h_r, h_z, h_n = _linear(h, self.gru_w_hh, self.gru_b_hh).chunk(3, dim=-1)
+        reset = torch.sigmoid(in_r + h_r)
+        update = torch.sigmoid(in_z + h_z)
+        candidate = torch.tanh(in_n + reset * h_n)
+        return (1.0 - update) * candidate + update * h
+
+    def _transition(self, latent: torch.Tensor, one_hot: torch.Tensor) -> torch.Tensor:
+        """``[M, B, latent_dim]`` latents and ``[B, action_dim]`` actions -> next latents."""
+        one_hot = one_hot.unsqueeze(0).expand(self.n_models, *one_hot.shape)
+        return torch.tanh(_linear(torch.cat([latent, one_hot], dim=-1), self.trans_w, self.trans_b))
+
+    def _heads(self, latent: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        """Per-member ``(rewards [M, B], done probabilities [M, B])``."""
+        rewards = _linear(latent, self.reward_w, self.reward_b).squeeze(-1)
+        done_prob = torch.sigmoid(_linear(latent, self.done_w, self.done_b)).squeeze(-1)
+        return rewards, done_prob
+
+    @torch.no_grad()
+    def observe(self, prev_state: dict[str, torch.Tensor], obs) -> dict[str, torch.Tensor]:
+        return self.observe_batch(prev_state, self._obs_tensor(obs))
+
+    @torch.no_grad()
+    def observe_batch(self, prev_state: dict[str, torch.Tensor], obs_batch):
+        obs = obs_batch if torch.is_tensor(obs_batch) else self._obs_batch_tensor(obs_batch)
+        latent = self._gru(self._encode(obs), prev_state["latent"].transpose(0, 1))
+        return {"latent": latent.transpose(0, 1)}
+
+    def predict(self, state: dict[str, torch.Tensor], action: int):
+        next_state, pred_obs, pred_reward, pred_done, aux = self.predict_batch(state, [action])
+        return (
+            next_state,
+            pred_obs.cpu().numpy().reshape(-1),
+            float(pred_reward.item()),
+            bool(pred_done.item()),
+            {
+                "reward_std": float(aux["reward_std"].item()),
+                "done_mean": float(aux["done_mean"].item()),
+                "model_rewards": aux["model_rewards"][:, 0].tolist(),
+            },
+        )
+
+    @torch.no_grad()
+    def predict_batch(self, state: dict[str, torch.Tensor], actions):
+        """Batched :meth:`predict`: member means per row, plus per-row ``reward_std``."""
+        next_latent = self._transition(
+            state["latent"].transpose(0, 1), self._action_batch_tensor(actions)
+        )
+        rewards, done_prob = self._heads(next_latent)
+        dones = (done_prob > 0.5).float().mean(dim=0)
+        aux = {
+            "reward_std": rewards.std(dim=0, unbiased=False),
+            "done_mean": dones,
+            "model_rewards": rewards,
+        }
+        return (
+            {"latent": next_latent.transpose(0, 1)},
+            _linear(next_latent, self.obs_w, self.obs_b).mean(dim=0),
+            rewards.mean(dim=0),
+            dones > 0.5,
+            aux,
+        )
+
+    def imagine_rollout(self, state: dict[str, torch.Tensor], action_seq) -> dict[str, Any]:
+        return first_rollout(self.imagine_rollout_batch(state, [list(action_seq)]))
+
+    def imagine_rollout_batch(
+        self, state: dict[str, torch.Tensor], action_seqs, return_obs: bool = False
+    ) -> dict[str, torch.Tensor]:
+        """Batched :meth:`imagine_rollout`; ``uncertainty`` is the mean member reward std."""
+        return masked_rollout(
+            self.predict_batch,
+            state,
+            action_seqs,
+            uncertainty_key="reward_std",
+            return_obs=return_obs,
+        )
+
+    def update(self, batch: TransitionBatch) -> dict[str, float]:
+        if not batch_len(batch):
+            return {"loss": 0.0}
+
+        obs, actions, target_reward, target_done = self._batch_tensors(batch)
+        latent = self._gru(
+            self._encode(obs), obs.new_zeros(self.n_models, len(obs), self.config.latent_dim)
+        )
+        pred_reward, pred_done_prob = self._heads(self._transition(latent, actions))
+
+        # Per-member mean over the batch, as each member's own update computes it.
+        member_loss = (pred_reward - target_reward).pow(2) + (pred_done_prob - target_done).pow(2)
+        member_loss = member_loss.mean(dim=1)
+        self.optimizer.zero_grad()
+        member_loss.sum().backward()
+        self._clip_member_grad_norms(1.0)
+        self.optimizer.step()
+
+        return {"loss": float(member_loss.mean().item())}
+
+    def _clip_member_grad_norms(self, max_norm: float) -> None:
+        """``clip_grad_norm_`` applied to each member's slice of the stacked gradients."""
+        grads = [p.grad for p in self.parameters() if p.grad is not None]
+        sq_norms = torch.stack([g.reshape(self.n_models, -1).pow(2).sum(dim=1) for g in grads])
+        coef = (max_norm / (sq_norms.sum(dim=0).sqrt() + 1e-6)).clamp(max=1.0)
+        for grad in grads:
+            grad.mul_(coef.view(-1, *([1] * (grad.dim() - 1))))
@@ -4,7 +4,14 @@ from typing import Any
 
 import torch
 
-from worldmodel_models.common import ModelConfig, TorchModelBase
+from worldmodel_models.common import (
+    ModelConfig,
+    TorchModelBase,
+    TransitionBatch,
+    batch_len,
+    first_rollout,
+    masked_rollout,
+)
 
 
 class StochasticLatentModel(TorchModelBase):
@@ -44,89 +51,96 @@ class StochasticLatentModel(TorchModelBase):
         return {"h": h, "z": z, "mean": mean, "logvar": logvar}
 
     def predict(self, state: dict[str, torch.Tensor], action: int):
-        a = self._action_tensor(action)
-        prior_stats = self.prior(torch.cat([state["h"], a], dim=-1))
-        mean, logvar = torch.chunk(prior_stats, 2, dim=-1)
-        std = torch.exp(0.5 * logvar).clamp(min=1e-4)
-        eps = self._randn_like(std)
-        z = mean + eps * std
-        h = self.gru(z, state["h"])
-
-        pred_reward = self.reward_head(h)
-        pred_done_prob = torch.sigmoid(self.done_head(h))
-        pred_obs = self.obs_head(h)
-
-        next_state = {"h": h, "z": z, "mean": mean, "logvar": logvar}
-        aux = {
-            "done_prob": float(pred_done_prob.item()),
-            "latent_var": float(std.pow(2).mean().item()),
-        }
+        next_state, pred_obs, pred_reward, pred_done, aux = self.predict_batch(state, [action])
         return (
             next_state,
-            pred_obs.detach().cpu().numpy().reshape(-1),
+            pred_obs.cpu().numpy().reshape(-1),
             float(pred_reward.item()),
-            bool(pred_done_prob.item() > 0.5),
-            aux,
+            bool(pred_done.item()),
+            {
+                "done_prob": float(aux["done_prob"].item()),
+                "latent_var": float(aux["latent_var"].item()),
+            },
         )
 
-    def imagine_rollout(self, state: dict[str, torch.Tensor], action_seq) -> dict[str, Any]:
-        cur = {k: v.clone() for k, v in state.items() if isinstance(v, torch.Tensor)}
-        rewards = []
-        dones = []
-        variances = []
-        for action in action_seq:
-            cur, _obs, reward, done, aux = self.predict(cur, int(action))
-            rewards.append(reward)
-            dones.append(done)
-            variances.append(aux.get("latent_var", 0.0))
-            if done:
-                break
-
-        uncertainty = float(sum(variances) / max(1, len(variances)))
-        return {
-            "pred_rewards": rewards,
-            "pred_dones": dones,
-            "uncertainty": uncertainty,
-        }
-
-    def update(self, batch: list[dict]) -> dict[str, float]:
-        if not batch:
-            return {"loss": 0.0, "kl": 0.0}
-
-        self.train()
-        total = torch.zeros((), device=self.device)
-        kl_total = torch.zeros((), device=self.device)
-
-        for item in batch:
-            posterior_state = self.observe(self.init_state(batch_size=1), item["obs"])
-            action_tensor = self._action_tensor(int(item["action"]))
-            prior_stats = self.prior(torch.cat([posterior_state["h"], action_tensor], dim=-1))
-            mean, logvar = torch.chunk(prior_stats, 2, dim=-1)
-            std = torch.exp(0.5 * logvar).clamp(min=1e-4)
-            eps = self._randn_like(std)
-            z = mean + eps * std
-            h = self.gru(z, posterior_state["h"])
+    @torch.no_grad()
+    def observe_batch(self, prev_state: dict[str, torch.Tensor], obs_batch):
+        """Batched :meth:`observe`; posterior noise is drawn as one ``[B, latent]`` sample."""
+        stats = self.posterior(self.obs_encoder(self._obs_batch_tensor(obs_batch)))
+        mean, logvar = torch.chunk(stats, 2, dim=-1)
+        std = torch.exp(0.5 * logvar).clamp(min=1e-4)
+        z = mean + self._randn_like(std) * std
+        h = self.gru(z, prev_state["h"])
+        return {"h": h, "z": z, "mean": mean, "logvar": logvar}
 
-            pred_reward = self.reward_head(h).squeeze(-1)
-            pred_done_prob = torch.sigmoid(self.done_head(h)).squeeze(-1)
+    @torch.no_grad()
+    def predict_batch(self, state: dict[str, torch.Tensor], actions):
+        """Batched :meth:`predict`; see ``DeterministicLatentModel.predict_batch``.
 
-            target_reward = torch.tensor([item["reward"]], device=self.device)
-            target_done = torch.tensor([float(item["done"])], device=self.device)
+        Prior noise is drawn as one ``[B, latent]`` sample, so ``B`` rows consume
+        the generator in a different order than ``B`` scalar ``predict`` calls.
+        """
+        a = self._action_batch_tensor(actions)
+        mean, logvar = torch.chunk(self.prior(torch.cat([state["h"], a], dim=-1)), 2, dim=-1)
+        std = torch.exp(0.5 * logvar).clamp(min=1e-4)
+        z = mean + self._randn_like(std) * std
+        h = self.gru(z, state["h"])
+        done_prob = torch.sigmoid(self.done_head(h)).squeeze(-1)
+        aux = {"done_prob": done_prob, "latent_var": std.pow(2).mean(dim=-1)}
+        return (
+            {"h": h, "z": z, "mean": mean, "logvar": logvar},
+            self.obs_head(h),
+            self.reward_head(h).squeeze(-1),
+            done_prob > 0.5,
+            aux,
+        )
 
-            reward_loss = (pred_reward - target_reward).pow(2).mean()
-            done_loss = (pred_done_prob - target_done).pow(2).mean()
+    def imagine_rollout(self, state: dict[str, torch.Tensor], action_seq) -> dict[str, Any]:
+        return first_rollout(self.imagine_rollout_batch(state, [list(action_seq)]))
+
+    def imagine_rollout_batch(
+        self, state: dict[str, torch.Tensor], action_seqs, return_obs: bool = False
+    ) -> dict[str, torch.Tensor]:
+        """Batched :meth:`imagine_rollout`; ``uncertainty`` is the mean prior variance."""
+        return masked_rollout(
+            self.predict_batch,
+            state,
+            action_seqs,
+            uncertainty_key="latent_var",
+            return_obs=return_obs,
+        )
 
-            posterior_mean = posterior_state["mean"]
-            posterior_logvar = posterior_state["logvar"]
-            kl = -0.5 * torch.mean(
-                1 + posterior_logvar - posterior_mean.pow(2) - posterior_logvar.exp()
-            )
+    def update(self, batch: TransitionBatch) -> dict[str, float]:
+        """One optimizer step on the mean reward/done/KL loss over ``batch``.
 
-            total = total + reward_loss + done_loss + 0.1 * kl
-            kl_total = kl_total + kl
+        Every transition starts from a fresh state, so the whole batch runs as
+        one ``[N, ...]`` forward and backward pass. Posterior and prior noise
+        are each drawn as one ``[N, latent]`` sample.
+        """
+        if not batch_len(batch):
+            return {"loss": 0.0, "kl": 0.0}
 
-        total = total / len(batch)
-        kl_total = kl_total / len(batch)
+        self.train()
+        obs, actions, target_reward, target_done = self._batch_tensors(batch)
+        posterior = self.posterior(self.obs_encoder(obs))
+        posterior_mean, posterior_logvar = torch.chunk(posterior, 2, dim=-1)
+        posterior_std = torch.exp(0.5 * posterior_logvar).clamp(min=1e-4)
+        z = posterior_mean + self._randn_like(posterior_std) * posterior_std
+        h = self.gru(z, self.init_state(batch_size=len(obs))["h"])
+
+        mean, logvar = torch.chunk(self.prior(torch.cat([h, actions], dim=-1)), 2, dim=-1)
+        std = torch.exp(0.5 * logvar).clamp(min=1e-4)
+        z = mean + self._randn_like(std) * std
+        h = self.gru(z, h)
+
+        pred_reward = self.reward_head(h).squeeze(-1)
+        pred_done_prob = torch.sigmoid(self.done_head(h)).squeeze(-1)
+        reward_loss = (pred_reward - target_reward).pow(2)
+        done_loss = (pred_done_prob - target_done).pow(2)
+        kl = -0.5 * torch.mean(
+            1 + posterior_logvar - posterior_mean.pow(2) - posterior_logvar.exp(), dim=-1
+        )
+        total = (reward_loss + done_loss + 0.1 * kl).mean()
 
         self.optimizer.zero_grad()
         total.backward()
@@ -134,4 +148,4 @@ class StochasticLatentModel(TorchModelBase):
         self.optimizer.step()
         self.eval()
 
-        return {"loss": float(total.item()), "kl": float(kl_total.item())}
+        return {"loss": float(total.item()), "kl": float(kl.mean().item())}